@@ -0,0 +1,74 @@
+"""Compare the streaming text chunker with TextLoader + RecursiveCharacterTextSplitter.
+
+Generates a synthetic text file of paragraphs, log-style line runs and long
+unbroken lines, then splits it with both engines using the configured
+CHUNK_SIZE / CHUNK_OVERLAP. Reports throughput, peak Python memory, chunk
+size statistics and how often chunks end on a sentence or paragraph
+boundary, which is the quality the separators are meant to preserve.
+
+    python benchmarks/bench_chunker.py --mb 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator
+
+from langchain_community.document_loaders import TextLoader
+
+from easyrag.config import settings
+from easyrag.services.document_processor import DocumentProcessor
+from fakes import write_synthetic_text
+
+
+def split_recursive(processor: DocumentProcessor, path: str) -> Iterator[str]:
+    docs = TextLoader(path, encoding="utf-8").load()
+    for chunk in processor.chunk_documents(docs):
+        yield chunk.page_content
+
+
+def split_streaming(processor: DocumentProcessor, path: str) -> Iterator[str]:
+    for batch in processor.iter_text_chunks(path, "bench.txt"):
+        for chunk in batch:
+            yield chunk.page_content
+
+
+def measure(name: str, split, processor: DocumentProcessor, path: str, size_mb: float) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Chunks are consumed one at a time so only the engine's own memory is measured
+    lengths = []
+    on_sentence = 0
+    for chunk in split(processor, path):
+        lengths.append(len(chunk))
+        on_sentence += chunk.endswith(".")
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:>10}: {size_mb / seconds:8.1f} MB/s ({seconds:.2f}s), peak {peak / 2**20:8.1f} MiB, "
+        f"{len(lengths)} chunks, mean {statistics.mean(lengths):.0f} / max {max(lengths)} chars, "
+        f"{on_sentence / len(lengths):.1%} end on a sentence"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=50, help="Size of the synthetic text file")
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    print(f"chunk_size={settings.chunk_size}, chunk_overlap={settings.chunk_overlap}, file={args.mb} MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.txt")
+        write_synthetic_text(path, args.mb)
+        # Memory tracing slows both engines alike; compare throughput between them, not across runs
+        measure("recursive", split_recursive, processor, path, args.mb)
+        measure("streaming", split_streaming, processor, path, args.mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Latency, recall, reopen time and size of the embedded vector index.
+
+Fills scratch indexes with synthetic clustered unit vectors (float32, int8
+and float32 with IVF partitions) and reports per configuration:
+
+* insert throughput
+* p50 latency of single queries, and per query of one batch of all queries
+* p50 latency of queries filtered to two sources
+* recall@k against exact search
+* time to reopen the index from disk, and its size on disk
+
+    python benchmarks/bench_embedded_index.py --points 200000 --dim 384
+"""
+import argparse
+import math
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+from easyrag.services.collection_profile import VectorLayout
+from easyrag.services.embedded_index import EmbeddedIndex
+from easyrag.services.vector_backend import SearchRequest
+
+# Synthetic sources the points are spread over, for filtered queries
+SOURCES = 50
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, dim: int, clusters: int = 200) -> np.ndarray:
+    """Unit vectors around random cluster centres, like embeddings of related chunks."""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.8 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(index: EmbeddedIndex, vectors: np.ndarray, batch_size: int = 4096) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        ids = range(offset, min(offset + batch_size, len(vectors)))
+        index.upsert(
+            [str(i) for i in ids],
+            vectors[offset:offset + batch_size],
+            [{"page_content": "", "metadata": {"source": f"s{i % SOURCES}", "page": i % 300}} for i in ids],
+        )
+    index.flush()
+    return time.perf_counter() - start
+
+
+def search_p50(index: EmbeddedIndex, requests: List[SearchRequest]) -> float:
+    latencies = []
+    for request in requests:
+        start = time.perf_counter()
+        index.search([request])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF partitions (default: sqrt(points))")
+    parser.add_argument("--ivf-probes", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(rng, args.points, args.dim)
+    queries = vectors[rng.choice(args.points, args.queries)] + 0.3 * clustered_vectors(rng, args.queries, args.dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [set(np.argpartition(-(vectors @ query), args.k)[:args.k].tolist()) for query in queries]
+    requests = [SearchRequest(query.tolist(), args.k) for query in queries]
+    sources = Filter(must=[FieldCondition(key="metadata.source", match=MatchAny(any=["s1", "s2"]))])
+    filtered = [SearchRequest(query.tolist(), args.k, sources) for query in queries]
+    ivf_lists = args.ivf_lists or int(math.sqrt(args.points))
+
+    print(f"{args.points} points, {args.dim} dims, {args.queries} queries, k={args.k}")
+    for name, dtype, lists in (("float32", "float32", 0), ("int8", "int8", 0),
+                               (f"float32+ivf{ivf_lists}/{args.ivf_probes}", "float32", ivf_lists)):
+        with tempfile.TemporaryDirectory() as path:
+            index = EmbeddedIndex(path, dtype=dtype, ivf_lists=lists, ivf_probes=args.ivf_probes)
+            index.create(VectorLayout(size=args.dim))
+            insert_seconds = fill(index, vectors)
+
+            single = search_p50(index, requests)
+            start = time.perf_counter()
+            results = index.search(requests)
+            batched = (time.perf_counter() - start) * 1000 / len(requests)
+            filtered_p50 = search_p50(index, filtered)
+            recall = sum(len(expected & {int(hit.id) for hit in hits}) for expected, hits in zip(truth, results))
+            index.close()
+
+            start = time.perf_counter()
+            reopened = EmbeddedIndex(path, ivf_lists=lists, ivf_probes=args.ivf_probes)
+            reopened.load()
+            reopen_seconds = time.perf_counter() - start
+            reopened.close()
+            size = sum(os.path.getsize(os.path.join(path, file)) for file in os.listdir(path))
+
+        print(
+            f"{name:>22}: {args.points / insert_seconds:8.0f} points/s, p50 {single:6.2f} ms, "
+            f"batched {batched:6.2f} ms/query, filtered {filtered_p50:6.2f} ms, "
+            f"recall@{args.k} {recall / (args.k * len(requests)):6.1%}, reopen {reopen_seconds:.2f}s, "
+            f"{size / 2 ** 20:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
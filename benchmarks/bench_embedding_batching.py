@@ -0,0 +1,138 @@
+"""Compare fixed-size and length-bucketed embedding batches on the benchmark corpus.
+
+Chunks a synthetic PDF and text file as ingestion does and sends them to the
+model in pipeline batches of BATCH_SIZE chunks, grouped into forward passes
+
+* ``arrival``: fixed batches of ``--fixed-size`` in arrival order
+* ``sorted``: sorted by length within each call, then fixed batches, which is
+  what sentence-transformers does on its own
+* ``bucketed``: BucketedEmbeddings with EMBED_BATCH_TOKENS / EMBED_MAX_BATCH_SIZE
+
+By default the model is simulated: a forward pass costs time per padded token,
+so the padding efficiency (real tokens / padded tokens) predicts the speedup.
+With ``--real`` the configured EMBED_MODEL is loaded with sentence-transformers
+and chunks/s are measured (``pip install sentence-transformers``)::
+
+    python benchmarks/bench_embedding_batching.py --pages 200
+    python benchmarks/bench_embedding_batching.py --pages 50 --real
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+from easyrag.services.document_processor import DocumentProcessor
+from easyrag.services.embedding_batching import BucketedEmbeddings, approximate_token_counts, tokenizer_token_counts
+from fakes import PaddedCostEmbeddings, write_synthetic_pdf, write_synthetic_text
+
+
+class FixedBatches(Embeddings):
+    """Send every call to the model in fixed-size batches, optionally sorted by length first."""
+
+    def __init__(self, embeddings: Embeddings, size: int, sort: bool, count_tokens=approximate_token_counts):
+        self.embeddings = embeddings
+        self.size = size
+        self.sort = sort
+        self.count_tokens = count_tokens
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        order = list(range(len(texts)))
+        if self.sort:
+            lengths = self.count_tokens(texts)
+            order.sort(key=lambda index: -lengths[index])
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.size):
+            batch = order[start:start + self.size]
+            for index, vector in zip(batch, self.embeddings.embed_documents([texts[i] for i in batch])):
+                vectors[index] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+def corpus(pages: int, text_mb: float) -> List[str]:
+    processor = DocumentProcessor()
+    texts = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        write_synthetic_pdf(pdf_path, pages)
+        for batch in processor.load_document_batched(pdf_path):
+            texts += [chunk.page_content for chunk in processor.chunk_documents(batch)]
+        text_path = os.path.join(tmp, "bench.txt")
+        write_synthetic_text(text_path, text_mb)
+        for batch in processor.iter_text_chunks(text_path, "bench.txt"):
+            texts += [chunk.page_content for chunk in batch]
+    return texts
+
+
+def run(embeddings: Embeddings, texts: List[str]) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(texts), settings.batch_size):
+        embeddings.embed_documents(texts[i:i + settings.batch_size])
+    return time.perf_counter() - start
+
+
+def simulate(texts: List[str], args: argparse.Namespace) -> None:
+    print(f"{'mode':>9} {'passes':>7} {'tokens':>9} {'padded':>9} {'efficiency':>10} {'seconds':>8}")
+    for mode in ("arrival", "sorted", "bucketed"):
+        model = PaddedCostEmbeddings(seconds_per_padded_token=args.us_per_token / 1e6)
+        if mode == "bucketed":
+            embeddings = BucketedEmbeddings(model)
+        else:
+            embeddings = FixedBatches(model, args.fixed_size, sort=mode == "sorted")
+        seconds = run(embeddings, texts)
+        print(
+            f"{mode:>9} {model.forward_passes:>7} {model.tokens:>9} {model.padded_tokens:>9} "
+            f"{model.tokens / model.padded_tokens:>10.1%} {seconds:>8.2f}"
+        )
+
+
+def measure_real(texts: List[str], args: argparse.Namespace) -> None:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from easyrag.services.embedding_service import configure_torch
+
+    model = HuggingFaceEmbeddings(
+        model_name=settings.embed_model,
+        model_kwargs={"trust_remote_code": True},
+        encode_kwargs={"batch_size": args.fixed_size},
+    )
+    configure_torch(model._client)
+    count_tokens = tokenizer_token_counts(model._client)
+    run(model, texts[:settings.batch_size])  # warm up
+
+    seconds = run(model, texts)
+    print(f"  sorted: {len(texts) / seconds:8.1f} chunks/s ({seconds:.1f}s, batch_size={args.fixed_size})")
+    model.encode_kwargs["batch_size"] = settings.embed_max_batch_size
+    seconds = run(BucketedEmbeddings(model, count_tokens), texts)
+    print(f"bucketed: {len(texts) / seconds:8.1f} chunks/s ({seconds:.1f}s, budget={settings.embed_batch_tokens} tokens)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Pages of the synthetic PDF")
+    parser.add_argument("--text-mb", type=float, default=1.0, help="Size of the synthetic text file")
+    parser.add_argument("--fixed-size", type=int, default=32, help="Batch size of the fixed-size modes")
+    parser.add_argument("--us-per-token", type=float, default=0.0, help="Simulated model time per padded token")
+    parser.add_argument("--real", action="store_true", help="Load EMBED_MODEL instead of simulating it")
+    args = parser.parse_args()
+
+    texts = corpus(args.pages, args.text_mb)
+    lengths = approximate_token_counts(texts)
+    print(
+        f"{len(texts)} chunks, ~{min(lengths)}-{max(lengths)} tokens, batch_size={settings.batch_size}, "
+        f"embed_batch_tokens={settings.embed_batch_tokens}, embed_max_batch_size={settings.embed_max_batch_size}"
+    )
+    if args.real:
+        measure_real(texts, args)
+    else:
+        simulate(texts, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Recall and latency of truncated (Matryoshka) vectors with and without rescoring.
+
+Builds three scratch collections from the same synthetic embeddings:
+
+* ``full``: full embeddings, the baseline
+* ``truncated``: the first ``--vector-dim`` dimensions only
+* ``truncated+rescore``: truncated vectors plus full embeddings, with
+  candidates re-ranked by the full embeddings as ``/ask`` does by default
+
+and reports recall@k against exact search on the full embeddings and the
+p50 search latency of each. The synthetic embeddings concentrate their
+energy in the leading dimensions like Matryoshka-trained models do, so the
+numbers only indicate the trade-off; for a real collection, run this
+against its own exported embeddings.
+
+Runs against the Qdrant configured in settings (QDRANT_HOST /
+QDRANT_GRPC_PORT), or an in-memory client with --memory (brute force with
+a slow pure-Python prefetch, so only its recall figures are meaningful), or
+the embedded index with VECTOR_BACKEND=embedded::
+
+    python benchmarks/bench_matryoshka.py --points 50000 --dim 1024 --vector-dim 256
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+from easyrag.services.vector_backend import SearchRequest
+from easyrag.services.vectorstore_service import VectorStoreService
+
+
+def matryoshka_like(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    """Unit vectors whose variance decays with the dimension index."""
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 16.0)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32) * scale
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    scores = queries @ vectors.T
+    return [set(np.argpartition(-row, k)[:k].tolist()) for row in scores]
+
+
+class FixedSizeModel:
+    """Stand-in model that only reports the embedding size when the collection is created."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        return [0.0] * self.dim
+
+
+async def build(service: VectorStoreService, vectors: np.ndarray) -> None:
+    await service.delete_collection()
+    docs = [Document(page_content=str(i), metadata={"source": "bench", "start_index": i}) for i in range(len(vectors))]
+    for start in range(0, len(docs), settings.upsert_batch_size):
+        batch = docs[start:start + settings.upsert_batch_size]
+        await service.upsert_documents(batch, vectors[start:start + len(batch)].tolist(),
+                                       ids=list(range(start, start + len(batch))))
+
+
+async def measure(service: VectorStoreService, queries: np.ndarray, truth: List[set], k: int, rescore: bool) -> dict:
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        request = SearchRequest(query.tolist(), k, None, rescore and service.vector_layout.can_rescore)
+        start = time.perf_counter()
+        points = (await service.backend.search([request]))[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {int(point.id) for point in points})
+    return {"recall": hits / (k * len(queries)), "p50_latency_ms": statistics.median(latencies)}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024, help="Full embedding dimension")
+    parser.add_argument("--vector-dim", type=int, default=256, help="Truncated dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--memory", action="store_true", help="Use an in-memory Qdrant client")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = matryoshka_like(rng, args.points, args.dim)
+    # Queries close to stored points, as real queries are close to their answers
+    queries = vectors[rng.choice(args.points, args.queries)] + 0.5 * matryoshka_like(rng, args.queries, args.dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    settings.collection_name = "easyrag_bench_matryoshka"
+    service = VectorStoreService()
+    if args.memory:
+        service._async_client = AsyncQdrantClient(":memory:")
+
+    print(f"{args.points} points, {args.dim} -> {args.vector_dim} dims, {args.queries} queries, k={args.k}, "
+          f"rescore oversampling {settings.rescore_oversampling}")
+    layouts = (
+        ("full", None, False, False),
+        ("truncated", args.vector_dim, False, False),
+        ("truncated+rescore", args.vector_dim, True, True),
+    )
+    try:
+        for name, vector_dim, store_full, rescore in layouts:
+            settings.vector_dim = vector_dim
+            settings.store_full_vectors = store_full
+            service._embeddings = FixedSizeModel(args.dim)
+            await build(service, vectors)
+            result = await measure(service, queries, truth, args.k, rescore)
+            print(f"{name:>18}: recall@{args.k} {result['recall']:6.1%}, p50 {result['p50_latency_ms']:7.2f} ms")
+    finally:
+        await service.delete_collection()
+        await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Latency overhead of MMR re-ranking for /ask.
+
+Measures ``mmr_select`` alone for ``MAX_K`` results out of several candidate
+counts, then the search path of an ``/ask`` query on a scratch embedded
+collection of synthetic unit vectors, with plain similarity and with MMR
+(``MMR_FETCH_K`` candidates fetched with their embeddings in the same
+search, then re-ranked). Reports p50 and p99 in milliseconds.
+
+    python benchmarks/bench_mmr.py --points 100000 --dim 1024
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from easyrag.config import settings
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.embedded_index import EmbeddedBackend
+from easyrag.services.mmr import mmr_select
+from easyrag.services.vector_backend import SearchRequest, embedding_of
+
+
+def unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def summarize(latencies: List[float]) -> str:
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return f"p50 {statistics.median(latencies):7.3f} ms, p99 {p99:7.3f} ms"
+
+
+def time_calls(func: Callable[[], object], runs: int) -> List[float]:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def time_searches(backend: EmbeddedBackend, queries: np.ndarray, k: int, mmr: bool) -> List[float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        if mmr:
+            request = SearchRequest(query.tolist(), max(settings.mmr_fetch_k, k), with_vectors=True)
+            hits = (await backend.search([request]))[0]
+            mmr_select(
+                np.array([hit.score for hit in hits], dtype=np.float32),
+                np.asarray([embedding_of(hit.vector) for hit in hits], dtype=np.float32),
+                k,
+                settings.mmr_lambda_mult,
+            )
+        else:
+            await backend.search([SearchRequest(query.tolist(), k)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run(args: argparse.Namespace, path: str) -> None:
+    rng = np.random.default_rng(0)
+    k = settings.max_k
+
+    print(f"mmr_select, k={k}, {args.dim} dims:")
+    for fetch_k in sorted({k, settings.mmr_fetch_k, 100, 200}):
+        relevance = np.sort(rng.random(fetch_k, dtype=np.float32))[::-1]
+        vectors = unit_vectors(rng, fetch_k, args.dim)
+        latencies = time_calls(lambda: mmr_select(relevance, vectors, k, settings.mmr_lambda_mult), args.queries)
+        print(f"{'fetch_k=' + str(fetch_k):>16}: {summarize(latencies)}")
+
+    backend = EmbeddedBackend("bench", path=os.path.join(path, "index"))
+    await backend.create_collection(args.dim)
+    await backend.open()
+    writer = BulkWriter(backend)
+    for offset in range(0, args.points, settings.upsert_batch_size):
+        count = min(settings.upsert_batch_size, args.points - offset)
+        payloads = [{"page_content": f"chunk {offset + i}", "metadata": {"source": "bench"}} for i in range(count)]
+        await writer.write([str(offset + i) for i in range(count)], unit_vectors(rng, count, args.dim), payloads)
+    await writer.flush()
+
+    queries = unit_vectors(rng, args.queries, args.dim)
+    await time_searches(backend, queries[:10], k, mmr=True)
+    print(f"search, {args.points} points, k={k}, fetch_k={max(settings.mmr_fetch_k, k)}:")
+    print(f"{'similarity':>16}: {summarize(await time_searches(backend, queries, k, mmr=False))}")
+    print(f"{'mmr':>16}: {summarize(await time_searches(backend, queries, k, mmr=True))}")
+    await backend.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
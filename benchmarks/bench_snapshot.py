@@ -0,0 +1,84 @@
+"""Snapshot export/import throughput, size and memory against a plain bulk load.
+
+Fills a scratch embedded collection with synthetic unit vectors through the
+bulk writer, then exports it to float32 and float16 snapshots and imports
+each one into a new collection. Reports points/s, snapshot size and the
+peak Python memory allocated during each step, which stays at a few batches
+however large the collection is.
+
+    python benchmarks/bench_snapshot.py --points 200000 --dim 384
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from easyrag.config import settings
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.embedded_index import EmbeddedBackend
+from easyrag.services.snapshot import export_snapshot, import_snapshot
+
+
+def measure_start() -> float:
+    tracemalloc.reset_peak()
+    return time.perf_counter()
+
+
+def measure_end(start: float, points: int) -> str:
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    return f"{points / seconds:9.0f} points/s, peak {peak / 2 ** 20:6.1f} MB allocated"
+
+
+async def run(args: argparse.Namespace, path: str) -> None:
+    rng = np.random.default_rng(0)
+    source = EmbeddedBackend("source", path=os.path.join(path, "index"))
+    await source.create_collection(args.dim)
+    await source.open()
+
+    start = measure_start()
+    writer = BulkWriter(source, batch_size=args.batch_size)
+    for offset in range(0, args.points, args.batch_size):
+        count = min(args.batch_size, args.points - offset)
+        vectors = rng.standard_normal((count, args.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        payloads = [{"page_content": f"chunk {offset + i}", "metadata": {"source": f"s{(offset + i) % 50}"}}
+                    for i in range(count)]
+        await writer.write([str(offset + i) for i in range(count)], vectors, payloads)
+    await writer.flush()
+    print(f"{'bulk load':>16}: {measure_end(start, args.points)}")
+
+    for dtype in ("float32", "float16"):
+        snapshot = os.path.join(path, f"snapshot-{dtype}")
+        start = measure_start()
+        await export_snapshot(source, snapshot, float16=dtype == "float16", batch_size=args.batch_size)
+        size = sum(os.path.getsize(os.path.join(snapshot, file)) for file in os.listdir(snapshot))
+        print(f"{'export ' + dtype:>16}: {measure_end(start, args.points)}, {size / 2 ** 20:.0f} MB")
+
+        target = EmbeddedBackend(f"target-{dtype}", path=os.path.join(path, f"index-{dtype}"))
+        start = measure_start()
+        await import_snapshot(snapshot, target, batch_size=args.batch_size)
+        print(f"{'import ' + dtype:>16}: {measure_end(start, args.points)}")
+        await target.close()
+    await source.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=settings.upsert_batch_size)
+    args = parser.parse_args()
+
+    print(f"{args.points} points, {args.dim} dims, batches of {args.batch_size}")
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as path:
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare upsert throughput of the per-batch path and the bulk writer.
+
+Uses random vectors so only the backend write path is measured. Runs against
+the Qdrant configured in settings (QDRANT_HOST / QDRANT_GRPC_PORT), an
+in-memory client with --memory, or the embedded index with
+VECTOR_BACKEND=embedded. Writes to a scratch collection that is dropped
+afterwards.
+
+    python benchmarks/bench_upsert.py --points 50000 --dim 1024
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+from easyrag.services.vectorstore_service import VectorStoreService, build_payload, point_id_for
+
+
+def make_documents(count: int):
+    return [
+        Document(page_content=f"synthetic chunk {i} " * 20, metadata={"source": "bench.txt", "page": i // 10, "start_index": i})
+        for i in range(count)
+    ]
+
+
+async def reset_collection(service: VectorStoreService, dim: int) -> None:
+    # The backend is bound to a collection name, which the suite changes
+    service._backend = None
+    await service.delete_collection()
+    # Create the collection without loading a model
+    await service.backend.create_collection(dim)
+    await service._ensure_collection_exists()
+
+
+async def bench_batched_upsert(service: VectorStoreService, docs, vectors: np.ndarray, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        await service.upsert_documents(docs[i:i + batch_size], vectors[i:i + batch_size].tolist())
+    return time.perf_counter() - start
+
+
+async def bench_bulk_writer(service: VectorStoreService, docs, vectors: np.ndarray, batch_size: int) -> float:
+    start = time.perf_counter()
+    writer = service.bulk_writer()
+    for i in range(0, len(docs), batch_size):
+        batch = docs[i:i + batch_size]
+        await writer.write([point_id_for(doc) for doc in batch], vectors[i:i + batch_size], [build_payload(doc) for doc in batch])
+    await writer.flush()
+    return time.perf_counter() - start
+
+
+async def run_upsert_benchmark(service: VectorStoreService, points: int, dim: int, batch_size: int) -> dict:
+    """Time both write paths into a fresh collection and return points/s for each."""
+    docs = make_documents(points)
+    vectors = np.random.default_rng(0).standard_normal((points, dim)).astype(np.float32)
+
+    results = {}
+    for name, bench in (("batched_upsert", bench_batched_upsert), ("bulk_writer", bench_bulk_writer)):
+        await reset_collection(service, dim)
+        seconds = await bench(service, docs, vectors, batch_size)
+        count = await service.backend.count()
+        results[name] = {"points": count, "seconds": seconds, "points_per_second": points / seconds}
+    await service.delete_collection()
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=settings.batch_size)
+    parser.add_argument("--memory", action="store_true", help="Use an in-memory Qdrant client")
+    args = parser.parse_args()
+
+    settings.collection_name = "easyrag_bench_upsert"
+    service = VectorStoreService()
+    if args.memory:
+        service._async_client = AsyncQdrantClient(":memory:")
+
+    results = await run_upsert_benchmark(service, args.points, args.dim, args.batch_size)
+    for name, result in results.items():
+        print(
+            f"{name:>15}: {result['points_per_second']:10.0f} points/s "
+            f"({result['seconds']:.2f}s, {result['points']} points stored)"
+        )
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Deterministic stand-ins for the embedding model and input documents.
+
+Shared by the benchmarks so they run without network access or model
+downloads and produce the same inputs on every run.
+"""
+import hashlib
+import random
+import time
+from typing import List
+
+import numpy as np
+import pymupdf
+from langchain_core.embeddings import Embeddings
+
+WORDS = "amazon instance volume region subnet latency throughput replica snapshot bucket policy cluster".split()
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Embeddings derived from a hash of the text.
+
+    The same text always maps to the same unit vector, so search results are
+    reproducible. ``seconds_per_text`` simulates model cost for benchmarks
+    where the embedding stage should not be free.
+    """
+
+    def __init__(self, dim: int = 384, seconds_per_text: float = 0.0):
+        self.dim = dim
+        self.seconds_per_text = seconds_per_text
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class PaddedCostEmbeddings(FakeEmbeddings):
+    """
+    FakeEmbeddings that treats every call as one forward pass over a padded batch.
+
+    Records how many tokens the model would process, real and padded, and
+    sleeps ``seconds_per_padded_token`` per padded token, which is how
+    transformer cost scales with batch shape.
+    """
+
+    def __init__(self, dim: int = 384, seconds_per_padded_token: float = 0.0, count_tokens=None):
+        super().__init__(dim)
+        from easyrag.services.embedding_batching import approximate_token_counts
+
+        self.seconds_per_padded_token = seconds_per_padded_token
+        self.count_tokens = count_tokens or approximate_token_counts
+        self.forward_passes = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        lengths = self.count_tokens(texts)
+        padded = len(texts) * max(lengths, default=0)
+        self.forward_passes += 1
+        self.tokens += sum(lengths)
+        self.padded_tokens += padded
+        if self.seconds_per_padded_token:
+            time.sleep(self.seconds_per_padded_token * padded)
+        return [self._embed(text) for text in texts]
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))).capitalize() + "."
+
+
+def write_synthetic_text(path: str, size_mb: float, seed: int = 0) -> None:
+    """Write paragraphs, log-style line runs and long unbroken lines up to size_mb."""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            kind = rng.random()
+            if kind < 0.8:
+                block = " ".join(sentence(rng) for _ in range(rng.randint(1, 12)))
+            elif kind < 0.97:
+                block = "\n".join(f"{i:06d} INFO {sentence(rng)}" for i in range(rng.randint(3, 40)))
+            else:
+                block = "".join(rng.choice(WORDS) for _ in range(rng.randint(100, 400)))
+            block += "\n\n"
+            f.write(block)
+            written += len(block)
+
+
+def write_synthetic_pdf(path: str, pages: int, seed: int = 0) -> None:
+    """Write a PDF whose pages hold a few paragraphs of text, like a manual."""
+    rng = random.Random(seed)
+    pdf = pymupdf.open()
+    for page_number in range(pages):
+        page = pdf.new_page()
+        paragraphs = [f"Section {page_number + 1}"]
+        paragraphs += [" ".join(sentence(rng) for _ in range(rng.randint(2, 5))) for _ in range(rng.randint(3, 6))]
+        page.insert_textbox(page.rect + (50, 50, -50, -50), "\n\n".join(paragraphs), fontsize=9)
+    pdf.save(path)
+    pdf.close()
+
+
+def synthetic_queries(count: int, seed: int = 1) -> List[str]:
+    """Generate distinct natural-language-like queries."""
+    rng = random.Random(seed)
+    return [f"{i} {sentence(rng)}" for i in range(count)]
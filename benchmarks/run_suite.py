@@ -0,0 +1,263 @@
+"""Offline benchmark suite for the ingestion and query paths.
+
+Needs no network, model download or Qdrant server: embeddings come from a
+deterministic hash-based fake, points go to an in-memory Qdrant client and
+the input documents are synthetic. Measures
+
+* pages/s of DocumentProcessor.load_document_batched on a synthetic PDF
+* chunks/s of DocumentProcessor.chunk_documents on those pages
+* points/s of VectorStoreService.add_documents_batched
+* points/s of the batched upsert and bulk writer paths (bench_upsert)
+* p50/p95/p99 latency and QPS of POST /api/v1/ask under concurrency
+* seconds to import ``easyrag.main`` in a fresh interpreter, and which heavy
+  libraries that import pulls in (they should load lazily)
+
+and writes the results as JSON, by default to
+``benchmarks/results/<timestamp>-<commit>.json``. Pass ``--compare`` with an
+earlier result file to print the change of every metric.
+
+The in-memory client scans points brute-force and the fake model is nearly
+free, so absolute numbers are not those of a deployment; the suite is meant
+for comparing commits on the same machine. ``/ask`` is driven in-process
+through httpx's ASGI transport (``pip install httpx``).
+
+    python benchmarks/run_suite.py --pages 500 --requests 2000 --concurrency 16
+    python benchmarks/run_suite.py --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Metrics where a lower value is better; everything else is a throughput
+LOWER_IS_BETTER = ("seconds", "latency_ms")
+
+# Libraries that must not be imported until a request needs them
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "langchain_community", "langchain_qdrant",
+                 "langchain_text_splitters", "pymupdf")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def bench_import(runs: int = 3) -> dict:
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import easyrag.main\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(seconds, *[name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+    # Best of several runs: the import is short and sensitive to disk cache noise
+    return {"import_seconds": min(timings), "heavy_modules_imported": output[1:]}
+
+
+def bench_load_and_chunk(pdf_path: str, pages: int) -> dict:
+    from easyrag.services.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor()
+    start = time.perf_counter()
+    docs = [doc for batch in processor.load_document_batched(pdf_path) for doc in batch]
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = processor.chunk_documents(docs)
+    chunk_seconds = time.perf_counter() - start
+
+    return {
+        "load_document_batched": {
+            "pages": pages,
+            "seconds": load_seconds,
+            "pages_per_second": pages / load_seconds,
+        },
+        "chunk_documents": {
+            "chunks": len(chunks),
+            "seconds": chunk_seconds,
+            "chunks_per_second": len(chunks) / chunk_seconds,
+        },
+        "_chunks": chunks,
+    }
+
+
+async def bench_add_documents(service, chunks) -> dict:
+    start = time.perf_counter()
+    added = await service.add_documents_batched(chunks)
+    seconds = time.perf_counter() - start
+    return {"points": added, "seconds": seconds, "points_per_second": added / seconds}
+
+
+async def bench_ask(app, requests: int, concurrency: int, k: int) -> dict:
+    import httpx
+
+    from fakes import synthetic_queries
+
+    queries = synthetic_queries(requests)
+    latencies: List[float] = []
+    errors = 0
+    next_query = iter(queries)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        # Warm up the route, the executors and the micro-batcher
+        await client.post("/api/v1/ask", json={"query": "warm up"})
+
+        async def worker() -> None:
+            nonlocal errors
+            for query in next_query:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/ask", json={"query": query})
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200 or len(response.json()["results"]) != k:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": seconds,
+        "qps": requests / seconds,
+        "p50_latency_ms": percentile(latencies, 0.50),
+        "p95_latency_ms": percentile(latencies, 0.95),
+        "p99_latency_ms": percentile(latencies, 0.99),
+        "mean_latency_ms": statistics.mean(latencies),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from fakes import FakeEmbeddings, write_synthetic_pdf
+
+    # Scratch collection, and every query must reach the model and Qdrant
+    settings.collection_name = "easyrag_bench_suite"
+    settings.query_vector_cache_size = 0
+    settings.query_result_cache_size = 0
+    settings.embedding_cache_path = None
+
+    from easyrag import dependencies
+    from easyrag.main import app
+    from bench_upsert import run_upsert_benchmark
+
+    service = dependencies.get_vectorstore_service()
+    service._embeddings = FakeEmbeddings(dim=args.dim, seconds_per_text=args.embed_ms / 1000)
+    service._async_client = AsyncQdrantClient(":memory:")
+
+    results = {"startup": bench_import()}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        write_synthetic_pdf(pdf_path, args.pages)
+        results.update(bench_load_and_chunk(pdf_path, args.pages))
+    chunks = results.pop("_chunks")
+
+    results["add_documents_batched"] = await bench_add_documents(service, chunks)
+    await service.refresh_collection_state()
+    results["ask"] = await bench_ask(app, args.requests, args.concurrency, min(settings.default_k, len(chunks)))
+
+    settings.collection_name = "easyrag_bench_upsert"
+    upsert_results = await run_upsert_benchmark(service, args.upsert_points, args.dim, settings.batch_size)
+    for name, result in upsert_results.items():
+        results[f"upsert_{name}"] = result
+    await service.close()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "pages": args.pages,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "dim": args.dim,
+            "embed_ms": args.embed_ms,
+            "upsert_points": args.upsert_points,
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "batch_size": settings.batch_size,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\nChange from {baseline['commit']} ({baseline['timestamp']}) to {current['commit']}:")
+    for bench, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            if not metric.endswith(("_per_second", "qps", "_latency_ms", "import_seconds")):
+                continue
+            old = baseline["results"].get(bench, {}).get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            better = change < 0 if metric.endswith(LOWER_IS_BETTER) else change > 0
+            name = f"{bench}.{metric}"
+            print(f"  {name:<42} {old:12.2f} -> {value:12.2f}  {change:+7.1%} {'better' if better else 'worse'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300, help="Pages of the synthetic PDF")
+    parser.add_argument("--requests", type=int, default=1000, help="/ask requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent /ask clients")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="Simulated model time per text")
+    parser.add_argument("--upsert-points", type=int, default=20000, help="Points written by the upsert benchmark")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+
+    output = args.output
+    if output is None:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        output = os.path.join(BENCHMARKS_DIR, "results", f"{stamp}-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
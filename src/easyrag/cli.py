@@ -0,0 +1,242 @@
+"""Command line tools for Easy RAG maintenance tasks."""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import List, Tuple
+
+from easyrag.config import settings
+
+# File types picked up when ingesting a directory
+DEFAULT_EXTENSIONS = "pdf,txt,md"
+
+
+async def _migrate(args: argparse.Namespace) -> int:
+    from easyrag.services.collection_migration import migrate_collection
+    from easyrag.services.vectorstore_service import VectorStoreService
+
+    if settings.vector_backend != "qdrant":
+        print("migrate-collection needs VECTOR_BACKEND=qdrant (collection aliases are a Qdrant feature)", file=sys.stderr)
+        return 2
+    service = VectorStoreService()
+    try:
+        summary = await migrate_collection(service.async_client, keep_old=args.keep_old)
+    finally:
+        await service.close()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+async def _snapshot_export(args: argparse.Namespace) -> int:
+    from easyrag.services.snapshot import export_snapshot
+    from easyrag.services.vectorstore_service import VectorStoreService
+
+    if os.path.exists(args.path):
+        print(f"{args.path} already exists", file=sys.stderr)
+        return 1
+    service = VectorStoreService()
+    try:
+        if not await service.backend.collection_exists():
+            print(f"Collection {settings.collection_name} does not exist", file=sys.stderr)
+            return 1
+        manifest = await export_snapshot(service.backend, args.path, float16=args.float16, batch_size=args.batch_size)
+    finally:
+        await service.close()
+    print(json.dumps(manifest, indent=2))
+    return 0
+
+
+async def _snapshot_import(args: argparse.Namespace) -> int:
+    from easyrag.services.snapshot import import_snapshot, restore_snapshot
+    from easyrag.services.vector_backend import create_backend
+    from easyrag.services.vectorstore_service import VectorStoreService
+
+    service = VectorStoreService()
+    backend = create_backend(
+        args.collection or settings.collection_name,
+        service.async_client if settings.vector_backend == "qdrant" else None,
+    )
+    try:
+        if await backend.collection_exists():
+            if not args.replace:
+                print(f"Collection {backend.collection_name} already exists; use --replace to overwrite it",
+                      file=sys.stderr)
+                return 1
+            # Loaded next to the existing collection, which is only dropped once the load succeeded
+            manifest = await restore_snapshot(args.path, backend, batch_size=args.batch_size)
+        else:
+            manifest = await import_snapshot(args.path, backend, batch_size=args.batch_size)
+    finally:
+        await backend.close()
+        await service.close()
+    print(json.dumps({**manifest, "collection": backend.collection_name, "backend": backend.name}, indent=2))
+    return 0
+
+
+def collect_files(paths: List[str], recursive: bool, extensions: List[str]) -> List[Tuple[str, str]]:
+    """
+    Find the documents to ingest.
+
+    Files given directly are named by their basename, like uploads. Files
+    found in a directory are named by their path relative to it, so equally
+    named files in different subdirectories stay separate documents.
+
+    Args:
+        paths: Files and directories
+        recursive: Descend into subdirectories
+        extensions: File extensions to pick up from directories
+
+    Returns:
+        List of (file path, source name) tuples
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append((path, os.path.basename(path)))
+            continue
+        for root, dirs, names in os.walk(path):
+            if not recursive:
+                dirs.clear()
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().rsplit(".", 1)[-1] in extensions:
+                    file_path = os.path.join(root, name)
+                    files.append((file_path, os.path.relpath(file_path, path)))
+    return files
+
+
+async def _ingest(args: argparse.Namespace) -> int:
+    from easyrag.services.document_processor import DocumentProcessor
+    from easyrag.services.executors import shutdown_executors
+    from easyrag.services.ingestion_pipeline import IngestionPipeline
+    from easyrag.services.job_service import IngestionJob, JobManager
+    from easyrag.services.vectorstore_service import VectorStoreService
+
+    extensions = [extension.strip().lower().lstrip(".") for extension in args.extensions.split(",")]
+    files = collect_files(args.paths, args.recursive, extensions)
+    logging.getLogger(__name__).info(f"Ingesting {len(files)} files")
+
+    service = VectorStoreService()
+    pipeline = IngestionPipeline(DocumentProcessor(), service)
+    job_manager = JobManager(max_concurrent_jobs=args.concurrency, max_history=len(files) or None)
+    jobs = [
+        job_manager.submit(
+            IngestionJob(source),
+            lambda job, path=path, source=source: pipeline.run(path, job, original_filename=source),
+        )
+        for path, source in files
+    ]
+    try:
+        await job_manager.wait(jobs)
+    finally:
+        await job_manager.shutdown()
+        await service.close()
+        shutdown_executors()
+
+    for job in jobs:
+        print(json.dumps({
+            "source": job.filename,
+            "status": job.status,
+            "error": job.error,
+            "document_unchanged": job.document_unchanged,
+            "chunks_added": job.chunks_added,
+            "chunks_unchanged": job.chunks_unchanged,
+            "chunks_removed": job.chunks_removed,
+            "elapsed_seconds": round(job.elapsed_seconds, 3),
+        }))
+    failed = sum(job.status != "completed" for job in jobs)
+    logging.getLogger(__name__).info(
+        f"Indexed {sum(job.chunks_indexed for job in jobs)} chunks from {len(jobs) - failed} files, {failed} failed"
+    )
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(prog="easyrag", description="Easy RAG maintenance tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser(
+        "migrate-collection",
+        help="Re-create the collection under the configured layout profile without re-embedding",
+    )
+    migrate.add_argument("--keep-old", action="store_true", help="Keep the previous collection")
+    migrate.set_defaults(handler=_migrate)
+
+    ingest = subparsers.add_parser(
+        "ingest",
+        help="Index files and directories in parallel, printing one JSON status line per file",
+    )
+    ingest.add_argument("paths", nargs="+", help="Files or directories to index")
+    ingest.add_argument("-r", "--recursive", action="store_true", help="Descend into subdirectories")
+    ingest.add_argument(
+        "--extensions",
+        default=DEFAULT_EXTENSIONS,
+        help=f"Comma separated file types picked up from directories (default: {DEFAULT_EXTENSIONS})",
+    )
+    ingest.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.max_concurrent_jobs,
+        help="Files indexed at the same time (default: MAX_CONCURRENT_JOBS)",
+    )
+    ingest.set_defaults(handler=_ingest)
+
+    snapshot_export = subparsers.add_parser(
+        "snapshot-export",
+        help="Write the stored embeddings and payloads of the collection to a snapshot directory",
+    )
+    snapshot_export.add_argument("path", help="Snapshot directory to create")
+    snapshot_export.add_argument("--float16", action="store_true", help="Store the vectors as float16")
+    snapshot_export.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Points read per request (default: UPSERT_BATCH_SIZE)",
+    )
+    snapshot_export.set_defaults(handler=_snapshot_export)
+
+    snapshot_import = subparsers.add_parser(
+        "snapshot-import",
+        help="Load a snapshot into a new collection of the configured backend without re-embedding",
+    )
+    snapshot_import.add_argument("path", help="Snapshot directory")
+    snapshot_import.add_argument(
+        "--collection",
+        default=None,
+        help="Collection to create (default: COLLECTION_NAME)",
+    )
+    snapshot_import.add_argument("--replace", action="store_true", help="Replace the collection if it exists, once the snapshot has been loaded")
+    snapshot_import.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Points per upsert (default: UPSERT_BATCH_SIZE)",
+    )
+    snapshot_import.set_defaults(handler=_snapshot_import)
+
+    return parser
+
+
+def main() -> None:
+    """Run the command line interface."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    args = build_parser().parse_args()
+    location = settings.embedded_index_path if settings.vector_backend == "embedded" else settings.qdrant_host
+    logging.getLogger(__name__).info(f"Using collection {settings.collection_name} at {location}")
+    from easyrag.services.embedded_index import IndexLockedError
+
+    try:
+        sys.exit(asyncio.run(args.handler(args)))
+    except IndexLockedError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
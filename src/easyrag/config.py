@@ -1,4 +1,5 @@
 """Application configuration settings."""
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -10,18 +11,156 @@ class Settings(BaseSettings):
     qdrant_host: str = "localhost"
     qdrant_grpc_port: int = 6334
     collection_name: str = "rag_store"
+    # Interval of the background refresh of the cached collection state. The state is
+    # per process: writes by other API workers or `easyrag ingest` show up in point
+    # counts and invalidate cached results (through the write marker published on the
+    # collection) only at the next refresh
+    collection_state_refresh_seconds: float = 10.0
+
+    # Vector Backend Configuration
+    # "qdrant" keeps points on the Qdrant server; "embedded" keeps them in an
+    # in-process index under EMBEDDED_INDEX_PATH, served by a single API process
+    vector_backend: Literal["qdrant", "embedded"] = "qdrant"
+    embedded_index_path: str = "data/index"
+    # Storage type of the searched vectors; int8 needs a quarter of the memory
+    embedded_index_dtype: Literal["float32", "int8"] = "float32"
+    # IVF partitions of the embedded index (0 scans every vector); they are
+    # trained once the collection holds 40 vectors per partition
+    embedded_index_ivf_lists: int = 0
+    # Partitions scanned per query
+    embedded_index_ivf_probes: int = 8
+
+    # Snapshot Configuration
+    # Directory of the snapshots exported and restored through the API
+    snapshot_dir: str = "data/snapshots"
+
+    # Collection Layout Configuration (applied when the collection is created
+    # or re-created with `easyrag migrate-collection`)
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    # Search-time HNSW beam width; None uses Qdrant's default
+    hnsw_ef: Optional[int] = None
+    quantization: Literal["none", "scalar", "binary"] = "none"
+    quantization_always_ram: bool = True
+    # Re-score quantized candidates with the original vectors
+    quantization_rescore: bool = True
+    quantization_oversampling: float = 2.0
+    vectors_on_disk: bool = False
+    payload_on_disk: bool = False
+    # HNSW indexing threshold in KB; None uses Qdrant's default
+    indexing_threshold: Optional[int] = None
+    # Indexing threshold while bulk loading a migrated collection (0 defers indexing)
+    bulk_load_indexing_threshold: int = 0
+    # Matryoshka truncation: index only the first VECTOR_DIM dimensions of each
+    # embedding (renormalized); None indexes full embeddings
+    vector_dim: Optional[int] = None
+    # With truncation, also keep the full embeddings (on disk, not indexed) for rescoring
+    store_full_vectors: bool = True
 
     # Embedding Model Configuration
     embed_model: str = "Qwen/Qwen3-Embedding-0.6B"
+    # Padded tokens per forward pass (texts x longest text of the batch); documents
+    # are grouped by token length under this budget. 0 keeps the model's own batching
+    embed_batch_tokens: int = 8192
+    embed_max_batch_size: int = 64
+    # torch threads for CPU inference (0 keeps torch's default of one per core)
+    embed_threads: int = 0
+    # int8 dynamic quantization of the model's linear layers (CPU only)
+    embed_quantize: bool = False
+
+    # Embedding Server Configuration
+    # When set, workers connect to a shared embedding server on this Unix socket
+    # instead of loading their own copy of the model
+    embedding_server_socket: Optional[str] = None
+    # Shared secret of the server and its workers, required when the socket is set
+    embedding_server_authkey: Optional[str] = None
+
+    # Embedding Cache Configuration
+    # SQLite file caching chunk embeddings across uploads (empty disables the cache)
+    embedding_cache_path: Optional[str] = "data/embedding_cache.sqlite3"
+    embedding_cache_max_mb: int = 2048
 
     # Document Processing Configuration
     chunk_size: int = 800  # Increased for better context preservation
     chunk_overlap: int = 100  # Increased overlap for better continuity
     batch_size: int = 100
+    # Bytes read per chunk when spooling uploads to disk
+    upload_chunk_size: int = 1024 * 1024
+
+    # Executor Configuration
+    # Threads for embedding forward passes (torch parallelises within a pass)
+    embed_workers: int = 1
+    # Threads for document parsing and chunking
+    cpu_workers: int = 2
+    # Worker processes parsing and chunking page ranges in parallel (0 uses the CPU threads)
+    parse_processes: int = 2
+
+    # Bulk Upsert Configuration
+    # Points per upsert request and upsert requests in flight during ingestion
+    upsert_batch_size: int = 256
+    upsert_max_in_flight: int = 4
+
+    # Ingestion Job Configuration
+    # Maximum batches buffered between pipeline stages
+    pipeline_queue_size: int = 2
+    max_concurrent_jobs: int = 2
+    # Jobs waiting to start; further uploads are rejected with 429
+    max_queued_jobs: int = 100
+    # Number of finished jobs kept for status queries
+    job_history_size: int = 100
+    # Maximum files per multi-file upload
+    max_batch_files: int = 100
+
+    # Admission Control Configuration
+    # Queries get the embedding model and the vector backend before waiting
+    # ingestion work. Upserts in flight across all ingestion jobs:
+    ingest_max_upserts_in_flight: int = 8
+    # Qdrant requests in flight (searches and upserts); the embedded index uses CPU_WORKERS
+    backend_max_concurrency: int = 32
+    # Queries waiting for the vector backend; further queries are rejected with 429
+    max_waiting_queries: int = 1024
+    # Retry-After sent with 429 responses when no better estimate is available
+    retry_after_seconds: int = 5
 
     # Retrieval Configuration
     default_k: int = 8
     max_k: int = 20
+    # Maximum number of queries accepted by /api/v1/ask/batch
+    max_batch_queries: int = 1000
+    # Rescore truncated-vector candidates with the full embeddings (when stored);
+    # /ask can override it per query with "rescore"
+    rescore_full_vectors: bool = True
+    # Candidates fetched with the truncated vector per result when rescoring
+    rescore_oversampling: float = 4.0
+    # Candidates fetched with their embeddings for /ask with "search_type": "mmr"
+    # (at least k), and the default relevance/diversity trade-off (1 = relevance only)
+    mmr_fetch_k: int = 40
+    mmr_lambda_mult: float = 0.5
+
+    # Query Micro-batching Configuration
+    # Concurrent /ask queries are embedded together; 0 disables batching
+    query_batch_window_ms: float = 5.0
+    query_batch_max_size: int = 32
+    query_batch_queue_depth: int = 1024
+
+    # Query Cache Configuration
+    query_vector_cache_size: int = 4096
+    query_vector_cache_ttl: float = 3600.0  # seconds
+    query_result_cache_size: int = 1024
+    query_result_cache_ttl: float = 300.0  # seconds
+
+    # Metrics Configuration
+    # Add a Server-Timing header with per-stage durations to /ask responses
+    server_timing: bool = False
+
+    # Startup Configuration
+    # Load the embedding model, open the collection and start the parse workers
+    # in the background at startup; /ready reports when this has finished
+    warmup_on_startup: bool = True
+    # Dummy texts embedded during warm-up (0 only loads the model)
+    warmup_batch_size: int = 8
+    # Delay before retrying a failed warm-up (e.g. Qdrant not reachable yet)
+    warmup_retry_seconds: float = 5.0
 
     # Server Configuration
     host: str = "0.0.0.0"
@@ -0,0 +1,36 @@
+"""Shared service instances injected into the API routers."""
+from functools import lru_cache
+
+from easyrag.services.document_processor import DocumentProcessor
+from easyrag.services.job_service import JobManager
+from easyrag.services.readiness import Readiness
+from easyrag.services.vectorstore_service import VectorStoreService
+
+
+@lru_cache
+def get_document_processor() -> DocumentProcessor:
+    """Get the shared document processor."""
+    return DocumentProcessor()
+
+
+@lru_cache
+def get_vectorstore_service() -> VectorStoreService:
+    """
+    Get the shared vectorstore service.
+
+    The embedding model is only loaded when a request first needs it, so
+    routers that only talk to Qdrant (such as health checks) never load it.
+    """
+    return VectorStoreService()
+
+
+@lru_cache
+def get_job_manager() -> JobManager:
+    """Get the shared background ingestion job manager."""
+    return JobManager()
+
+
+@lru_cache
+def get_readiness() -> Readiness:
+    """Get the startup readiness state."""
+    return Readiness()
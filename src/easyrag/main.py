@@ -1,12 +1,21 @@
 """Main application entry point."""
+import time
 
+# Reference point for the import time and time-to-ready reported by /ready
+_import_started = time.perf_counter()
+
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from easyrag.config import settings
-from easyrag.routers import documents, health
+from easyrag.routers import documents, health, jobs, metrics, snapshots
+from easyrag.dependencies import get_vectorstore_service, get_job_manager, get_readiness
+from easyrag.services.executors import shutdown_executors
+from easyrag.services.readiness import warm_up
 
 # Configure logging
 logging.basicConfig(
@@ -14,11 +23,43 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+get_readiness().record_import(_import_started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the collection state refresher and warm up in the background, so
+    the server accepts connections (and liveness probes) right away; on
+    shutdown stop background jobs and release Qdrant connections and
+    executor threads.
+    """
+    vectorstore_service = get_vectorstore_service()
+    readiness = get_readiness()
+    vectorstore_service.start_collection_state_refresher()
+    warmup_task = None
+    if settings.warmup_on_startup:
+        warmup_task = asyncio.create_task(warm_up(vectorstore_service, readiness))
+    else:
+        readiness.mark_ready()
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+        try:
+            await warmup_task
+        except asyncio.CancelledError:
+            pass
+    await get_job_manager().shutdown()
+    await get_vectorstore_service().close()
+    shutdown_executors()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Easy RAG API",
     description="A simple RAG (Retrieval-Augmented Generation) API using Qdrant and LangChain",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -32,7 +73,10 @@ app.add_middleware(
 
 # Include routers
 app.include_router(documents.router)
+app.include_router(jobs.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(snapshots.router)
 
 
 @app.get("/")
@@ -1,11 +1,26 @@
 """Pydantic models for API request/response schemas."""
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
+
+
+class QueryFilters(BaseModel):
+    """Restricts a query to some source documents and/or a page range."""
+    sources: Optional[List[str]] = None  # Original filenames to search in
+    page_from: Optional[int] = None  # First page to include
+    page_to: Optional[int] = None  # Last page to include
 
 
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str
+    filters: Optional[QueryFilters] = None
+    # Rescore truncated-vector candidates with full embeddings: slower, more accurate
+    # (None uses the server default; ignored if the collection has no full embeddings)
+    rescore: Optional[bool] = None
+    # "mmr" re-ranks candidates by maximal marginal relevance to avoid near-duplicate results
+    search_type: Literal["similarity", "mmr"] = "similarity"
+    # MMR trade-off between 0 (diversity only) and 1 (relevance only); None uses the server default
+    lambda_mult: Optional[float] = None
 
 
 class DocumentResult(BaseModel):
@@ -23,8 +38,106 @@ class QueryResponse(BaseModel):
     message: Optional[str] = None
 
 
+class BatchQueryRequest(BaseModel):
+    """Request model for batch query endpoint."""
+    queries: List[QueryRequest]
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch query endpoint, one response per query in input order."""
+    responses: List[QueryResponse]
+
+
 class UploadResponse(BaseModel):
     """Response model for upload endpoint."""
     status: str
+    job_id: str
+
+
+class BatchUploadJob(BaseModel):
+    """Ingestion job created for one file of a multi-file upload."""
+    filename: str
+    job_id: str
+
+
+class BatchUploadResponse(BaseModel):
+    """Response model for multi-file upload endpoint."""
+    status: str
+    batch_id: str
+    jobs: List[BatchUploadJob]
+
+
+class DeleteResponse(BaseModel):
+    """Response model for document delete endpoint."""
+    source: str
+    chunks_deleted: int
+
+
+class StageTiming(BaseModel):
+    """Busy time spent in one ingestion pipeline stage."""
+    seconds: float
+    batches: int
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for ingestion job status endpoint."""
+    job_id: str
+    batch_id: Optional[str] = None  # Set for files of a multi-file upload
+    filename: str
+    status: str  # queued, running, completed, failed or cancelled
+    error: Optional[str] = None
+    pages_parsed: int
+    chunks_created: int
+    chunks_embedded: int
     chunks_indexed: int
+    document_unchanged: bool  # True if the same file content was already indexed
+    chunks_added: int
+    chunks_unchanged: int
+    chunks_removed: int
+    queued_seconds: float  # Time spent waiting for a job slot
+    elapsed_seconds: float
+    chunks_per_second: float
+    stages: Dict[str, StageTiming]
+
+
+class BatchJobStatusResponse(BaseModel):
+    """Response model for multi-file upload status endpoint."""
+    batch_id: str
+    status: str  # queued, running, completed or failed (once finished, if any file did not complete)
+    files_total: int
+    files_completed: int
+    files_failed: int
+    chunks_indexed: int
+    jobs: List[JobStatusResponse]
+
+
+class SnapshotRequest(BaseModel):
+    """Request model for snapshot export endpoint."""
+    name: Optional[str] = None  # Letters, digits, ".", "_" and "-" (default: collection and timestamp)
+    float16: bool = False  # Store the vectors as float16, halving the snapshot size
+
+
+class SnapshotInfo(BaseModel):
+    """A snapshot of the stored embeddings and payloads of a collection."""
+    name: str
+    collection: str
+    backend: str
+    points: int
+    dimension: int
+    dtype: str
+    embed_model: str
+    created_at: str
+    size_bytes: int
+
+
+class SnapshotListResponse(BaseModel):
+    """Response model for snapshot list endpoint."""
+    snapshots: List[SnapshotInfo]
+
 
+class RestoreResponse(BaseModel):
+    """Response model for snapshot restore endpoint."""
+    name: str
+    collection: str
+    points: int
+    elapsed_seconds: float
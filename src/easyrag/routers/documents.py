@@ -1,122 +1,317 @@
 """API routes for document management and querying."""
 import os
+import hashlib
 import logging
 import tempfile
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
 
-from easyrag.models.schemas import QueryRequest, QueryResponse, UploadResponse, DocumentResult
+from easyrag.models.schemas import (
+    QueryRequest, QueryFilters, QueryResponse, UploadResponse, DocumentResult, BatchQueryRequest,
+    BatchQueryResponse, DeleteResponse, BatchUploadJob, BatchUploadResponse
+)
 from easyrag.services.document_processor import DocumentProcessor
-from easyrag.services.vectorstore_service import VectorStoreService
+from easyrag.services.vectorstore_service import VectorStoreService, search_filter
+from easyrag.services.ingestion_pipeline import IngestionPipeline
+from easyrag.services.admission import OverloadedError
+from easyrag.services.job_service import IngestionJob, JobManager, new_batch_id
+from easyrag.services.metrics import collect_request_timings, server_timing_header, stage_timer
+from easyrag.dependencies import get_document_processor, get_vectorstore_service, get_job_manager
 from easyrag.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["documents"])
 
-# Initialize services
-document_processor = DocumentProcessor()
-vectorstore_service = VectorStoreService()
 
+@router.post("/upload", response_model=UploadResponse, status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    document_processor: DocumentProcessor = Depends(get_document_processor),
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+    job_manager: JobManager = Depends(get_job_manager),
+):
+    """
+    Upload a document and index it in the background.
+    
+    Supports PDF and text files. Returns a job ID immediately; indexing
+    progress is available from ``/api/v1/jobs/{job_id}``. Re-uploading a
+    file with the same name only indexes changed chunks and removes stale ones.
+    """
+    pipeline = IngestionPipeline(document_processor, vectorstore_service)
+    try:
+        with job_manager.admit():
+            job = await queue_upload(file, pipeline, job_manager)
+    except OverloadedError as e:
+        raise too_many_requests(e)
+    return UploadResponse(status="queued", job_id=job.id)
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload_document(file: UploadFile = File(...)):
+
+@router.post("/upload/batch", response_model=BatchUploadResponse, status_code=202)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    document_processor: DocumentProcessor = Depends(get_document_processor),
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+    job_manager: JobManager = Depends(get_job_manager),
+):
     """
-    Upload and index a document.
+    Upload several documents and index them in parallel in the background.
     
-    Supports PDF and text files. Large PDFs are processed in batches
-    to avoid memory issues.
+    Each file becomes its own ingestion job. Up to ``MAX_CONCURRENT_JOBS``
+    files are indexed at a time, with parsing and chunking spread over the
+    parsing worker processes. Overall and per-file progress is available
+    from ``/api/v1/jobs/batches/{batch_id}``.
     """
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_batch_files} files are allowed per upload"
+        )
+    
+    batch_id = new_batch_id()
+    pipeline = IngestionPipeline(document_processor, vectorstore_service)
+    try:
+        with job_manager.admit(len(files)):
+            jobs = [await queue_upload(file, pipeline, job_manager, batch_id=batch_id) for file in files]
+    except OverloadedError as e:
+        raise too_many_requests(e)
+    return BatchUploadResponse(
+        status="queued",
+        batch_id=batch_id,
+        jobs=[BatchUploadJob(filename=job.filename, job_id=job.id) for job in jobs],
+    )
+
+
+def too_many_requests(error: OverloadedError) -> HTTPException:
+    """Build the 429 response for work rejected by admission control."""
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+
+async def spool_upload(file: UploadFile) -> Tuple[str, str]:
+    """
+    Copy an upload to a temporary file.
+    
+    The upload is copied in chunks so it is never held in memory as a whole,
+    and fingerprinted on the way for incremental re-indexing. The file is
+    removed again if the copy fails or the client disconnects.
+    
+    Returns:
+        Tuple of (temporary file path, hex SHA-256 digest of the content)
+    """
+    digest = hashlib.sha256()
     with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file.filename.split('.')[-1]}") as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+        try:
+            while chunk := await file.read(settings.upload_chunk_size):
+                tmp.write(chunk)
+                digest.update(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name, digest.hexdigest()
+
+
+def remove_file_callback(path: str) -> Callable[[], None]:
+    """Build a job cleanup callback removing a temporary file."""
+    def remove_file():
+        if os.path.exists(path):
+            os.remove(path)
+    return remove_file
+
+
+async def queue_upload(file: UploadFile, pipeline: IngestionPipeline, job_manager: JobManager,
+                       batch_id: Optional[str] = None) -> IngestionJob:
+    """Spool an upload to disk and submit its ingestion job."""
+    tmp_path, document_hash = await spool_upload(file)
+    logger.info(f"Queueing ingestion of file: {file.filename}")
     
-    total_chunks = 0
+    # Pass original filename so it's preserved in metadata instead of temp filename
+    cleanup = remove_file_callback(tmp_path)
+    try:
+        return job_manager.submit(
+            IngestionJob(file.filename, batch_id=batch_id),
+            lambda job: pipeline.run(tmp_path, job, original_filename=file.filename, document_hash=document_hash),
+            cleanup=cleanup,
+        )
+    except BaseException:
+        # The job never started, so its cleanup callback will not run
+        cleanup()
+        raise
+
+
+@router.delete("/documents/{source:path}", response_model=DeleteResponse)
+async def delete_document(
+    source: str,
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+):
+    """
+    Delete all indexed chunks of a document.
     
+    ``source`` is the original filename the document was uploaded with.
+    """
     try:
-        logger.info(f"Starting upload of file: {file.filename}")
-        
-        # Process document in batches for large files
-        # Pass original filename so it's preserved in metadata instead of temp filename
-        batch_count = 0
-        for doc_batch in document_processor.load_document_batched(tmp_path, original_filename=file.filename):
-            batch_count += 1
-            logger.info(f"Processing document batch {batch_count}")
-            
-            # Chunk the batch
-            chunks = document_processor.chunk_documents(doc_batch)
-            logger.info(f"Created {len(chunks)} chunks from batch {batch_count}")
-            
-            # Add chunks to vectorstore in batches
-            if chunks:
-                added = vectorstore_service.add_documents_batched(chunks)
-                total_chunks += added
-        
-        logger.info(f"Successfully indexed {total_chunks} chunks from {file.filename}")
+        chunks_deleted = await vectorstore_service.delete_source(source)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if chunks_deleted == 0:
+        raise HTTPException(status_code=404, detail=f"No indexed chunks found for {source}")
+    return DeleteResponse(source=source, chunks_deleted=chunks_deleted)
+
+
+def to_search_filter(filters: Optional[QueryFilters]):
+    """Convert request filters into a Qdrant search filter (None searches everything)."""
+    if filters is None:
+        return None
+    return search_filter(sources=filters.sources, page_from=filters.page_from, page_to=filters.page_to)
+
+
+def to_mmr_lambda(request: QueryRequest) -> Optional[float]:
+    """Get the MMR trade-off of a query (None for plain similarity search)."""
+    if request.search_type != "mmr":
+        return None
+    lambda_mult = settings.mmr_lambda_mult if request.lambda_mult is None else request.lambda_mult
+    if not 0.0 <= lambda_mult <= 1.0:
+        raise HTTPException(status_code=400, detail="lambda_mult must be between 0 and 1")
+    return lambda_mult
+
+
+def format_results(results_with_scores) -> List[DocumentResult]:
+    """Format search results with scores and metadata for the response."""
+    formatted_results = []
+    for doc, score in results_with_scores:
+        # Extract page number from metadata if available
+        page = doc.metadata.get("page")
+        if page is not None:
+            try:
+                page = int(page)
+            except (ValueError, TypeError):
+                page = None
         
-        return UploadResponse(
-            status="ok",
-            chunks_indexed=total_chunks
+        formatted_results.append(
+            DocumentResult(
+                source=doc.metadata.get("source"),
+                text=doc.page_content,
+                score=float(score),  # Convert to float for JSON serialization
+                page=page
+            )
         )
-    except Exception as e:
-        logger.error(f"Error processing file {file.filename}: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+    return formatted_results
+
+
+def json_response(body: str, timings: Optional[Dict[str, float]], start: float) -> Response:
+    """Build a response from serialized JSON, with a Server-Timing header if timings were collected."""
+    headers = None
+    if timings is not None:
+        headers = {"Server-Timing": server_timing_header(timings, total=time.perf_counter() - start)}
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/ask", response_model=QueryResponse)
-async def ask(request: QueryRequest):
+async def ask(
+    request: QueryRequest,
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+):
     """
     Query the document store using semantic search.
     
-    Returns the most relevant document chunks for the given query.
+    Returns the most relevant document chunks for the given query, optionally
+    restricted to some source documents and/or a page range. With truncated
+    vectors, ``rescore`` trades speed for accuracy by re-ranking candidates
+    with the full embeddings. ``"search_type": "mmr"`` picks diverse results
+    out of ``MMR_FETCH_K`` candidates instead of near-duplicate chunks.
     """
+    start = time.perf_counter()
+    timings = collect_request_timings() if settings.server_timing else None
+    mmr_lambda = to_mmr_lambda(request)
     try:
-        # Check if collection has any documents
-        collection_info = vectorstore_service.get_collection_info()
+        # Check if collection has any documents (locally cached, no Qdrant call)
+        collection_state = await vectorstore_service.get_collection_state()
         
-        if collection_info.points_count == 0:
+        if collection_state.points_count == 0:
             return QueryResponse(
                 query=request.query,
                 results=[],
                 message="No documents found in the vector store. Please upload documents first."
             )
         
-        # Get appropriate k value
-        k = min(settings.default_k, collection_info.points_count)
+        # Not clamped to the cached point count, which may lag writes made by other processes
+        k = settings.default_k
         
         # Use similarity_search_with_score to get relevance scores
-        results_with_scores = vectorstore_service.similarity_search_with_score(
+        results_with_scores = await vectorstore_service.similarity_search_with_score(
             request.query, 
-            k=k
+            k=k,
+            query_filter=to_search_filter(request.filters),
+            rescore=request.rescore,
+            mmr_lambda=mmr_lambda
         )
         
-        # Format response with scores and metadata
-        formatted_results = []
-        for doc, score in results_with_scores:
-            # Extract page number from metadata if available
-            page = doc.metadata.get("page")
-            if page is not None:
-                try:
-                    page = int(page)
-                except (ValueError, TypeError):
-                    page = None
-            
-            formatted_results.append(
-                DocumentResult(
-                    source=doc.metadata.get("source"),
-                    text=doc.page_content,
-                    score=float(score),  # Convert to float for JSON serialization
-                    page=page
+        # Results are already ranked (by score, or in MMR pick order); serialized here so the time is measured
+        with stage_timer("serialize"):
+            body = QueryResponse(
+                query=request.query,
+                results=format_results(results_with_scores)
+            ).model_dump_json()
+        return json_response(body, timings, start)
+    except OverloadedError as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@router.post("/ask/batch", response_model=BatchQueryResponse)
+async def ask_batch(
+    request: BatchQueryRequest,
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+):
+    """
+    Run many queries in one call.
+    
+    All queries are embedded in a single forward pass and searched with a
+    single batched Qdrant request. Responses are returned in input order.
+    """
+    if len(request.queries) > settings.max_batch_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_batch_queries} queries are allowed per batch"
+        )
+    
+    start = time.perf_counter()
+    timings = collect_request_timings() if settings.server_timing else None
+    mmr_lambdas = [to_mmr_lambda(query) for query in request.queries]
+    try:
+        collection_state = await vectorstore_service.get_collection_state()
+        
+        if collection_state.points_count == 0:
+            return BatchQueryResponse(responses=[
+                QueryResponse(
+                    query=query.query,
+                    results=[],
+                    message="No documents found in the vector store. Please upload documents first."
                 )
-            )
+                for query in request.queries
+            ])
         
-        # Results are already sorted by score (highest first)
-        return QueryResponse(
-            query=request.query,
-            results=formatted_results
+        k = settings.default_k
+        
+        batch_results = await vectorstore_service.similarity_search_batch_with_score(
+            [query.query for query in request.queries],
+            k=k,
+            query_filters=[to_search_filter(query.filters) for query in request.queries],
+            rescore=[query.rescore for query in request.queries],
+            mmr_lambdas=mmr_lambdas
         )
+        
+        with stage_timer("serialize", items=len(request.queries)):
+            body = BatchQueryResponse(responses=[
+                QueryResponse(query=query.query, results=format_results(results))
+                for query, results in zip(request.queries, batch_results)
+            ]).model_dump_json()
+        return json_response(body, timings, start)
+    except OverloadedError as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
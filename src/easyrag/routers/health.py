@@ -1,39 +1,95 @@
 """Health check and status endpoints."""
-from fastapi import APIRouter
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, Response
 from pydantic import BaseModel
 
+from easyrag.services.readiness import Readiness
 from easyrag.services.vectorstore_service import VectorStoreService
+from easyrag.dependencies import get_readiness, get_vectorstore_service
+from easyrag.services.embedding_service import embedding_batch_stats, get_embedding_cache
 from easyrag.config import settings
 
 router = APIRouter(tags=["health"])
 
-vectorstore_service = VectorStoreService()
-
 
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str
-    qdrant_connected: bool
+    backend: str  # Configured vector backend: "qdrant" or "embedded"
+    backend_connected: bool
+    qdrant_connected: bool  # Deprecated alias of backend_connected
     collection_name: str
     documents_count: int
 
 
+class ReadyResponse(BaseModel):
+    """Readiness check response model."""
+    status: str
+    ready: bool
+    import_seconds: Optional[float] = None
+    time_to_ready_seconds: Optional[float] = None
+    warmup_seconds: Dict[str, float] = {}
+    warmup_attempts: int
+    error: Optional[str] = None
+
+
+class StatsResponse(BaseModel):
+    """Cache statistics response model."""
+    embedding_cache: Optional[Dict[str, Any]] = None
+    embedding_batches: Optional[Dict[str, Any]] = None
+    query_cache: Dict[str, Any]
+    query_batcher: Optional[Dict[str, Any]] = None
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Check the health status of the application and Qdrant connection."""
-    try:
-        collection_info = vectorstore_service.get_collection_info()
-        return HealthResponse(
-            status="healthy",
-            qdrant_connected=True,
-            collection_name=settings.collection_name,
-            documents_count=collection_info.points_count
-        )
-    except Exception as e:
-        return HealthResponse(
-            status="unhealthy",
-            qdrant_connected=False,
-            collection_name=settings.collection_name,
-            documents_count=0
-        )
+async def health_check(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """
+    Check the health status of the application and its vector backend.
+    
+    Served from the locally cached collection state, so probes make no
+    backend calls and never load the embedding model.
+    """
+    collection_state = vectorstore_service.collection_state
+    return HealthResponse(
+        status="healthy" if collection_state.connected else "unhealthy",
+        backend=settings.vector_backend,
+        backend_connected=collection_state.connected,
+        qdrant_connected=collection_state.connected,
+        collection_name=settings.collection_name,
+        documents_count=collection_state.points_count
+    )
+
+
+@router.get("/ready", response_model=ReadyResponse, responses={503: {"model": ReadyResponse}})
+async def readiness_check(response: Response, readiness: Readiness = Depends(get_readiness)):
+    """
+    Check whether startup warm-up has finished.
+    
+    Returns 503 while the embedding model, the collection and the parse
+    workers are still being warmed up, so load balancers only route traffic
+    to the instance once the first request no longer pays for loading them.
+    Use ``/health`` for liveness probes.
+    """
+    if not readiness.ready:
+        response.status_code = 503
+    return ReadyResponse(
+        status="ready" if readiness.ready else "starting",
+        ready=readiness.ready,
+        import_seconds=readiness.import_seconds,
+        time_to_ready_seconds=readiness.time_to_ready,
+        warmup_seconds=readiness.warmup_seconds,
+        warmup_attempts=readiness.attempts,
+        error=readiness.error,
+    )
+
 
+@router.get("/stats", response_model=StatsResponse)
+async def stats(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """Get hit/miss counters of the application caches and the padding of embedding batches."""
+    cache = get_embedding_cache()
+    return StatsResponse(
+        embedding_cache=cache.stats() if cache is not None else None,
+        embedding_batches=embedding_batch_stats(),
+        query_cache=vectorstore_service.query_cache.stats(),
+        query_batcher=vectorstore_service.query_batcher_stats(),
+    )
@@ -0,0 +1,60 @@
+"""API routes for background ingestion job status."""
+from fastapi import APIRouter, HTTPException, Depends
+
+from easyrag.models.schemas import BatchJobStatusResponse, JobStatusResponse, StageTiming
+from easyrag.services.job_service import IngestionJob, JobManager, batch_status
+from easyrag.dependencies import get_job_manager
+
+router = APIRouter(prefix="/api/v1", tags=["jobs"])
+
+
+def job_to_response(job: IngestionJob) -> JobStatusResponse:
+    """Build the status response for a job."""
+    return JobStatusResponse(
+        job_id=job.id,
+        batch_id=job.batch_id,
+        filename=job.filename,
+        status=job.status,
+        error=job.error,
+        pages_parsed=job.pages_parsed,
+        chunks_created=job.chunks_created,
+        chunks_embedded=job.chunks_embedded,
+        chunks_indexed=job.chunks_indexed,
+        document_unchanged=job.document_unchanged,
+        chunks_added=job.chunks_added,
+        chunks_unchanged=job.chunks_unchanged,
+        chunks_removed=job.chunks_removed,
+        queued_seconds=round(job.queued_seconds, 3),
+        elapsed_seconds=round(job.elapsed_seconds, 3),
+        chunks_per_second=round(job.chunks_per_second, 2),
+        stages={
+            stage: StageTiming(seconds=round(seconds, 3), batches=job.stage_batches[stage])
+            for stage, seconds in job.stage_seconds.items()
+        },
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    """Get progress, throughput and per-stage timing of an ingestion job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_to_response(job)
+
+
+@router.get("/jobs/batches/{batch_id}", response_model=BatchJobStatusResponse)
+async def get_batch(batch_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    """Get the overall and per-file status of a multi-file upload."""
+    jobs = job_manager.get_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return BatchJobStatusResponse(
+        batch_id=batch_id,
+        status=batch_status(jobs),
+        files_total=len(jobs),
+        files_completed=sum(job.status == "completed" for job in jobs),
+        files_failed=sum(job.status in ("failed", "cancelled") for job in jobs),
+        chunks_indexed=sum(job.chunks_indexed for job in jobs),
+        jobs=[job_to_response(job) for job in jobs],
+    )
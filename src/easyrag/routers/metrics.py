@@ -0,0 +1,136 @@
+"""Prometheus metrics endpoint."""
+from typing import List
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from easyrag.dependencies import get_job_manager, get_readiness, get_vectorstore_service
+from easyrag.services.admission import ADMISSION_METRICS, limiter_stats
+from easyrag.services.embedding_service import embedding_batch_stats, get_embedding_cache
+from easyrag.services.ingestion_pipeline import pipeline_queue_depths
+from easyrag.services.job_service import JobManager
+from easyrag.services.metrics import STATIC_METRICS, Counter, Gauge, Metric, render_metrics
+from easyrag.services.readiness import Readiness
+from easyrag.services.vectorstore_service import VectorStoreService
+
+router = APIRouter(tags=["metrics"])
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_state_metrics(vectorstore_service: VectorStoreService, job_manager: JobManager) -> List[Metric]:
+    """Read queue depths, cache counters and collection size at scrape time."""
+    queue_depth = Gauge(
+        "easyrag_queue_depth",
+        "Items waiting in a queue (query batcher queries, ingestion pipeline batches).",
+        ["queue"],
+    )
+    batcher_stats = vectorstore_service.query_batcher_stats()
+    queue_depth.set(batcher_stats["queue_depth"] if batcher_stats else 0, queue="query_batcher")
+    pipeline_depths = pipeline_queue_depths()
+    upserts_in_flight = pipeline_depths.pop("upserts_in_flight")
+    for name, depth in pipeline_depths.items():
+        queue_depth.set(depth, queue=f"pipeline_{name}")
+
+    in_flight = Gauge("easyrag_upserts_in_flight", "Ingestion upserts sent but not yet acknowledged.")
+    in_flight.set(upserts_in_flight)
+
+    jobs = Gauge("easyrag_ingestion_jobs", "Ingestion jobs in the job history by status.", ["status"])
+    for status, count in job_manager.status_counts().items():
+        jobs.set(count, status=status)
+
+    hits = Counter("easyrag_cache_hits_total", "Cache lookups that found an entry.", ["cache"])
+    misses = Counter("easyrag_cache_misses_total", "Cache lookups that found no entry.", ["cache"])
+    hit_ratio = Gauge("easyrag_cache_hit_ratio", "Fraction of cache lookups that found an entry.", ["cache"])
+    cache_stats = {
+        "query_vectors": vectorstore_service.query_cache.vectors.stats(),
+        "query_results": vectorstore_service.query_cache.results.stats(),
+    }
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is not None:
+        cache_stats["embeddings"] = embedding_cache.stats()
+    for cache, stats in cache_stats.items():
+        hits.set_total(stats["hits"], cache=cache)
+        misses.set_total(stats["misses"], cache=cache)
+        hit_ratio.set(stats["hit_rate"], cache=cache)
+
+    batch_counters = [
+        Counter("easyrag_embedding_batches_total", "Document forward passes sent to the embedding model."),
+        Counter("easyrag_embedding_tokens_total", "Tokens of the documents sent to the embedding model."),
+        Counter("easyrag_embedding_padded_tokens_total",
+                "Tokens processed by the embedding model including padding (texts x longest text per batch)."),
+    ]
+    padding_efficiency = Gauge(
+        "easyrag_embedding_padding_efficiency", "Fraction of the processed tokens that were not padding."
+    )
+    batch_stats = embedding_batch_stats()
+    if batch_stats is not None:
+        for counter, key in zip(batch_counters, ("batches", "tokens", "padded_tokens")):
+            counter.set_total(batch_stats[key])
+        padding_efficiency.set(batch_stats["padding_efficiency"])
+
+    points = Gauge("easyrag_collection_points", "Points in the collection (locally cached count).")
+    points.set(vectorstore_service.collection_state.points_count)
+
+    slots_in_use = Gauge(
+        "easyrag_admission_slots_in_use",
+        "Slots of a shared resource held by query or ingestion work.",
+        ["resource", "work"],
+    )
+    waiting = Gauge(
+        "easyrag_admission_waiting",
+        "Query or ingestion work waiting for a slot of a shared resource.",
+        ["resource", "work"],
+    )
+    for resource, stats in limiter_stats().items():
+        for work, count in stats["in_use"].items():
+            slots_in_use.set(count, resource=resource, work=work)
+        for work, count in stats["waiting"].items():
+            waiting.set(count, resource=resource, work=work)
+    waiting.set(job_manager.queued_count(), resource="ingestion_jobs", work="ingest")
+
+    return [queue_depth, in_flight, jobs, hits, misses, hit_ratio, *batch_counters, padding_efficiency, points,
+            slots_in_use, waiting]
+
+
+def collect_startup_metrics(readiness: Readiness) -> List[Metric]:
+    """Report readiness and how long the import, warm-up steps and startup took."""
+    ready = Gauge("easyrag_ready", "1 once startup warm-up has finished, else 0.")
+    ready.set(1 if readiness.ready else 0)
+
+    startup = Gauge(
+        "easyrag_startup_seconds",
+        "Duration of a startup phase (import, warm-up steps, ready = total time to ready).",
+        ["phase"],
+    )
+    if readiness.import_seconds is not None:
+        startup.set(readiness.import_seconds, phase="import")
+    for step, seconds in readiness.warmup_seconds.items():
+        startup.set(seconds, phase=step)
+    if readiness.time_to_ready is not None:
+        startup.set(readiness.time_to_ready, phase="ready")
+    return [ready, startup]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+    job_manager: JobManager = Depends(get_job_manager),
+    readiness: Readiness = Depends(get_readiness),
+):
+    """
+    Expose stage timings, queue depths and cache counters for Prometheus.
+
+    Stage durations are histograms labelled by stage: parse, chunk, embed and
+    upsert for ingestion; query_embed, search and serialize for queries.
+    Queue waits for the embedding model, the vector backend and ingestion
+    job slots are histograms labelled by resource and work class.
+    """
+    body = render_metrics([
+        *STATIC_METRICS,
+        *ADMISSION_METRICS,
+        *collect_state_metrics(vectorstore_service, job_manager),
+        *collect_startup_metrics(readiness),
+    ])
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
@@ -0,0 +1,107 @@
+"""API routes for exporting and restoring collection snapshots."""
+import asyncio
+import logging
+import os
+import re
+import time
+from fastapi import APIRouter, HTTPException, Depends
+
+from easyrag.models.schemas import RestoreResponse, SnapshotInfo, SnapshotListResponse, SnapshotRequest
+from easyrag.services.snapshot import export_snapshot, list_snapshots, read_manifest
+from easyrag.services.vectorstore_service import VectorStoreService
+from easyrag.dependencies import get_vectorstore_service
+from easyrag.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1", tags=["snapshots"])
+
+# Snapshot names are directory names under SNAPSHOT_DIR
+SNAPSHOT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+
+# Exports and restores run one at a time
+_snapshot_lock = asyncio.Lock()
+
+
+def snapshot_path(name: str) -> str:
+    """Get the directory of a snapshot, rejecting names that are not plain directory names."""
+    if not SNAPSHOT_NAME_PATTERN.match(name) or name.endswith(".partial"):
+        raise HTTPException(status_code=400, detail=f"Invalid snapshot name: {name}")
+    return os.path.join(settings.snapshot_dir, name)
+
+
+@router.post("/snapshots", response_model=SnapshotInfo, status_code=201)
+async def create_snapshot(
+    request: SnapshotRequest,
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+):
+    """
+    Export the stored embeddings and payloads of the collection to a snapshot.
+
+    Points are streamed out in batches, so memory use does not grow with the
+    collection. The snapshot can be restored later, or loaded into another
+    collection or backend with ``easyrag snapshot-import``, without
+    re-embedding any document.
+    """
+    name = request.name or f"{settings.collection_name}-{time.strftime('%Y%m%d%H%M%S')}"
+    path = snapshot_path(name)
+    if os.path.exists(path):
+        raise HTTPException(status_code=409, detail=f"Snapshot {name} already exists")
+
+    async with _snapshot_lock:
+        if not await vectorstore_service.backend.collection_exists():
+            raise HTTPException(status_code=404, detail=f"Collection {settings.collection_name} does not exist")
+        try:
+            await export_snapshot(vectorstore_service.backend, path, float16=request.float16)
+        except Exception as e:
+            logger.error(f"Error exporting snapshot {name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error exporting snapshot: {str(e)}")
+
+    for snapshot in list_snapshots(settings.snapshot_dir):
+        if snapshot["name"] == name:
+            return SnapshotInfo(**snapshot)
+    raise HTTPException(status_code=500, detail=f"Snapshot {name} was not written")
+
+
+@router.get("/snapshots", response_model=SnapshotListResponse)
+async def get_snapshots():
+    """List the snapshots in ``SNAPSHOT_DIR``, newest first."""
+    return SnapshotListResponse(snapshots=[SnapshotInfo(**snapshot) for snapshot in list_snapshots(settings.snapshot_dir)])
+
+
+@router.post("/snapshots/{name}/restore", response_model=RestoreResponse)
+async def restore_snapshot(
+    name: str,
+    vectorstore_service: VectorStoreService = Depends(get_vectorstore_service),
+):
+    """
+    Replace the collection with the points of a snapshot.
+
+    The snapshot is bulk-loaded into a new collection under the configured
+    layout profile while the current one keeps serving queries, and the two
+    are switched once every point has been loaded. A failed restore leaves
+    the current collection untouched; documents indexed while it runs may
+    be lost.
+    """
+    path = snapshot_path(name)
+    try:
+        read_manifest(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Snapshot {name} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = time.perf_counter()
+    async with _snapshot_lock:
+        try:
+            manifest = await vectorstore_service.restore_snapshot(path)
+        except Exception as e:
+            logger.error(f"Error restoring snapshot {name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error restoring snapshot: {str(e)}")
+
+    return RestoreResponse(
+        name=name,
+        collection=settings.collection_name,
+        points=manifest["points"],
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+    )
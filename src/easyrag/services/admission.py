@@ -0,0 +1,191 @@
+"""Admission control: query-over-ingestion priority on shared resources and backpressure."""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from easyrag.config import settings
+from easyrag.services.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Work classes, in priority order
+QUERY = "query"
+INGEST = "ingest"
+WORK_CLASSES = (QUERY, INGEST)
+
+# Upper bounds in seconds, from an immediately granted slot to a long ingestion backlog
+WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "easyrag_queue_wait_seconds",
+    "Time work waited for a shared resource (embedding model, vector backend, ingestion job slot).",
+    ["resource", "work"],
+    buckets=WAIT_BUCKETS,
+)
+REJECTED = Counter(
+    "easyrag_admission_rejected_total",
+    "Requests rejected with 429 because the queue of a resource was full.",
+    ["resource", "work"],
+)
+
+ADMISSION_METRICS = [QUEUE_WAIT_SECONDS, REJECTED]
+
+
+class OverloadedError(Exception):
+    """Raised when work is rejected because a queue is full; the client should retry later."""
+
+    def __init__(self, message: str, retry_after: int = None):
+        super().__init__(message)
+        self.retry_after = retry_after or settings.retry_after_seconds
+
+
+class PriorityLimiter:
+    """
+    Grants a fixed number of slots on a shared resource, query work first.
+
+    A waiting query always gets the next free slot before waiting ingestion
+    work (strict priority; running work is never interrupted). Ingestion work
+    holds at most ``max_ingest`` slots at once, so the rest stay available
+    for queries. Within a class, slots are granted in arrival order.
+    """
+
+    def __init__(self, resource: str, slots: int, max_ingest: int = None,
+                 max_waiting: Optional[Dict[str, int]] = None):
+        self.resource = resource
+        self.slots = slots
+        self.max_ingest = min(max_ingest or slots, slots)
+        # Waiting work beyond these limits is rejected with OverloadedError
+        self.max_waiting = max_waiting or {}
+        self._in_use: Dict[str, int] = {work: 0 for work in WORK_CLASSES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {work: deque() for work in WORK_CLASSES}
+
+    def waiting(self, work: str) -> int:
+        """Number of callers of a work class waiting for a slot."""
+        return len(self._waiters[work])
+
+    def in_use(self, work: str) -> int:
+        """Number of slots held by a work class."""
+        return self._in_use[work]
+
+    def _can_grant(self, work: str) -> bool:
+        if sum(self._in_use.values()) >= self.slots:
+            return False
+        if work == INGEST:
+            return self._in_use[INGEST] < self.max_ingest and not self._waiters[QUERY]
+        return True
+
+    async def acquire(self, work: str) -> None:
+        """
+        Wait for a slot.
+
+        Args:
+            work: Work class (QUERY or INGEST)
+
+        Raises:
+            OverloadedError: If ``max_waiting`` callers of the class are already waiting
+        """
+        if not self._waiters[work] and self._can_grant(work):
+            self._in_use[work] += 1
+            QUEUE_WAIT_SECONDS.observe(0.0, resource=self.resource, work=work)
+            return
+
+        limit = self.max_waiting.get(work)
+        if limit is not None and len(self._waiters[work]) >= limit:
+            REJECTED.inc(resource=self.resource, work=work)
+            raise OverloadedError(f"Too much {work} work waiting for the {self.resource}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[work].append(future)
+        start = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the caller was cancelled
+                self.release(work)
+            elif future in self._waiters[work]:
+                self._waiters[work].remove(future)
+            raise
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, resource=self.resource, work=work)
+
+    def release(self, work: str) -> None:
+        """Return a slot and hand free slots to waiting work, queries first."""
+        self._in_use[work] -= 1
+        for waiting_work in WORK_CLASSES:
+            waiters = self._waiters[waiting_work]
+            while waiters and self._can_grant(waiting_work):
+                future = waiters.popleft()
+                if future.cancelled():
+                    continue
+                self._in_use[waiting_work] += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, work: str) -> AsyncIterator[None]:
+        """Hold a slot for the enclosed block."""
+        await self.acquire(work)
+        try:
+            yield
+        finally:
+            self.release(work)
+
+    def stats(self) -> dict:
+        """Get slots in use and callers waiting per work class."""
+        return {
+            "slots": self.slots,
+            "in_use": dict(self._in_use),
+            "waiting": {work: len(waiters) for work, waiters in self._waiters.items()},
+        }
+
+
+_embed_limiter: Optional[PriorityLimiter] = None
+_backend_limiter: Optional[PriorityLimiter] = None
+
+
+def get_embed_limiter() -> PriorityLimiter:
+    """
+    Get the limiter in front of the embedding executor.
+
+    It has one slot per embedding worker, so the executor never queues work
+    itself and waiting queries always run before waiting ingestion batches.
+    """
+    global _embed_limiter
+    if _embed_limiter is None:
+        _embed_limiter = PriorityLimiter("embedding_model", settings.embed_workers)
+    return _embed_limiter
+
+
+def get_backend_limiter() -> PriorityLimiter:
+    """
+    Get the limiter in front of vector backend searches and ingestion upserts.
+
+    Ingestion holds at most ``ingest_max_upserts_in_flight`` slots across all
+    jobs. The embedded index runs in the CPU executor, so there it has one
+    slot per CPU worker; Qdrant gets ``backend_max_concurrency``.
+    """
+    global _backend_limiter
+    if _backend_limiter is None:
+        slots = settings.cpu_workers if settings.vector_backend == "embedded" else settings.backend_max_concurrency
+        _backend_limiter = PriorityLimiter(
+            "vector_backend",
+            slots,
+            max_ingest=settings.ingest_max_upserts_in_flight,
+            max_waiting={QUERY: settings.max_waiting_queries},
+        )
+    return _backend_limiter
+
+
+def limiter_stats() -> Dict[str, dict]:
+    """Get the stats of the limiters that have been created."""
+    limiters: List[PriorityLimiter] = [limiter for limiter in (_embed_limiter, _backend_limiter) if limiter is not None]
+    return {limiter.resource: limiter.stats() for limiter in limiters}
+
+
+def reset_limiters() -> None:
+    """Drop the shared limiters, so they are re-created with the current settings."""
+    global _embed_limiter, _backend_limiter
+    _embed_limiter = None
+    _backend_limiter = None
@@ -0,0 +1,104 @@
+"""High-throughput bulk upserts of embedded chunks into a vector backend."""
+import asyncio
+import logging
+from typing import Callable, List, Optional, Set
+
+import numpy as np
+
+from easyrag.config import settings
+from easyrag.services.admission import INGEST, get_backend_limiter
+from easyrag.services.vector_backend import VectorBackend
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriter:
+    """
+    Streams embedding matrices into a backend with several upserts in flight.
+
+    Each ``write`` is split into upserts sent with ``wait=False`` (for Qdrant,
+    columnar ``Batch`` upserts over the async gRPC channel), up to
+    ``max_in_flight`` at a time; ``write`` only blocks when that many are
+    already outstanding. Across all writers, upserts also wait for a slot of
+    the backend limiter, behind waiting searches. ``flush`` waits for every
+    upsert to be acknowledged and then for the backend's write barrier, so
+    everything written is searchable once it returns.
+
+    This replaces ``upload_collection(parallel=N)``, which is synchronous and
+    starts a process pool per call, with the same batching done natively on
+    the event loop.
+    """
+
+    def __init__(self, backend: VectorBackend, batch_size: int = None, max_in_flight: int = None,
+                 on_written: Optional[Callable[[int], None]] = None):
+        # Must be open, so it knows the vector layout of its collection
+        self.backend = backend
+        self.on_written = on_written
+        self.batch_size = batch_size or settings.upsert_batch_size
+        self._slots = asyncio.Semaphore(max_in_flight or settings.upsert_max_in_flight)
+        self._tasks: Set[asyncio.Task] = set()
+        self._error: Optional[BaseException] = None
+        self.points_written = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of upserts sent but not yet acknowledged."""
+        return len(self._tasks)
+
+    async def write(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> None:
+        """
+        Queue points for upserting.
+
+        Args:
+            ids: Point IDs
+            vectors: Embedding matrix with one row per point
+            payloads: Payload for each point
+        """
+        self._raise_if_failed()
+
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            await self._slots.acquire()
+            self._raise_if_failed()
+            task = asyncio.create_task(self._send(ids[start:end], vectors[start:end], payloads[start:end]))
+            self._tasks.add(task)
+            task.add_done_callback(self._on_done)
+
+    async def _send(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> int:
+        # Also bounded across writers, and queued behind searches
+        async with get_backend_limiter().slot(INGEST):
+            await self.backend.upsert(ids, vectors, payloads, wait=False)
+        return len(ids)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            if self._error is None:
+                self._error = task.exception()
+            return
+        count = task.result()
+        self.points_written += count
+        if self.on_written is not None:
+            self.on_written(count)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def flush(self) -> None:
+        """Wait for all upserts and for the backend to apply them."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._raise_if_failed()
+        if self.points_written:
+            await self.backend.barrier()
+
+    async def abort(self) -> None:
+        """Cancel upserts that have not completed."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
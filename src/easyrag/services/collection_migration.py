@@ -0,0 +1,169 @@
+"""Re-create the collection under a new layout profile without re-embedding."""
+import logging
+from datetime import datetime
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+)
+
+from easyrag.config import settings
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.collection_profile import collection_vector_layout
+from easyrag.services.vector_backend import QdrantBackend, VectorBackend
+
+logger = logging.getLogger(__name__)
+
+
+async def resolve_collection(client: AsyncQdrantClient, name: str) -> str:
+    """
+    Resolve a collection name that may be an alias to the physical collection.
+
+    Args:
+        client: Qdrant client
+        name: Collection or alias name
+
+    Returns:
+        Name of the physical collection
+    """
+    aliases = await client.get_aliases()
+    for alias in aliases.aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return name
+
+
+def versioned_collection_name(name: str) -> str:
+    """Get a new physical collection name for an alias."""
+    return f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+
+async def switch_alias(client: AsyncQdrantClient, name: str, target: str, keep_old: bool = False) -> dict:
+    """
+    Make ``name`` an alias of the ``target`` collection.
+
+    When ``name`` is already an alias it is switched atomically. When it is
+    still a physical collection, that collection has to be dropped before
+    the alias can take its name, so searches fail for that instant.
+
+    Args:
+        client: Qdrant client
+        name: Collection or alias name used by the application
+        target: Physical collection to serve under ``name``
+        keep_old: Keep the previous collection instead of deleting it
+
+    Returns:
+        The previous physical collection (None if there was none) and whether it was deleted
+    """
+    source = await resolve_collection(client, name)
+    operations = []
+    if source == name:
+        if await client.collection_exists(name):
+            # The name is still a physical collection; it must go before the alias can replace it
+            await client.delete_collection(name)
+        else:
+            source = None
+    else:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)))
+    await client.update_collection_aliases(change_aliases_operations=operations)
+
+    deleted = source == name
+    if source is not None and source != name and not keep_old:
+        await client.delete_collection(source)
+        deleted = True
+    return {"previous_collection": source, "previous_deleted": deleted}
+
+
+def get_vector_size(collection_info) -> int:
+    """
+    Get the embedding size of a collection.
+
+    This is the size of the full embeddings when the collection keeps them
+    next to truncated vectors; a collection that only stores truncated
+    vectors cannot be migrated back to more dimensions without re-embedding.
+    """
+    return collection_vector_layout(collection_info).embedding_size
+
+
+async def copy_points(source: VectorBackend, target: VectorBackend, batch_size: int = None) -> int:
+    """
+    Stream every point with its vector and payload from one backend into another.
+
+    The embeddings are written in the vector layout of the target, so a
+    migration can truncate vectors or add/drop the full embeddings.
+
+    Args:
+        source: Backend of the collection to read from
+        target: Opened backend of the collection to write to
+        batch_size: Points per read (defaults to config upsert_batch_size)
+
+    Returns:
+        Number of points copied
+    """
+    batch_size = batch_size or settings.upsert_batch_size
+    writer = BulkWriter(target)
+    try:
+        async for batch in source.iter_points(batch_size):
+            await writer.write(batch.ids, batch.vectors, batch.payloads)
+        await writer.flush()
+    except BaseException:
+        await writer.abort()
+        raise
+    return writer.points_written
+
+
+async def migrate_collection(client: AsyncQdrantClient, keep_old: bool = False) -> dict:
+    """
+    Re-create the configured collection under the current layout profile.
+
+    Points are copied with their stored vectors into a new versioned
+    collection with HNSW indexing disabled, indexing is re-enabled, and
+    ``collection_name`` becomes an alias of the new collection. Later
+    migrations switch the alias atomically. The first migration has to drop
+    the original collection before the alias can take its name, so searches
+    fail for that instant.
+
+    Args:
+        client: Qdrant client
+        keep_old: Keep the previous collection instead of deleting it
+
+    Returns:
+        Summary of the migration
+    """
+    name = settings.collection_name
+    source = await resolve_collection(client, name)
+    source_info = await client.get_collection(source)
+    vector_size = get_vector_size(source_info)
+    target = versioned_collection_name(name)
+
+    logger.info(f"Migrating {source} ({source_info.points_count} points) to {target}")
+    target_backend = QdrantBackend(client, target)
+    await target_backend.create_collection(vector_size, bulk_load=True)
+    try:
+        # Opening detects the new layout and creates the payload indexes
+        await target_backend.open()
+        copied = await copy_points(QdrantBackend(client, source), target_backend)
+        target_count = (await client.count(target, exact=True)).count
+        source_count = (await client.count(source, exact=True)).count
+        if target_count != source_count:
+            raise RuntimeError(f"Copied {target_count} points but {source} has {source_count}")
+    except BaseException:
+        await client.delete_collection(target)
+        raise
+
+    # Build the HNSW index now that the bulk load is done
+    await target_backend.end_bulk_load()
+    switched = await switch_alias(client, name, target, keep_old=keep_old)
+
+    logger.info(f"Migrated {copied} points; {name} now points to {target}")
+    return {
+        "alias": name,
+        "previous_collection": source,
+        "collection": target,
+        "points": copied,
+        "previous_deleted": switched["previous_deleted"],
+    }
@@ -0,0 +1,248 @@
+"""Settings-driven Qdrant collection layout (vectors, HNSW, quantization, storage)."""
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+
+from easyrag.config import settings
+
+# Qdrant's default indexing threshold in KB
+DEFAULT_INDEXING_THRESHOLD = 10000
+
+# Name of the default (searched) vector, and of the full embedding kept next to
+# a truncated one for rescoring
+SEARCH_VECTOR_NAME = ""
+FULL_VECTOR_NAME = "full"
+
+# Payload fields indexed for filtered search and deletion by source/page
+PAYLOAD_INDEXES = {
+    "metadata.source": PayloadSchemaType.KEYWORD,
+    "metadata.page": PayloadSchemaType.INTEGER,
+}
+
+
+def truncate_vectors(vectors: Union[np.ndarray, Sequence[Sequence[float]]], size: int) -> np.ndarray:
+    """
+    Keep the first ``size`` dimensions of each embedding and renormalize it.
+
+    Matryoshka-trained models such as Qwen3-Embedding put the most important
+    information in the leading dimensions, so the prefix of an embedding is a
+    usable lower-dimensional embedding.
+
+    Args:
+        vectors: Embedding matrix with one row per vector
+        size: Dimensions to keep (rows of at most ``size`` dimensions are returned unchanged)
+
+    Returns:
+        float32 matrix of unit-length rows
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape[1] <= size:
+        return vectors
+    truncated = vectors[:, :size]
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+class VectorLayout(NamedTuple):
+    """
+    Vectors stored per point of a collection.
+
+    The default vector of ``size`` dimensions is searched with HNSW. When it
+    holds truncated embeddings, the full embeddings may also be stored as the
+    named vector ``full`` (``full_size`` dimensions) to rescore candidates.
+    """
+    size: int
+    full_size: Optional[int] = None
+
+    @property
+    def can_rescore(self) -> bool:
+        """Whether full embeddings are stored for rescoring."""
+        return self.full_size is not None
+
+    @property
+    def embedding_size(self) -> int:
+        """Size of the embeddings the collection was created for, as far as it is stored."""
+        return self.full_size or self.size
+
+    def point_vectors(self, vectors: np.ndarray) -> Union[List[List[float]], dict]:
+        """
+        Get the vectors to upsert for an embedding matrix, in ``Batch`` format.
+
+        Args:
+            vectors: Embedding matrix with one row per point
+
+        Returns:
+            List of vectors, or a dict of named vector lists when full embeddings are kept
+        """
+        searched = truncate_vectors(vectors, self.size).tolist()
+        if self.full_size is None:
+            return searched
+        return {SEARCH_VECTOR_NAME: searched, FULL_VECTOR_NAME: np.asarray(vectors, dtype=np.float32).tolist()}
+
+    def search_vector(self, vector: List[float]) -> List[float]:
+        """Get the vector to search the default vector with for a query embedding."""
+        if len(vector) <= self.size:
+            return vector
+        return truncate_vectors([vector], self.size)[0].tolist()
+
+
+def new_vector_layout(embedding_size: int) -> VectorLayout:
+    """
+    Get the layout of a new collection under the configured profile.
+
+    Args:
+        embedding_size: Embedding dimension of the model
+
+    Returns:
+        Vector layout; embeddings are truncated to ``vector_dim`` if that is smaller
+    """
+    if settings.vector_dim is None or settings.vector_dim >= embedding_size:
+        return VectorLayout(size=embedding_size)
+    return VectorLayout(
+        size=settings.vector_dim,
+        full_size=embedding_size if settings.store_full_vectors else None,
+    )
+
+
+def collection_vector_layout(collection_info) -> VectorLayout:
+    """
+    Detect the vector layout of an existing collection.
+
+    Args:
+        collection_info: Result of get_collection
+
+    Returns:
+        Vector layout of the collection
+    """
+    vectors = collection_info.config.params.vectors
+    if not isinstance(vectors, dict):
+        return VectorLayout(size=vectors.size)
+    full = vectors.get(FULL_VECTOR_NAME)
+    return VectorLayout(size=vectors[SEARCH_VECTOR_NAME].size, full_size=full.size if full is not None else None)
+
+
+def build_vectors_config(vector_size: int) -> Union[VectorParams, dict]:
+    """
+    Build the vector parameters of the collection.
+
+    Args:
+        vector_size: Embedding dimension of the model
+    """
+    layout = new_vector_layout(vector_size)
+    params = VectorParams(
+        size=layout.size,
+        distance=Distance.COSINE,
+        on_disk=settings.vectors_on_disk,
+    )
+    if not layout.can_rescore:
+        return params
+    return {
+        SEARCH_VECTOR_NAME: params,
+        # Only read for the candidates being rescored: kept on disk and not indexed
+        FULL_VECTOR_NAME: VectorParams(
+            size=layout.full_size,
+            distance=Distance.COSINE,
+            on_disk=True,
+            hnsw_config=HnswConfigDiff(m=0),
+        ),
+    }
+
+
+def build_hnsw_config() -> HnswConfigDiff:
+    """Build the HNSW index parameters of the collection."""
+    return HnswConfigDiff(
+        m=settings.hnsw_m,
+        ef_construct=settings.hnsw_ef_construct,
+        on_disk=settings.vectors_on_disk,
+    )
+
+
+def build_quantization_config():
+    """Build the quantization config, or None if quantization is disabled."""
+    if settings.quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.quantization_always_ram,
+            )
+        )
+    if settings.quantization == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=settings.quantization_always_ram)
+        )
+    return None
+
+
+def build_optimizers_config(indexing_threshold: Optional[int] = None) -> OptimizersConfigDiff:
+    """
+    Build the optimizer config.
+
+    Args:
+        indexing_threshold: Override for the HNSW indexing threshold in KB
+            (0 disables indexing, e.g. during bulk loads)
+    """
+    if indexing_threshold is None:
+        indexing_threshold = settings.indexing_threshold
+    return OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+
+
+def create_collection_kwargs(vector_size: int, indexing_threshold: Optional[int] = None) -> dict:
+    """
+    Build the create_collection arguments for the configured profile.
+
+    Args:
+        vector_size: Embedding dimension of the model
+        indexing_threshold: Override for the HNSW indexing threshold in KB
+
+    Returns:
+        Keyword arguments for create_collection (without collection_name)
+    """
+    return {
+        "vectors_config": build_vectors_config(vector_size),
+        "hnsw_config": build_hnsw_config(),
+        "quantization_config": build_quantization_config(),
+        "optimizers_config": build_optimizers_config(indexing_threshold),
+        "on_disk_payload": settings.payload_on_disk,
+    }
+
+
+def missing_payload_indexes(collection_info) -> dict:
+    """
+    Get the payload indexes of the profile that a collection does not have yet.
+
+    Args:
+        collection_info: Result of get_collection
+
+    Returns:
+        Mapping of field name to schema type for each missing index
+    """
+    existing = collection_info.payload_schema or {}
+    return {field: schema for field, schema in PAYLOAD_INDEXES.items() if field not in existing}
+
+
+def build_search_params() -> Optional[SearchParams]:
+    """Build search-time parameters, or None to use Qdrant's defaults."""
+    quantization = None
+    if settings.quantization != "none":
+        quantization = QuantizationSearchParams(
+            rescore=settings.quantization_rescore,
+            oversampling=settings.quantization_oversampling,
+        )
+    if settings.hnsw_ef is None and quantization is None:
+        return None
+    return SearchParams(hnsw_ef=settings.hnsw_ef, quantization=quantization)
@@ -0,0 +1,48 @@
+"""Locally maintained view of the Qdrant collection state."""
+import time
+from typing import Optional
+
+
+class CollectionState:
+    """
+    Cached collection status used on the request hot path.
+
+    Refreshed from Qdrant in the background and updated directly by the
+    ingestion path, so ``/ask`` and ``/health`` never need a
+    ``get_collection`` round trip of their own.
+    """
+
+    def __init__(self):
+        self.exists = False
+        self.points_count = 0
+        self.connected = False
+        self.error: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def is_known(self) -> bool:
+        """Whether the state has been loaded from Qdrant at least once."""
+        return self.refreshed_at is not None
+
+    def update(self, exists: bool, points_count: int) -> None:
+        """Replace the state with fresh values read from Qdrant."""
+        self.exists = exists
+        self.points_count = points_count
+        self.connected = True
+        self.error = None
+        self.refreshed_at = time.time()
+
+    def mark_unreachable(self, error: str) -> None:
+        """Record a failed refresh; counts are kept from the last successful one."""
+        self.connected = False
+        self.error = error
+        self.refreshed_at = time.time()
+
+    def record_upsert(self, count: int) -> None:
+        """Account for points written by the ingestion path (re-upserted IDs are corrected on refresh)."""
+        self.exists = True
+        self.points_count += count
+
+    def record_delete(self, count: int) -> None:
+        """Account for points deleted by the ingestion path."""
+        self.points_count = max(0, self.points_count - count)
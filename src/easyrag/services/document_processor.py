@@ -1,27 +1,105 @@
 """Document processing service for loading and chunking documents."""
+import hashlib
 import logging
-from typing import List, Iterator
+import os
+from typing import TYPE_CHECKING, List, Iterator, Optional
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
 
 from easyrag.config import settings
+from easyrag.services.text_chunker import StreamingTextSplitter
+
+if TYPE_CHECKING:
+    import pymupdf
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# PyMuPDF, the LangChain loaders and the recursive splitter are imported where
+# they are used: together they add about a second to the API's import time
 
 logger = logging.getLogger(__name__)
 
 
+def fingerprint_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the content hash identifying a document file.
+    
+    Args:
+        file_path: Path to the document file
+        chunk_size: Bytes read at a time
+        
+    Returns:
+        Hex SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_pdf(file_path: str) -> bool:
+    """Check whether a file is parsed as a PDF (by extension)."""
+    return file_path.lower().split(".")[-1] == "pdf"
+
+
+def count_pages(file_path: str) -> int:
+    """
+    Count the units a document is parsed in.
+    
+    Args:
+        file_path: Path to the document file
+        
+    Returns:
+        Number of pages for PDFs, 1 for other files
+    """
+    if is_pdf(file_path):
+        import pymupdf
+
+        with pymupdf.open(file_path) as pdf:
+            return pdf.page_count
+    return 1
+
+
 class DocumentProcessor:
     """Service for processing documents (loading and chunking)."""
     
     def __init__(self):
-        # Improved separators for better chunking, especially for PDFs
-        # Prioritize paragraph breaks, then sentences, then words
-        self.splitter = RecursiveCharacterTextSplitter(
+        self._splitter: Optional["RecursiveCharacterTextSplitter"] = None
+        # Single-pass splitter for text files, which can be far larger than a PDF page
+        self.text_splitter = StreamingTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
-            separators=["\n\n\n", "\n\n", "\n", ". ", " ", ""]  # Better handling of PDF structure
         )
     
+    @property
+    def splitter(self) -> "RecursiveCharacterTextSplitter":
+        """Get or create the splitter for PDF pages and loaded documents."""
+        if self._splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            
+            # Improved separators for better chunking, especially for PDFs
+            # Prioritize paragraph breaks, then sentences, then words
+            self._splitter = RecursiveCharacterTextSplitter(
+                chunk_size=settings.chunk_size,
+                chunk_overlap=settings.chunk_overlap,
+                separators=["\n\n\n", "\n\n", "\n", ". ", " ", ""],  # Better handling of PDF structure
+                add_start_index=True  # Chunk offset within its page, used for deterministic point IDs
+            )
+        return self._splitter
+    
+    @staticmethod
+    def get_source_name(file_path: str, original_filename: str = None) -> str:
+        """
+        Get the source name stored in document metadata.
+        
+        Args:
+            file_path: Path to the document file (can be temporary)
+            original_filename: Original filename from user upload
+            
+        Returns:
+            Original filename if provided, otherwise the file path basename
+        """
+        return original_filename or os.path.basename(file_path)
+    
     def load_document(self, file_path: str, original_filename: str = None) -> List[Document]:
         """
         Load a document from file path.
@@ -33,7 +111,7 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
-        import os
+        from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
         
         # Use original filename if provided, otherwise use file path basename
         if original_filename:
@@ -81,31 +159,12 @@ class DocumentProcessor:
         ext = file_path.lower().split(".")[-1]
         
         if ext == "pdf":
-            # For PDFs, load page by page to avoid memory issues
-            # PyMuPDFLoader preserves structure better for multi-column layouts and diagrams
-            loader = PyMuPDFLoader(file_path)
-            pages = loader.load()
-            
-            logger.info(f"Loading PDF with {len(pages)} pages in batches of {batch_size}")
-            
-            # Process pages in batches
-            for i in range(0, len(pages), batch_size):
-                batch = pages[i:i + batch_size]
-                for idx, doc in enumerate(batch):
-                    doc.metadata["source"] = source_name
-                    # PyMuPDFLoader typically includes page number in metadata
-                    # If not present, infer from position (1-indexed)
-                    if "page" not in doc.metadata or doc.metadata["page"] is None:
-                        doc.metadata["page"] = i + idx + 1
-                    # Ensure page is an integer
-                    try:
-                        doc.metadata["page"] = int(doc.metadata["page"])
-                    except (ValueError, TypeError):
-                        doc.metadata["page"] = i + idx + 1
-                logger.info(f"Loaded batch {i // batch_size + 1} ({len(batch)} pages)")
-                yield batch
+            # For PDFs, read pages lazily so only one batch of pages is in memory at a time
+            yield from self._load_pdf_pages_batched(file_path, source_name, batch_size)
         else:
             # For non-PDF files, load normally but still yield in batches
+            from langchain_community.document_loaders import TextLoader
+            
             loader = TextLoader(file_path)
             docs = loader.load()
             for doc in docs:
@@ -115,6 +174,110 @@ class DocumentProcessor:
             for i in range(0, len(docs), batch_size):
                 yield docs[i:i + batch_size]
     
+    def load_page_range(self, file_path: str, source_name: str, start: int, stop: int) -> List[Document]:
+        """
+        Load pages [start, stop) of a document.
+        
+        Each range can be loaded independently, so a document can be parsed
+        by several workers at once. Non-PDF files have a single page.
+        
+        Args:
+            file_path: Path to the document file (can be temporary)
+            source_name: Name stored in the source metadata field
+            start: First page to load (0-indexed)
+            stop: Page after the last one to load
+            
+        Returns:
+            List of Document objects, one per page
+        """
+        if not is_pdf(file_path):
+            from langchain_community.document_loaders import TextLoader
+            
+            docs = TextLoader(file_path).load() if start == 0 else []
+            for doc in docs:
+                doc.metadata["source"] = source_name
+            return docs
+        
+        import pymupdf
+        
+        with pymupdf.open(file_path) as pdf:
+            stop = min(stop, pdf.page_count)
+            return [self._pdf_page_document(pdf, page_number, source_name) for page_number in range(start, stop)]
+    
+    @staticmethod
+    def _pdf_page_document(pdf: "pymupdf.Document", page_number: int, source_name: str) -> Document:
+        """Extract one PDF page as a Document, the same way as PyMuPDFLoader."""
+        page = pdf.load_page(page_number)
+        return Document(
+            page_content=page.get_text(),
+            metadata={
+                "source": source_name,
+                # 0-indexed, matching PyMuPDFLoader
+                "page": page_number,
+                "total_pages": pdf.page_count,
+            }
+        )
+    
+    def _load_pdf_pages_batched(self, file_path: str, source_name: str, batch_size: int) -> Iterator[List[Document]]:
+        """
+        Read a PDF one page range at a time with PyMuPDF.
+        
+        Text is extracted the same way as PyMuPDFLoader, but pages are only
+        loaded when their batch is requested, so peak memory is bounded by
+        batch_size rather than by document size.
+        
+        Args:
+            file_path: Path to the PDF file
+            source_name: Name stored in the source metadata field
+            batch_size: Number of pages per batch
+            
+        Yields:
+            Batches of Document objects, one per page
+        """
+        import pymupdf
+        
+        with pymupdf.open(file_path) as pdf:
+            total_pages = pdf.page_count
+            logger.info(f"Loading PDF with {total_pages} pages in batches of {batch_size}")
+            
+            for start in range(0, total_pages, batch_size):
+                batch = [
+                    self._pdf_page_document(pdf, page_number, source_name)
+                    for page_number in range(start, min(start + batch_size, total_pages))
+                ]
+                logger.info(f"Loaded batch {start // batch_size + 1} ({len(batch)} pages)")
+                yield batch
+    
+    def iter_text_chunks(self, file_path: str, source_name: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """
+        Stream a text file as chunks without loading it into memory.
+        
+        Chunks carry their character offsets in the file as ``start_index``
+        and ``end_index`` metadata.
+        
+        Args:
+            file_path: Path to the text file (can be temporary)
+            source_name: Name stored in the source metadata field
+            batch_size: Number of chunks per batch (defaults to config batch_size)
+            
+        Yields:
+            Batches of chunk Documents
+        """
+        if batch_size is None:
+            batch_size = settings.batch_size
+        
+        batch = []
+        for start, end, text in self.text_splitter.split_file(file_path):
+            batch.append(Document(
+                page_content=text,
+                metadata={"source": source_name, "start_index": start, "end_index": end}
+            ))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
     def chunk_documents(self, docs: List[Document]) -> List[Document]:
         """
         Split documents into chunks.
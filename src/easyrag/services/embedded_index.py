@@ -0,0 +1,878 @@
+"""Embedded in-process vector index on memory-mapped NumPy matrices."""
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
+
+from easyrag.config import settings
+from easyrag.services.collection_profile import PAYLOAD_INDEXES, VectorLayout, new_vector_layout, truncate_vectors
+from easyrag.services.executors import run_cpu
+from easyrag.services.vector_backend import PointBatch, SearchHit, SearchRequest, VectorBackend
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+# Rows scored per matrix product, bounding the temporary memory of a scan
+SCAN_BLOCK_ROWS = 65536
+# int8 rows are converted to float32 in pieces small enough to stay in cache
+INT8_CONVERT_ROWS = 1024
+
+# Rows allocated when an index is created; the files double in size when full
+INITIAL_CAPACITY = 1024
+
+# IVF partitions are trained once the index holds this many vectors per partition
+IVF_MIN_POINTS_PER_LIST = 40
+# Vectors per partition sampled for training, and k-means iterations
+IVF_SAMPLE_PER_LIST = 256
+IVF_TRAINING_ITERATIONS = 10
+
+_PAYLOAD_KEY = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (the last axis) to unit length, as Qdrant does for cosine distance."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _field_expression(key: str) -> str:
+    """Get the SQL expression reading a dotted payload key."""
+    if not _PAYLOAD_KEY.match(key):
+        raise ValueError(f"Unsupported payload key: {key}")
+    return f"json_extract(payload, '$.{key}')"
+
+
+def filter_sql(query_filter: Optional[Filter]) -> Tuple[str, list]:
+    """
+    Translate a Qdrant filter into an SQL condition on the points table.
+
+    Supports the filters the service builds: ``must`` conditions that match
+    a value, any of several values or a numeric range of a payload field.
+
+    Args:
+        query_filter: Filter to translate, or None to match every point
+
+    Returns:
+        SQL condition and its parameters
+    """
+    if query_filter is None:
+        return "1", []
+    if query_filter.should or query_filter.must_not or query_filter.min_should:
+        raise ValueError("The embedded index only supports 'must' filter conditions")
+
+    conditions = query_filter.must or []
+    if not isinstance(conditions, list):
+        conditions = [conditions]
+    clauses = []
+    params: list = []
+    for condition in conditions:
+        if not isinstance(condition, FieldCondition) or (condition.match is None and condition.range is None):
+            raise ValueError(f"Unsupported filter condition: {condition}")
+        expression = _field_expression(condition.key)
+        if isinstance(condition.match, MatchValue):
+            clauses.append(f"{expression} = ?")
+            params.append(condition.match.value)
+        elif isinstance(condition.match, MatchAny):
+            clauses.append(f"{expression} IN ({','.join('?' * len(condition.match.any))})")
+            params.extend(condition.match.any)
+        elif condition.match is not None:
+            raise ValueError(f"Unsupported filter match: {condition.match}")
+        if condition.range is not None:
+            for operator, bound in (("<", condition.range.lt), ("<=", condition.range.lte),
+                                    (">", condition.range.gt), (">=", condition.range.gte)):
+                if bound is not None:
+                    clauses.append(f"{expression} {operator} ?")
+                    params.append(bound)
+    return " AND ".join(clauses) or "1", params
+
+
+class GrowableArray:
+    """Memory-mapped array file whose first axis grows by doubling."""
+
+    def __init__(self, path: str, dtype, row_shape: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = row_shape
+        self.row_bytes = self.dtype.itemsize * int(np.prod(row_shape, dtype=np.int64))
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.truncate(INITIAL_CAPACITY * self.row_bytes)
+        self._map()
+
+    def _map(self) -> None:
+        capacity = os.path.getsize(self.path) // self.row_bytes
+        self.array = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, *self.row_shape))
+
+    @property
+    def capacity(self) -> int:
+        """Rows the file currently has room for."""
+        return len(self.array)
+
+    def reserve(self, rows: int) -> None:
+        """
+        Grow the file to hold at least ``rows`` rows.
+
+        Arrays mapped earlier stay valid for their rows, so a scan that
+        started before the file grew can finish on them.
+        """
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2)
+        self.array.flush()
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * self.row_bytes)
+        self._map()
+
+    def flush(self) -> None:
+        """Write changed pages to disk."""
+        self.array.flush()
+
+
+class IndexLockedError(RuntimeError):
+    """Raised when an embedded index is already open in another process."""
+
+
+class EmbeddedIndex:
+    """
+    Points of one collection in a directory on local disk.
+
+    Vectors are rows of memory-mapped matrices, addressed by slot:
+    ``vectors.bin`` holds the searched (possibly truncated) unit vectors as
+    float32, or as int8 with a per-row scale in ``scales.bin``; ``full.bin``
+    holds full embeddings for rescoring. IDs and payloads are rows of a
+    SQLite table keyed by slot, with expression indexes on the filtered
+    payload fields. Slots of deleted points are reused once no search that
+    started before the delete is still running, so a search never pairs the
+    score of a deleted point with the payload of the point that took its slot.
+
+    A search scores every live row with blocked matrix products and keeps
+    the top k with ``argpartition``. With ``ivf_lists`` set, the vectors are
+    clustered into that many partitions (spherical k-means) once there are
+    enough of them, and a search only scores the rows of the ``ivf_probes``
+    partitions nearest to the query.
+
+    Reopening an index maps the files and reads the slot column, so it takes
+    well under a second per million points. Methods are blocking and
+    thread-safe; searches score rows outside the lock. An open index holds
+    an exclusive lock on its ``lock`` file, so a second process (or a second
+    ``EmbeddedIndex`` on the same directory) fails to open it instead of
+    overwriting rows it does not own.
+    """
+
+    def __init__(self, path: str, dtype: str = None, ivf_lists: int = None, ivf_probes: int = None):
+        self.path = path
+        self.dtype = dtype or settings.embedded_index_dtype
+        self.ivf_lists = settings.embedded_index_ivf_lists if ivf_lists is None else ivf_lists
+        self.ivf_probes = ivf_probes or settings.embedded_index_ivf_probes
+        self.layout: Optional[VectorLayout] = None
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[GrowableArray] = None
+        self._scales: Optional[GrowableArray] = None
+        self._full: Optional[GrowableArray] = None
+        self._assignments: Optional[GrowableArray] = None
+        self._centroids: Optional[np.ndarray] = None
+        # Whether IVF partitions are being trained, and the slots written meanwhile
+        self._training = False
+        self._written_while_training: List[int] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._free: List[int] = []
+        # Slots freed by each delete, waiting for the searches that may still score them
+        self._pending_free: List[Tuple[int, List[int]]] = []
+        # Deletes so far, and the number of running searches by the count they started at
+        self._epoch = 0
+        self._searches: Dict[int, int] = {}
+        self._high_water = 0
+        self._lock_fd: Optional[int] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _acquire_lock(self) -> None:
+        """
+        Take the exclusive lock on the index directory, if not held yet.
+
+        Raises:
+            IndexLockedError: If another process (or index object) holds it
+        """
+        if self._lock_fd is not None:
+            return
+        fd = os.open(self._file("lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            owner = os.read(fd, 32).decode(errors="replace").strip() or "unknown"
+            os.close(fd)
+            raise IndexLockedError(
+                f"Embedded index at {self.path} is in use by another process (pid {owner}); stop the API "
+                f"server (or the other easyrag command) before running this one"
+            )
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+
+    def _release_lock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def exists(self) -> bool:
+        """Whether the index has been created on disk."""
+        return os.path.exists(self._file("meta.json"))
+
+    def create(self, layout: VectorLayout) -> None:
+        """
+        Create an empty index on disk and open it.
+
+        Args:
+            layout: Vectors to store per point
+        """
+        os.makedirs(self.path, exist_ok=True)
+        meta = {"size": layout.size, "full_size": layout.full_size, "dtype": self.dtype}
+        with open(self._file("meta.json.tmp"), "w") as f:
+            json.dump(meta, f)
+        os.replace(self._file("meta.json.tmp"), self._file("meta.json"))
+        logger.info(f"Created embedded index at {self.path} ({layout}, {self.dtype})")
+        self.load()
+
+    def load(self) -> VectorLayout:
+        """
+        Open the index if it is not open yet.
+
+        Returns:
+            Vector layout of the index
+        """
+        with self._lock:
+            if self._conn is not None:
+                return self.layout
+            layout = self._open()
+        self._maybe_train_ivf()
+        return layout
+
+    def _open(self) -> VectorLayout:
+        """Open the index files; called with the lock held."""
+        start = time.perf_counter()
+        self._acquire_lock()
+        with open(self._file("meta.json")) as f:
+            meta = json.load(f)
+        self.layout = VectorLayout(size=meta["size"], full_size=meta["full_size"])
+        # The storage type is fixed when the index is created
+        self.dtype = meta["dtype"]
+
+        self._conn = sqlite3.connect(self._file("points.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points (slot INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, payload TEXT NOT NULL)"
+        )
+        for field in PAYLOAD_INDEXES:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS points_{field.replace('.', '_')} ON points ({_field_expression(field)})"
+            )
+
+        int8 = self.dtype == "int8"
+        self._vectors = GrowableArray(self._file("vectors.bin"), np.int8 if int8 else np.float32, (self.layout.size,))
+        self._scales = GrowableArray(self._file("scales.bin"), np.float32) if int8 else None
+        if self.layout.full_size is not None:
+            self._full = GrowableArray(self._file("full.bin"), np.float32, (self.layout.full_size,))
+        if os.path.exists(self._file("ivf_centroids.npy")):
+            centroids = np.load(self._file("ivf_centroids.npy"))
+            if len(centroids) == self.ivf_lists:
+                self._centroids = centroids
+                self._assignments = GrowableArray(self._file("ivf_lists.bin"), np.int32)
+            else:
+                # Assignments would go stale while disabled; changed partition counts are retrained
+                logger.info(f"Dropping the {len(centroids)} IVF partitions of {self.path} (configured: {self.ivf_lists})")
+                os.remove(self._file("ivf_centroids.npy"))
+                os.remove(self._file("ivf_lists.bin"))
+
+        slots = np.fromiter((row[0] for row in self._conn.execute("SELECT slot FROM points")), dtype=np.int64)
+        self._high_water = int(slots.max()) + 1 if len(slots) else 0
+        self._alive = np.zeros(self._vectors.capacity, dtype=bool)
+        self._alive[slots] = True
+        self._free = np.flatnonzero(~self._alive[:self._high_water]).tolist()
+        self._pending_free = []
+        self._reserve(self._high_water)
+        logger.info(f"Opened embedded index at {self.path} with {len(slots)} points in {time.perf_counter() - start:.2f}s")
+        return self.layout
+
+    def _arrays(self) -> List[GrowableArray]:
+        return [array for array in (self._vectors, self._scales, self._full, self._assignments) if array is not None]
+
+    def _reserve(self, rows: int) -> None:
+        for array in self._arrays():
+            array.reserve(rows)
+        if len(self._alive) < self._vectors.capacity:
+            alive = np.zeros(self._vectors.capacity, dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+
+    def _release_free_slots(self) -> None:
+        """Make slots reusable that no running search can still see as live."""
+        oldest = min(self._searches, default=self._epoch)
+        while self._pending_free and self._pending_free[0][0] <= oldest:
+            self._free.extend(self._pending_free.pop(0)[1])
+
+    def _allocate(self, count: int) -> List[int]:
+        self._release_free_slots()
+        slots = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        new = count - len(slots)
+        if new:
+            self._reserve(self._high_water + new)
+            slots.extend(range(self._high_water, self._high_water + new))
+            self._high_water += new
+        return slots
+
+    def _slots_of(self, ids: Sequence[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for i in range(0, len(ids), _SQL_BATCH):
+            batch = list(ids[i:i + _SQL_BATCH])
+            rows = self._conn.execute(
+                f"SELECT id, slot FROM points WHERE id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def _select_slots(self, query_filter: Optional[Filter]) -> np.ndarray:
+        where, params = filter_sql(query_filter)
+        rows = self._conn.execute(f"SELECT slot FROM points WHERE {where}", params)
+        return np.fromiter((row[0] for row in rows), dtype=np.int64)
+
+    def _write_vectors(self, slots: np.ndarray, vectors: np.ndarray) -> None:
+        searched = _normalize(truncate_vectors(vectors, self.layout.size))
+        if self._scales is not None:
+            scales = np.maximum(np.abs(searched).max(axis=1), 1e-12) / 127
+            self._vectors.array[slots] = np.rint(searched / scales[:, None]).astype(np.int8)
+            self._scales.array[slots] = scales
+        else:
+            self._vectors.array[slots] = searched
+        if self._full is not None:
+            self._full.array[slots] = _normalize(vectors)
+        if self._centroids is not None:
+            self._assignments.array[slots] = np.argmax(searched @ self._centroids.T, axis=1)
+        elif self._training:
+            self._written_while_training.extend(slots.tolist())
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[dict]) -> None:
+        """
+        Insert or replace points.
+
+        Args:
+            ids: Point IDs
+            vectors: Full embedding matrix with one row per point
+            payloads: Payload for each point
+        """
+        self.load()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        expected = self.layout.full_size or self.layout.size
+        if vectors.shape[1] < self.layout.size or (self.layout.full_size and vectors.shape[1] != expected):
+            raise ValueError(f"Expected {expected}-dimensional embeddings, got {vectors.shape[1]}")
+
+        # Of points upserted twice in one call, the last one wins
+        rows = list({str(point_id): i for i, point_id in enumerate(ids)}.items())
+        ids = [point_id for point_id, _ in rows]
+        order = [i for _, i in rows]
+        records = [json.dumps(payloads[i], separators=(",", ":"), ensure_ascii=False) for i in order]
+
+        with self._lock:
+            existing = self._slots_of(ids)
+            allocated = iter(self._allocate(sum(1 for point_id in ids if point_id not in existing)))
+            slots = np.array([existing.get(point_id) if point_id in existing else next(allocated) for point_id in ids],
+                             dtype=np.int64)
+            self._write_vectors(slots, vectors[order])
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO points (slot, id, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload",
+                zip(slots.tolist(), ids, records),
+            )
+            self._conn.execute("COMMIT")
+            self._alive[slots] = True
+        self._maybe_train_ivf()
+
+    def _remove(self, slots: Sequence[int]) -> None:
+        if not len(slots):
+            return
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM points WHERE slot = ?", ((slot,) for slot in slots))
+        self._conn.execute("COMMIT")
+        self._alive[list(slots)] = False
+        self._epoch += 1
+        self._pending_free.append((self._epoch, list(slots)))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Delete points by ID."""
+        self.load()
+        with self._lock:
+            self._remove(list(self._slots_of([str(point_id) for point_id in ids]).values()))
+
+    def delete_by_filter(self, query_filter: Filter) -> None:
+        """Delete all points matching a filter."""
+        self.load()
+        with self._lock:
+            self._remove(self._select_slots(query_filter).tolist())
+
+    def points_count(self) -> int:
+        """Number of points in the index."""
+        self.load()
+        with self._lock:
+            return int(np.count_nonzero(self._alive[:self._high_water]))
+
+    def count(self, query_filter: Optional[Filter] = None) -> int:
+        """Count the points matching a filter."""
+        self.load()
+        where, params = filter_sql(query_filter)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM points WHERE {where}", params).fetchone()[0]
+
+    def scroll_ids(self, query_filter: Optional[Filter] = None) -> Set[str]:
+        """Get the IDs of all points matching a filter."""
+        self.load()
+        where, params = filter_sql(query_filter)
+        with self._lock:
+            return {row[0] for row in self._conn.execute(f"SELECT id FROM points WHERE {where}", params)}
+
+    def set_payload(self, query_filter: Filter, key: str, payload: dict) -> None:
+        """Set values in a payload object of all points matching a filter."""
+        self.load()
+        where, params = filter_sql(query_filter)
+        assignments = []
+        values = []
+        for field, value in payload.items():
+            path = f"{key}.{field}" if key else field
+            _field_expression(path)
+            assignments.append(f"'$.{path}', json(?)")
+            values.append(json.dumps(value))
+        with self._lock:
+            self._conn.execute(f"UPDATE points SET payload = json_set(payload, {', '.join(assignments)}) WHERE {where}",
+                               [*values, *params])
+
+    def write_marker(self) -> Optional[str]:
+        """Get the marker stored with set_write_marker, if any."""
+        try:
+            with open(self._file("write_marker")) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set_write_marker(self, marker: str) -> None:
+        """Store a marker that changes after every write, for other readers of the index."""
+        with open(self._file("write_marker.tmp"), "w") as f:
+            f.write(marker)
+        os.replace(self._file("write_marker.tmp"), self._file("write_marker"))
+
+    def read_points(self, after_slot: int, limit: int) -> Tuple[PointBatch, int]:
+        """
+        Read points in slot order.
+
+        Args:
+            after_slot: Read points after this slot (-1 to start at the beginning)
+            limit: Maximum points to read
+
+        Returns:
+            The points with their most complete stored embedding, and the last slot read
+        """
+        self.load()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT slot, id, payload FROM points WHERE slot > ? ORDER BY slot LIMIT ?", (after_slot, limit)
+            ).fetchall()
+            slots = np.array([row[0] for row in rows], dtype=np.int64)
+            vectors = self._full.array[slots] if self._full is not None else self._dequantize(slots)
+        batch = PointBatch(
+            ids=[row[1] for row in rows],
+            vectors=np.asarray(vectors, dtype=np.float32),
+            payloads=[json.loads(row[2]) for row in rows],
+        )
+        return batch, int(slots[-1]) if len(slots) else after_slot
+
+    def _dequantize(self, slots: np.ndarray) -> np.ndarray:
+        rows = self._vectors.array[slots].astype(np.float32)
+        if self._scales is not None:
+            rows *= self._scales.array[slots][:, None]
+        return rows
+
+    def _maybe_train_ivf(self) -> None:
+        """
+        Cluster the vectors into IVF partitions once there are enough of them.
+
+        Training runs on a copy of a sample outside the index lock, so
+        searches and writes go on meanwhile. The new partitions are switched
+        in under the lock, after the rows written during training have been
+        assigned to them; until then searches scan every row.
+        """
+        with self._lock:
+            if self.ivf_lists <= 0 or self._centroids is not None or self._training or self._conn is None:
+                return
+            live = np.flatnonzero(self._alive[:self._high_water])
+            if len(live) < self.ivf_lists * IVF_MIN_POINTS_PER_LIST:
+                return
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live, size=min(len(live), self.ivf_lists * IVF_SAMPLE_PER_LIST), replace=False))
+            data = _normalize(self._dequantize(sample))
+            high_water = self._high_water
+            conn = self._conn
+            self._training = True
+            self._written_while_training = []
+
+        try:
+            start = time.perf_counter()
+            centroids = data[rng.choice(len(data), size=self.ivf_lists, replace=False)]
+            for _ in range(IVF_TRAINING_ITERATIONS):
+                assignment = np.argmax(data @ centroids.T, axis=1)
+                order = np.argsort(assignment, kind="stable")
+                counts = np.bincount(assignment, minlength=self.ivf_lists)
+                starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                # Partitions that lost all their vectors keep their centroid
+                filled = counts > 0
+                centroids[filled] = _normalize(np.add.reduceat(data[order], starts[filled], axis=0))
+            centroids = centroids.astype(np.float32)
+
+            assignments = GrowableArray(self._file("ivf_lists.bin"), np.int32)
+            assignments.reserve(high_water)
+            for block in range(0, high_water, SCAN_BLOCK_ROWS):
+                slots = np.arange(block, min(block + SCAN_BLOCK_ROWS, high_water))
+                with self._lock:
+                    if self._conn is not conn:
+                        return
+                    rows = self._dequantize(slots)
+                assignments.array[slots] = np.argmax(rows @ centroids.T, axis=1)
+
+            with self._lock:
+                # Given up if the index was closed meanwhile
+                if self._conn is not conn:
+                    return
+                # Rows written during training were assigned from their old vectors, or not at all
+                written = np.unique(np.asarray(self._written_while_training, dtype=np.int64))
+                assignments.reserve(self._vectors.capacity)
+                if len(written):
+                    assignments.array[written] = np.argmax(self._dequantize(written) @ centroids.T, axis=1)
+                assignments.flush()
+                np.save(self._file("ivf_centroids.npy"), centroids)
+                self._assignments = assignments
+                self._centroids = centroids
+            logger.info(f"Trained {self.ivf_lists} IVF partitions on {len(sample)} vectors in {time.perf_counter() - start:.2f}s")
+        finally:
+            with self._lock:
+                self._training = False
+                self._written_while_training = []
+
+    def _scan(self, vectors: np.ndarray, scales: Optional[np.ndarray], alive: np.ndarray,
+              rows: Optional[np.ndarray], queries: np.ndarray, limit: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Find the best scoring rows for several queries in one pass over the matrix.
+
+        Args:
+            vectors: Searched vector matrix
+            scales: Per-row scales of an int8 matrix
+            alive: Live rows up to the high-water mark
+            rows: Rows to score (all live rows if None)
+            queries: Unit query vectors, one row per query
+            limit: Rows to return per query
+
+        Returns:
+            For each query, slots and scores of the best rows, best first
+        """
+        best_slots = np.empty((0, len(queries)), dtype=np.int64)
+        best_scores = np.empty((0, len(queries)), dtype=np.float32)
+        total = len(alive) if rows is None else len(rows)
+        for block in range(0, total, SCAN_BLOCK_ROWS):
+            end = min(block + SCAN_BLOCK_ROWS, total)
+            slots = np.arange(block, end) if rows is None else rows[block:end]
+            if scales is None:
+                scores = (vectors[block:end] if rows is None else vectors[slots]) @ queries.T
+            else:
+                scores = np.empty((end - block, len(queries)), dtype=np.float32)
+                for start in range(0, end - block, INT8_CONVERT_ROWS):
+                    stop = min(start + INT8_CONVERT_ROWS, end - block)
+                    matrix = vectors[block + start:block + stop] if rows is None else vectors[slots[start:stop]]
+                    np.matmul(matrix.astype(np.float32), queries.T, out=scores[start:stop])
+                scores *= scales[slots][:, None]
+            if rows is None:
+                scores[~alive[block:end]] = -np.inf
+            block_slots = np.broadcast_to(slots[:, None], scores.shape)
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1, axis=0)[:limit]
+                scores = np.take_along_axis(scores, top, axis=0)
+                block_slots = slots[top]
+            best_scores = np.concatenate([best_scores, scores])
+            best_slots = np.concatenate([best_slots, block_slots])
+            if len(best_scores) > limit:
+                top = np.argpartition(-best_scores, limit - 1, axis=0)[:limit]
+                best_scores = np.take_along_axis(best_scores, top, axis=0)
+                best_slots = np.take_along_axis(best_slots, top, axis=0)
+
+        order = np.argsort(-best_scores, axis=0, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=0)
+        best_slots = np.take_along_axis(best_slots, order, axis=0)
+        results = []
+        for column in range(len(queries)):
+            found = np.isfinite(best_scores[:, column])
+            results.append((best_slots[found, column], best_scores[found, column]))
+        return results
+
+    def search(self, requests: Sequence[SearchRequest]) -> List[List[SearchHit]]:
+        """
+        Run nearest-neighbour searches by cosine similarity.
+
+        Unfiltered searches without IVF share one scan of the matrix.
+
+        Args:
+            requests: Searches to run
+
+        Returns:
+            For each request, hits best first
+        """
+        self.load()
+        with self._lock:
+            epoch = self._epoch
+            self._searches[epoch] = self._searches.get(epoch, 0) + 1
+        try:
+            return self._search(requests)
+        finally:
+            with self._lock:
+                self._searches[epoch] -= 1
+                if not self._searches[epoch]:
+                    del self._searches[epoch]
+
+    def _search(self, requests: Sequence[SearchRequest]) -> List[List[SearchHit]]:
+        with self._lock:
+            high_water = self._high_water
+            alive = self._alive[:high_water].copy()
+            vectors = self._vectors.array
+            scales = self._scales.array if self._scales is not None else None
+            full = self._full.array if self._full is not None else None
+            centroids = self._centroids
+            assignments = self._assignments.array[:high_water] if self._assignments is not None else None
+            filtered = [self._select_slots(r.query_filter) if r.query_filter is not None else None for r in requests]
+
+        queries = [_normalize(np.asarray(self.layout.search_vector(r.vector), dtype=np.float32)) for r in requests]
+        rescore = [r.rescore and full is not None for r in requests]
+        limits = [math.ceil(r.k * settings.rescore_oversampling) if rescore[i] else r.k for i, r in enumerate(requests)]
+        found: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(requests)
+
+        full_scans = [i for i in range(len(requests)) if filtered[i] is None and centroids is None]
+        if full_scans:
+            limit = max(limits[i] for i in full_scans)
+            matches = self._scan(vectors, scales, alive, None, np.stack([queries[i] for i in full_scans]), limit)
+            for i, (slots, scores) in zip(full_scans, matches):
+                found[i] = (slots[:limits[i]], scores[:limits[i]])
+
+        for i in range(len(requests)):
+            if found[i] is not None:
+                continue
+            rows = filtered[i]
+            if centroids is not None:
+                probes = np.argsort(-(centroids @ queries[i]))[:self.ivf_probes]
+                partition_rows = np.flatnonzero(np.isin(assignments, probes) & alive)
+                rows = partition_rows if rows is None else np.intersect1d(rows, partition_rows, assume_unique=True)
+            found[i] = self._scan(vectors, scales, alive, rows, queries[i][None], limits[i])[0]
+
+        for i, request in enumerate(requests):
+            if rescore[i] and len(found[i][0]):
+                slots = found[i][0]
+                scores = full[slots] @ _normalize(np.asarray(request.vector, dtype=np.float32))
+                top = np.argsort(-scores, kind="stable")[:request.k]
+                found[i] = (slots[top], scores[top])
+
+        hit_slots = list({int(slot) for slots, _ in found for slot in slots})
+        points: Dict[int, Tuple[str, str]] = {}
+        with self._lock:
+            for start in range(0, len(hit_slots), _SQL_BATCH):
+                batch = hit_slots[start:start + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT slot, id, payload FROM points WHERE slot IN ({','.join('?' * len(batch))})", batch
+                )
+                points.update((slot, (point_id, payload)) for slot, point_id, payload in rows)
+
+        results = []
+        for request, (slots, scores) in zip(requests, found):
+            stored = None
+            if request.with_vectors:
+                if full is not None:
+                    stored = np.asarray(full[slots], dtype=np.float32)
+                else:
+                    stored = vectors[slots].astype(np.float32)
+                    if scales is not None:
+                        stored *= scales[slots][:, None]
+            # Points deleted since the scan are left out
+            results.append([
+                SearchHit(id=points[slot][0], score=float(score), payload=json.loads(points[slot][1]),
+                          vector=stored[row] if stored is not None else None)
+                for row, (slot, score) in enumerate(zip(slots.tolist(), scores.tolist())) if slot in points
+            ])
+        return results
+
+    def flush(self) -> None:
+        """Write the memory-mapped matrices to disk."""
+        with self._lock:
+            for array in self._arrays():
+                array.flush()
+
+    def _close_files(self) -> None:
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+        self._vectors = self._scales = self._full = self._assignments = None
+        self._centroids = None
+
+    def close(self) -> None:
+        """Flush and close the index, releasing its lock."""
+        with self._lock:
+            self._close_files()
+            self._release_lock()
+
+    def destroy(self) -> None:
+        """Close the index and delete its files."""
+        with self._lock:
+            if os.path.isdir(self.path):
+                self._acquire_lock()
+            self._close_files()
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._release_lock()
+
+    def replace_files(self, staged: "EmbeddedIndex", keep_old: bool = False) -> Optional[str]:
+        """
+        Move the files of another index into this index's directory.
+
+        Both indexes are closed; this one reopens on its next use. Calls on
+        this index wait until the files have been swapped.
+
+        Args:
+            staged: Complete index to take the place of this one
+            keep_old: Keep the previous files in a ``.previous`` directory
+
+        Returns:
+            Directory the previous files were moved to, or None if there were none
+        """
+        with self._lock:
+            # Both directories stay locked while they are renamed, so no other process opens either
+            if os.path.isdir(self.path):
+                self._acquire_lock()
+            staged._acquire_lock()
+            # SQLite addresses its journal files by path, so it is closed before the rename
+            staged._close_files()
+            self._close_files()
+            try:
+                previous = f"{self.path}.previous"
+                shutil.rmtree(previous, ignore_errors=True)
+                if not os.path.exists(self.path):
+                    previous = None
+                else:
+                    os.rename(self.path, previous)
+                os.rename(staged.path, self.path)
+                if previous is not None and not keep_old:
+                    shutil.rmtree(previous, ignore_errors=True)
+            finally:
+                staged._release_lock()
+                self._release_lock()
+            self.layout = None
+        return previous
+
+
+class EmbeddedBackend(VectorBackend):
+    """
+    Collection in an ``EmbeddedIndex`` under ``embedded_index_path``.
+
+    Index calls run in the CPU executor. The index lives in this process, so
+    only one API process may serve a collection; others (including
+    ``easyrag ingest`` and ``snapshot-import --replace`` while the API runs)
+    fail with IndexLockedError.
+    """
+
+    name = "embedded"
+
+    def __init__(self, collection_name: str, path: Optional[str] = None):
+        super().__init__(collection_name)
+        self.index = EmbeddedIndex(os.path.join(path or settings.embedded_index_path, collection_name))
+
+    async def collection_exists(self) -> bool:
+        return self.index.exists()
+
+    async def create_collection(self, embedding_size: int, bulk_load: bool = False) -> None:
+        # Vectors are searchable as soon as they are written, there is nothing to defer
+        await run_cpu(self.index.create, new_vector_layout(embedding_size))
+
+    async def open(self) -> VectorLayout:
+        self.layout = await run_cpu(self.index.load)
+        return self.layout
+
+    async def delete_collection(self) -> None:
+        await run_cpu(self.index.destroy)
+        self.layout = None
+
+    def sibling(self, collection_name: str) -> "EmbeddedBackend":
+        return EmbeddedBackend(collection_name, path=os.path.dirname(self.index.path))
+
+    async def replace_with(self, staged: VectorBackend, keep_old: bool = False) -> dict:
+        previous = await run_cpu(self.index.replace_files, staged.index, keep_old)
+        self.layout = None
+        if previous is None:
+            return {"previous_collection": None, "previous_deleted": False}
+        # Kept files live on in a sibling directory
+        return {
+            "previous_collection": os.path.basename(previous) if keep_old else self.collection_name,
+            "previous_deleted": not keep_old,
+        }
+
+    async def points_count(self) -> int:
+        return await run_cpu(self.index.points_count)
+
+    async def supports_write_markers(self) -> bool:
+        return True
+
+    async def write_marker(self) -> Optional[str]:
+        return await run_cpu(self.index.write_marker)
+
+    async def publish_write_marker(self, marker: str) -> None:
+        await run_cpu(self.index.set_write_marker, marker)
+
+    async def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict], wait: bool = True) -> None:
+        # Points are searchable as soon as the call returns, whatever ``wait`` says
+        await run_cpu(self.index.upsert, ids, vectors, payloads)
+
+    async def barrier(self) -> None:
+        await run_cpu(self.index.flush)
+
+    async def delete(self, ids: List[str]) -> None:
+        await run_cpu(self.index.delete, ids)
+
+    async def delete_by_filter(self, query_filter: Filter) -> None:
+        await run_cpu(self.index.delete_by_filter, query_filter)
+
+    async def count(self, query_filter: Optional[Filter] = None) -> int:
+        return await run_cpu(self.index.count, query_filter)
+
+    async def scroll_ids(self, query_filter: Optional[Filter] = None) -> Set[str]:
+        return await run_cpu(self.index.scroll_ids, query_filter)
+
+    async def set_payload(self, query_filter: Filter, key: str, payload: dict) -> None:
+        await run_cpu(self.index.set_payload, query_filter, key, payload)
+
+    async def iter_points(self, batch_size: int) -> AsyncIterator[PointBatch]:
+        after_slot = -1
+        while True:
+            batch, after_slot = await run_cpu(self.index.read_points, after_slot, batch_size)
+            if not batch.ids:
+                return
+            yield batch
+
+    async def search(self, requests: List[SearchRequest]) -> List[List[SearchHit]]:
+        return await run_cpu(self.index.search, requests)
+
+    async def close(self) -> None:
+        await run_cpu(self.index.close)
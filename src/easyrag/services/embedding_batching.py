@@ -0,0 +1,159 @@
+"""Length-bucketed embedding batches under a token budget."""
+import threading
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+
+TokenCounter = Callable[[List[str]], List[int]]
+
+
+def approximate_token_counts(texts: List[str]) -> List[int]:
+    """Estimate token counts at about four characters per token, plus special tokens."""
+    return [len(text) // 4 + 2 for text in texts]
+
+
+def tokenizer_token_counts(model) -> TokenCounter:
+    """
+    Count tokens with the tokenizer of a SentenceTransformer model.
+
+    Args:
+        model: SentenceTransformer model
+
+    Returns:
+        Function returning the token count of each text, capped at the model's max length
+    """
+    tokenizer = model.tokenizer
+    max_length = model.max_seq_length
+
+    def count(texts: List[str]) -> List[int]:
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=max_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    return count
+
+
+def plan_batches(lengths: Sequence[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    Group texts of similar length into batches that fit a token budget.
+
+    Texts are taken longest first, so every text in a batch is padded to the
+    length of its first one and the padded size of a batch is
+    ``len(batch) * lengths[batch[0]]``. The first batch is the largest
+    forward pass, so running out of memory shows up immediately.
+
+    Args:
+        lengths: Token count of each text
+        max_tokens: Maximum padded tokens per batch (a longer text gets a batch of its own)
+        max_items: Maximum texts per batch
+
+    Returns:
+        Batches of indices into ``lengths``
+    """
+    batches = []
+    current: List[int] = []
+    padded_length = 0
+    for index in np.argsort(-np.asarray(lengths), kind="stable"):
+        if current and ((len(current) + 1) * padded_length > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current = []
+        if not current:
+            padded_length = lengths[index]
+        current.append(int(index))
+    if current:
+        batches.append(current)
+    return batches
+
+
+def plan_documents(embeddings: Embeddings, texts: List[str]) -> List[List[int]]:
+    """
+    Split texts into the batches the embedding model should get one call each for.
+
+    Models that plan their own forward passes (see
+    BucketedEmbeddings.plan_documents) are asked for them; other texts are
+    cut into ``embed_max_batch_size`` slices in their original order.
+
+    Args:
+        embeddings: Embedding model (possibly wrapped)
+        texts: Texts to embed
+
+    Returns:
+        Batches of indices into ``texts``
+    """
+    planner = getattr(embeddings, "plan_documents", None)
+    if planner is not None:
+        return planner(texts)
+    size = settings.embed_max_batch_size
+    return [list(range(start, min(start + size, len(texts)))) for start in range(0, len(texts), size)]
+
+
+class BucketedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that sends length-bucketed batches to the model.
+
+    Chunks vary from short headers to full paragraphs. Sent in arrival order,
+    every batch is padded to its longest chunk, so most of the compute goes to
+    padding. Here the texts of a call are sorted by token count, cut into
+    batches under a padded-token budget and the vectors are returned in the
+    original order.
+
+    Callers that send each forward pass separately (to let queries in
+    between) get the same batches from plan_documents; a planned batch is
+    embedded in a single forward pass.
+    """
+
+    def __init__(self, embeddings: Embeddings, count_tokens: Optional[TokenCounter] = None,
+                 max_tokens: int = None, max_items: int = None):
+        self.embeddings = embeddings
+        self.count_tokens = count_tokens or approximate_token_counts
+        self.max_tokens = max_tokens or settings.embed_batch_tokens
+        self.max_items = max_items or settings.embed_max_batch_size
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+
+    def plan_documents(self, texts: List[str]) -> List[List[int]]:
+        """Get the length-bucketed forward passes embed_documents would make for the texts."""
+        return plan_batches(self.count_tokens(texts), self.max_tokens, self.max_items)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in length-bucketed batches, keeping the input order."""
+        if len(texts) <= 1:
+            return self.embeddings.embed_documents(texts)
+
+        lengths = self.count_tokens(texts)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        batches = plan_batches(lengths, self.max_tokens, self.max_items)
+        for batch in batches:
+            for index, vector in zip(batch, self.embeddings.embed_documents([texts[i] for i in batch])):
+                vectors[index] = vector
+
+        with self._lock:
+            self.batches += len(batches)
+            self.tokens += sum(lengths)
+            self.padded_tokens += sum(len(batch) * lengths[batch[0]] for batch in batches)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> dict:
+        """Get batch counts and the share of padded tokens that were real tokens."""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "tokens": self.tokens,
+                "padded_tokens": self.padded_tokens,
+                "padding_efficiency": self.tokens / self.padded_tokens if self.padded_tokens else 1.0,
+            }
@@ -0,0 +1,258 @@
+"""Persistent content-addressed cache for chunk embeddings."""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so insignificant differences map to the same cache key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    SQLite store of float32 embeddings keyed by (model name, normalized text hash).
+
+    Least recently used entries are evicted once the stored vectors exceed
+    ``max_bytes``. Safe to share between threads and, thanks to WAL mode,
+    between worker processes on the same host.
+    """
+
+    def __init__(self, path: str, model_name: str, max_bytes: int):
+        self.path = path
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._total_bytes = self._stored_bytes()
+
+    def key(self, text: str) -> bytes:
+        """Compute the cache key for a text under the current model."""
+        digest = hashlib.sha256(self.model_name.encode())
+        digest.update(b"\0")
+        digest.update(normalize_text(text).encode())
+        return digest.digest()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up embeddings by key, refreshing their LRU position.
+
+        Args:
+            keys: Cache keys to look up
+
+        Returns:
+            Mapping of found keys to their vectors
+        """
+        found: Dict[bytes, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            now = time.time()
+            for i in range(0, len(unique_keys), _SQL_BATCH):
+                batch = unique_keys[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [now, *(key for key, _ in rows)]
+                    )
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def contains_many(self, keys: Sequence[bytes]) -> Set[bytes]:
+        """
+        Check which keys are stored, without counting a lookup or refreshing their LRU position.
+
+        Args:
+            keys: Cache keys to check
+
+        Returns:
+            The stored keys
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        stored: Set[bytes] = set()
+        with self._lock:
+            for i in range(0, len(unique_keys), _SQL_BATCH):
+                batch = unique_keys[i:i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                )
+                stored.update(row[0] for row in rows)
+        return stored
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Store embeddings, evicting least recently used entries if over capacity.
+
+        Args:
+            keys: Cache keys
+            vectors: Embedding vector for each key
+        """
+        now = time.time()
+        # Of keys given twice, the last vector wins
+        blobs = {key: np.asarray(vector, dtype=np.float32).tobytes() for key, vector in zip(keys, vectors)}
+        rows = [(key, blob, len(blob), now) for key, blob in blobs.items()]
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                # Commits, or rolls back if the insert or the eviction fails
+                with self._conn:
+                    replaced_bytes = self._sizes_of(list(blobs))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)", rows
+                    )
+                    self._total_bytes += sum(len(blob) for blob in blobs.values()) - replaced_bytes
+                    if self._total_bytes > self.max_bytes:
+                        self._evict()
+            except BaseException:
+                self._total_bytes = self._stored_bytes()
+                raise
+
+    def _sizes_of(self, keys: List[bytes]) -> int:
+        """Total size of the stored entries among the keys."""
+        total = 0
+        for i in range(0, len(keys), _SQL_BATCH):
+            batch = keys[i:i + _SQL_BATCH]
+            total += self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchone()[0]
+        return total
+
+    def _evict(self) -> None:
+        """Evict least recently used entries down to 90% of capacity."""
+        # Other processes may have written to the same file, so re-count first
+        self._total_bytes = self._stored_bytes()
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT ?", (_SQL_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                victims.append(key)
+                self._total_bytes -= size
+            self._conn.execute(
+                f"DELETE FROM embeddings WHERE key IN ({','.join('?' * len(victims))})", victims
+            )
+            self.evictions += len(victims)
+        logger.info(f"Embedding cache evicted entries down to {self._total_bytes} bytes")
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and size of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends uncached document texts to the model.
+
+    Query embeddings pass straight through to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for unchanged texts."""
+        if not texts:
+            return []
+        keys = [self.cache.key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing.keys()), vectors)
+            for key, vector in zip(missing.keys(), vectors):
+                found[key] = np.asarray(vector, dtype=np.float32)
+
+        return [found[key].tolist() for key in keys]
+
+    def plan_documents(self, texts: List[str]) -> List[List[int]]:
+        """
+        Plan the model batches of the uncached texts (see embedding_batching.plan_documents).
+
+        Cached texts ride along with the first batch, as they need no forward pass.
+        """
+        from easyrag.services.embedding_batching import plan_documents
+
+        keys = [self.cache.key(text) for text in texts]
+        stored = self.cache.contains_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in stored]
+        cached = [i for i, key in enumerate(keys) if key in stored]
+        batches = [[missing[i] for i in batch] for batch in plan_documents(self.embeddings, [texts[i] for i in missing])]
+        if not batches:
+            return [cached] if cached else []
+        batches[0].extend(cached)
+        return batches
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query with the wrapped model."""
+        return self.embeddings.embed_query(text)
+
+
+def create_embedding_cache(path: Optional[str], model_name: str, max_mb: int) -> Optional[EmbeddingCache]:
+    """Create the embedding cache, or return None if caching is disabled."""
+    if not path:
+        return None
+    cache = EmbeddingCache(path, model_name, max_mb * 1024 * 1024)
+    logger.info(f"Using embedding cache at {path} ({cache.stats()['size_bytes']} bytes stored)")
+    return cache
@@ -0,0 +1,182 @@
+"""Local embedding server sharing one embedding model between worker processes.
+
+Run it once per host and point every uvicorn worker at the same socket::
+
+    export EMBEDDING_SERVER_AUTHKEY=$(openssl rand -hex 32)
+    python -m easyrag.services.embedding_server --socket /tmp/easyrag-embed.sock
+    EMBEDDING_SERVER_SOCKET=/tmp/easyrag-embed.sock uvicorn easyrag.main:app --workers 4
+
+Only the server process holds the model in memory, so RAM stays flat as
+workers are added. Requests are pickled, so the server only accepts clients
+that know ``EMBEDDING_SERVER_AUTHKEY`` and the socket is only accessible to
+its owner.
+"""
+import argparse
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def require_authkey(authkey: Optional[str]) -> bytes:
+    """
+    Check the shared secret of the embedding server.
+
+    Args:
+        authkey: Configured ``EMBEDDING_SERVER_AUTHKEY``
+
+    Returns:
+        The secret as bytes
+
+    Raises:
+        ValueError: If no secret is configured
+    """
+    if not authkey:
+        raise ValueError(
+            "EMBEDDING_SERVER_AUTHKEY must be set to a secret shared by the embedding server and its workers"
+        )
+    return authkey.encode()
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings client that forwards requests to the shared embedding server."""
+
+    def __init__(self, socket_path: str, authkey: Optional[str]):
+        self.socket_path = socket_path
+        self._authkey = require_authkey(authkey)
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self._authkey)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, op: str, texts: List[str]) -> np.ndarray:
+        """Send a request to the server, reconnecting once if the connection dropped."""
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send((op, texts))
+                status, payload = conn.recv()
+            except (EOFError, OSError):
+                try:
+                    conn.close()
+                except OSError:
+                    pass
+                self._local.conn = None
+                if attempt:
+                    raise
+                continue
+            if status != "ok":
+                raise RuntimeError(f"Embedding server error: {payload}")
+            return payload
+        raise RuntimeError("Embedding server unreachable")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents on the shared server."""
+        if not texts:
+            return []
+        return self._request("embed_documents", list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query on the shared server."""
+        return self._request("embed_query", [text])[0].tolist()
+
+
+class EmbeddingServer:
+    """Serves embedding requests from worker processes over a Unix socket."""
+
+    def __init__(self, embeddings: Embeddings, socket_path: str, authkey: Optional[str]):
+        self.embeddings = embeddings
+        self.socket_path = socket_path
+        self._authkey = require_authkey(authkey)
+        # One forward pass at a time; torch already parallelises inside a pass
+        self._model_lock = threading.Lock()
+
+    def _embed(self, op: str, texts: List[str]) -> np.ndarray:
+        with self._model_lock:
+            if op == "embed_query":
+                vectors = [self.embeddings.embed_query(texts[0])]
+            elif op == "embed_documents":
+                vectors = self.embeddings.embed_documents(texts)
+            else:
+                raise ValueError(f"Unknown operation: {op}")
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _handle(self, conn: Connection) -> None:
+        """Serve requests on a single worker connection until it closes."""
+        with conn:
+            while True:
+                try:
+                    op, texts = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self._embed(op, texts)))
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {str(e)}", exc_info=True)
+                    conn.send(("error", str(e)))
+
+    def serve_forever(self) -> None:
+        """Accept worker connections until interrupted."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        # Create the socket owner-only, so other local users cannot connect at all
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(self.socket_path, family="AF_UNIX", authkey=self._authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            os.chmod(self.socket_path, 0o600)
+            logger.info(f"Embedding server listening on {self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected embedding client connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+def main() -> None:
+    """Run the shared embedding server."""
+    from easyrag.services.embedding_service import create_local_embeddings
+
+    parser = argparse.ArgumentParser(description="Shared embedding server for Easy RAG workers")
+    parser.add_argument(
+        "--socket",
+        default=settings.embedding_server_socket or "/tmp/easyrag-embed.sock",
+        help="Unix socket path to listen on"
+    )
+    args = parser.parse_args()
+    if not settings.embedding_server_authkey:
+        parser.error("EMBEDDING_SERVER_AUTHKEY must be set to a secret shared with the workers")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    server = EmbeddingServer(create_local_embeddings(), args.socket, settings.embedding_server_authkey)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Embedding service providing a single shared embedding model per process."""
+import logging
+import threading
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+from easyrag.services.embedding_batching import BucketedEmbeddings, tokenizer_token_counts
+from easyrag.services.embedding_cache import CachedEmbeddings, EmbeddingCache, create_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+_embeddings: Optional[Embeddings] = None
+_cache: Optional[EmbeddingCache] = None
+_lock = threading.Lock()
+
+
+def configure_torch(model) -> None:
+    """
+    Apply the CPU inference settings to a loaded SentenceTransformer model.
+
+    Sets the torch thread count (``embed_threads``) and, with
+    ``embed_quantize``, replaces the model's linear layers with int8
+    dynamically quantized ones.
+
+    Args:
+        model: SentenceTransformer model
+    """
+    import torch
+
+    if settings.embed_threads > 0:
+        torch.set_num_threads(settings.embed_threads)
+    if settings.embed_quantize:
+        if model.device.type != "cpu":
+            logger.warning(f"Skipping int8 quantization: only supported on CPU, model is on {model.device}")
+            return
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        logger.info("Quantized embedding model linear layers to int8")
+    logger.info(f"Embedding model on {model.device} using {torch.get_num_threads()} threads")
+
+
+def create_local_embeddings() -> Embeddings:
+    """
+    Load the embedding model into the current process.
+
+    Unless ``embed_batch_tokens`` is 0, document batches are re-grouped by
+    token length under that budget before they reach the model.
+
+    Returns:
+        Embeddings instance for the configured model
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    logger.info(f"Loading embedding model {settings.embed_model}")
+    encode_kwargs = {}
+    if settings.embed_batch_tokens > 0:
+        # Each bucketed batch is encoded in a single forward pass
+        encode_kwargs["batch_size"] = settings.embed_max_batch_size
+    embeddings = HuggingFaceEmbeddings(
+        model_name=settings.embed_model,
+        model_kwargs={"trust_remote_code": True},
+        encode_kwargs=encode_kwargs,
+    )
+    model = embeddings._client
+    configure_torch(model)
+
+    if settings.embed_batch_tokens > 0:
+        return BucketedEmbeddings(embeddings, tokenizer_token_counts(model))
+    return embeddings
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Get the process-wide embedding model, creating it on first use.
+
+    If ``embedding_server_socket`` is configured, a client for the shared
+    embedding server is returned instead of loading the model locally.
+    Document embeddings go through the persistent embedding cache when
+    ``embedding_cache_path`` is set.
+
+    Returns:
+        Shared Embeddings instance
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                if settings.embedding_server_socket:
+                    from easyrag.services.embedding_server import RemoteEmbeddings
+                    embeddings = RemoteEmbeddings(
+                        settings.embedding_server_socket,
+                        authkey=settings.embedding_server_authkey
+                    )
+                    logger.info(f"Using shared embedding server at {settings.embedding_server_socket}")
+                else:
+                    embeddings = create_local_embeddings()
+                cache = get_embedding_cache()
+                if cache is not None:
+                    embeddings = CachedEmbeddings(embeddings, cache)
+                _embeddings = embeddings
+    return _embeddings
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the process-wide embedding cache, or None if caching is disabled."""
+    global _cache
+    if _cache is None and settings.embedding_cache_path:
+        # Quantized weights give slightly different vectors, so they get their own entries
+        model_name = f"{settings.embed_model}+int8" if settings.embed_quantize else settings.embed_model
+        _cache = create_embedding_cache(
+            settings.embedding_cache_path,
+            model_name,
+            settings.embedding_cache_max_mb
+        )
+    return _cache
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries in one forward pass.
+
+    The configured model encodes queries and documents identically, so the
+    batched document path is used. The embedding cache is bypassed to keep
+    query texts out of the chunk cache.
+
+    Args:
+        embeddings: Embedding model
+        texts: Query strings
+
+    Returns:
+        One embedding vector per query
+    """
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    return embeddings.embed_documents(texts)
+
+
+def is_loaded() -> bool:
+    """Check whether the shared embedding model has been created."""
+    return _embeddings is not None
+
+
+def embedding_batch_stats() -> Optional[dict]:
+    """
+    Get the length-bucketing statistics of the shared embedding model.
+
+    Returns:
+        BucketedEmbeddings.stats() of the model loaded in this process, or
+        None if it is not loaded, is remote or does not bucket batches
+    """
+    embeddings = _embeddings
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    if isinstance(embeddings, BucketedEmbeddings):
+        return embeddings.stats()
+    return None
@@ -0,0 +1,97 @@
+"""Bounded executors for running blocking work off the event loop."""
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from easyrag.config import settings
+from easyrag.services.admission import QUERY, get_embed_limiter, reset_limiters
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_embed_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_process_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_embed_executor() -> ThreadPoolExecutor:
+    """Get the executor used for embedding model forward passes."""
+    global _embed_executor
+    if _embed_executor is None:
+        _embed_executor = ThreadPoolExecutor(
+            max_workers=settings.embed_workers,
+            thread_name_prefix="easyrag-embed"
+        )
+    return _embed_executor
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Get the executor used for document parsing, chunking and embedded index calls."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=settings.cpu_workers,
+            thread_name_prefix="easyrag-cpu"
+        )
+    return _cpu_executor
+
+
+def get_process_executor() -> Executor:
+    """
+    Get the executor used for parsing and chunking document page ranges.
+
+    A process pool of ``parse_processes`` workers, so parsing several files
+    uses several cores. Workers are spawned rather than forked, as forking a
+    process with live gRPC channels is unsafe. Falls back to the CPU thread
+    executor when ``parse_processes`` is 0.
+    """
+    global _process_executor
+    if settings.parse_processes <= 0:
+        return get_cpu_executor()
+    if _process_executor is None:
+        _process_executor = ProcessPoolExecutor(
+            max_workers=settings.parse_processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Started {settings.parse_processes} parsing worker processes")
+    return _process_executor
+
+
+async def run_embedding(func: Callable[..., T], *args: Any, work: str = QUERY, **kwargs: Any) -> T:
+    """
+    Run an embedding call in the embedding executor.
+
+    Calls wait for a slot of the embedding limiter first, so queries run
+    before any waiting ingestion batch; pass ``work=INGEST`` for ingestion.
+    """
+    loop = asyncio.get_running_loop()
+    async with get_embed_limiter().slot(work):
+        return await loop.run_in_executor(get_embed_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound call (parsing, chunking, embedded index) in the CPU executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_process(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound call in the parsing process pool (func and arguments must be picklable)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """Shut down the executors, waiting for running work to finish."""
+    global _embed_executor, _cpu_executor, _process_executor
+    for executor in (_embed_executor, _cpu_executor, _process_executor):
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    _embed_executor = None
+    _cpu_executor = None
+    _process_executor = None
+    reset_limiters()
@@ -0,0 +1,258 @@
+"""Pipelined parse -> chunk -> embed -> upsert ingestion engine."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from easyrag.config import settings
+from easyrag.services.document_processor import DocumentProcessor, count_pages, fingerprint_file, is_pdf
+from easyrag.services.executors import run_cpu, run_process
+from easyrag.services.job_service import IngestionJob
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.vectorstore_service import VectorStoreService, build_payload, point_id_for
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = None
+
+# Stage queues and writers of the running pipelines, read by the queue depth gauges
+_running: List[Tuple[Dict[str, asyncio.Queue], BulkWriter]] = []
+
+
+def pipeline_queue_depths() -> Dict[str, int]:
+    """
+    Sum the queue depths of all running pipelines.
+
+    Returns:
+        Batches waiting in each inter-stage queue, and upserts in flight
+    """
+    depths = {"parsed": 0, "chunked": 0, "embedded": 0, "upserts_in_flight": 0}
+    for queues, writer in _running:
+        for name, queue in queues.items():
+            depths[name] += queue.qsize()
+        depths["upserts_in_flight"] += writer.in_flight
+    return depths
+
+
+class ParsedRange(NamedTuple):
+    """Chunks of one page range, as returned by a parsing worker."""
+    pages: int
+    chunks: List[Document]
+    point_ids: List[str]
+    parse_seconds: float
+    chunk_seconds: float
+
+
+def parse_and_chunk_range(document_processor: DocumentProcessor, file_path: str, source_name: str,
+                          start: int, stop: int) -> ParsedRange:
+    """
+    Parse and chunk pages [start, stop) of a document.
+
+    Runs in a parsing worker process, so it only takes and returns picklable
+    values.
+
+    Args:
+        document_processor: Processor whose splitter settings are used
+        file_path: Path to the document file
+        source_name: Name stored in the source metadata field
+        start: First page to parse
+        stop: Page after the last one to parse
+
+    Returns:
+        The range's chunks with their point IDs and stage timings
+    """
+    parse_start = time.perf_counter()
+    docs = document_processor.load_page_range(file_path, source_name, start, stop)
+    chunk_start = time.perf_counter()
+    chunks = document_processor.chunk_documents(docs)
+    point_ids = [point_id_for(chunk) for chunk in chunks]
+    return ParsedRange(
+        pages=len(docs),
+        chunks=chunks,
+        point_ids=point_ids,
+        parse_seconds=chunk_start - parse_start,
+        chunk_seconds=time.perf_counter() - chunk_start,
+    )
+
+
+class IngestionPipeline:
+    """
+    Runs the ingestion stages concurrently with bounded queues between them.
+
+    While batch N is being embedded, batch N+1 is parsed and chunked and
+    batch N-1 is upserted. Queue sizes bound how far any stage can run ahead,
+    which keeps memory proportional to ``batch_size``.
+
+    PDF parsing and chunking run in the shared worker process pool, one page
+    range of ``batch_size`` pages per task with up to ``parse_processes``
+    ranges of a file in flight, so several files (or one large PDF) use
+    several cores while all of them feed the same embedding executor. Text
+    files are streamed through the single-pass chunker instead, so files of
+    any size are indexed in bounded memory.
+
+    Re-indexing is incremental: chunks get deterministic point IDs, so chunks
+    already in the collection skip embedding and upserting, and points of the
+    previous version that no longer exist are deleted at the end. Runs for
+    the same source must not overlap, or each would delete the chunks the
+    other just indexed; JobManager runs them one at a time.
+    """
+
+    def __init__(self, document_processor: DocumentProcessor, vectorstore_service: VectorStoreService,
+                 queue_size: int = None, batch_size: int = None):
+        self.document_processor = document_processor
+        self.vectorstore_service = vectorstore_service
+        self.queue_size = queue_size or settings.pipeline_queue_size
+        self.batch_size = batch_size or settings.batch_size
+
+    async def run(self, file_path: str, job: IngestionJob, original_filename: Optional[str] = None,
+                  document_hash: Optional[str] = None) -> None:
+        """
+        Ingest a single file, updating the job's progress as batches complete.
+
+        Args:
+            file_path: Path to the document file (can be temporary)
+            job: Job receiving progress and timing updates
+            original_filename: Original filename from user upload (used in metadata)
+            document_hash: Content hash of the file (computed if not given)
+        """
+        source = self.document_processor.get_source_name(file_path, original_filename)
+        if document_hash is None:
+            document_hash = await run_cpu(fingerprint_file, file_path)
+
+        if await self.vectorstore_service.is_document_indexed(source, document_hash):
+            job.document_unchanged = True
+            job.chunks_unchanged = await self.vectorstore_service.count_source_points(source)
+            logger.info(f"Job {job.id}: {source} is unchanged, skipping ingestion")
+            return
+
+        existing_ids = await self.vectorstore_service.get_source_point_ids(source)
+        seen_ids: Set[str] = set()
+
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunked: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        writer = self.vectorstore_service.bulk_writer()
+        running = ({"parsed": parsed, "chunked": chunked, "embedded": embedded}, writer)
+        _running.append(running)
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._parse(file_path, source, job, parsed))
+                group.create_task(self._select_new(job, existing_ids, seen_ids, parsed, chunked))
+                group.create_task(self._embed(job, chunked, embedded))
+                group.create_task(self._upsert(job, writer, embedded))
+            # Consistency barrier: every chunk is searchable before stale ones are removed
+            await writer.flush()
+        except BaseException:
+            await writer.abort()
+            raise
+        finally:
+            _running.remove(running)
+        job.chunks_indexed = job.chunks_added = writer.points_written
+
+        stale_ids = existing_ids - seen_ids
+        await self.vectorstore_service.delete_points(stale_ids)
+        job.chunks_removed = len(stale_ids)
+        await self.vectorstore_service.mark_document_indexed(source, document_hash)
+        # Correct the optimistic point count kept by the upsert path
+        await self.vectorstore_service.refresh_collection_state()
+        logger.info(
+            f"Job {job.id}: {source} re-indexed with {job.chunks_added} added, "
+            f"{job.chunks_unchanged} unchanged and {job.chunks_removed} removed chunks"
+        )
+
+    async def _parse(self, file_path: str, source: str, job: IngestionJob, output: asyncio.Queue) -> None:
+        if is_pdf(file_path):
+            await self._parse_pdf(file_path, source, job, output)
+        else:
+            await self._parse_text(file_path, source, job, output)
+        await output.put(_DONE)
+
+    async def _parse_text(self, file_path: str, source: str, job: IngestionJob, output: asyncio.Queue) -> None:
+        # The chunker reads as it goes, so parsing and chunking are one stage here
+        batches = self.document_processor.iter_text_chunks(file_path, source, batch_size=self.batch_size)
+        while True:
+            start = time.perf_counter()
+            chunks = await run_cpu(next, batches, _DONE)
+            if chunks is _DONE:
+                break
+            point_ids = [point_id_for(chunk) for chunk in chunks]
+            job.record_stage("chunk", time.perf_counter() - start, len(chunks))
+            job.chunks_created += len(chunks)
+            await output.put(ParsedRange(
+                pages=0, chunks=chunks, point_ids=point_ids, parse_seconds=0.0, chunk_seconds=0.0
+            ))
+        job.pages_parsed += 1
+
+    async def _parse_pdf(self, file_path: str, source: str, job: IngestionJob, output: asyncio.Queue) -> None:
+        total_pages = await run_cpu(count_pages, file_path)
+        max_in_flight = settings.parse_processes or settings.cpu_workers
+        in_flight: deque = deque()
+
+        async def emit_oldest() -> None:
+            # Ranges are emitted in page order whatever order the workers finish in
+            parsed_range = await in_flight.popleft()
+            job.record_stage("parse", parsed_range.parse_seconds, parsed_range.pages)
+            job.record_stage("chunk", parsed_range.chunk_seconds, len(parsed_range.chunks))
+            job.pages_parsed += parsed_range.pages
+            job.chunks_created += len(parsed_range.chunks)
+            await output.put(parsed_range)
+
+        try:
+            for start in range(0, total_pages, self.batch_size):
+                in_flight.append(asyncio.ensure_future(run_process(
+                    parse_and_chunk_range, self.document_processor, file_path, source,
+                    start, start + self.batch_size,
+                )))
+                if len(in_flight) >= max_in_flight:
+                    await emit_oldest()
+            while in_flight:
+                await emit_oldest()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def _select_new(self, job: IngestionJob, existing_ids: Set[str], seen_ids: Set[str],
+                          input: asyncio.Queue, output: asyncio.Queue) -> None:
+        while (parsed_range := await input.get()) is not _DONE:
+            # Only chunks not already in the collection go on to be embedded
+            new_chunks = []
+            for chunk, point_id in zip(parsed_range.chunks, parsed_range.point_ids):
+                if point_id in existing_ids or point_id in seen_ids:
+                    job.chunks_unchanged += 1
+                else:
+                    new_chunks.append((chunk, point_id))
+                seen_ids.add(point_id)
+
+            # Re-slice so the embedding stage always sees batch_size-sized batches
+            for i in range(0, len(new_chunks), self.batch_size):
+                await output.put(new_chunks[i:i + self.batch_size])
+        await output.put(_DONE)
+
+    async def _embed(self, job: IngestionJob, input: asyncio.Queue, output: asyncio.Queue) -> None:
+        while (batch := await input.get()) is not _DONE:
+            chunks = [chunk for chunk, _ in batch]
+            # Busy time only: waiting for the model behind queries is not counted
+            timings: Dict[str, float] = {}
+            vectors = await self.vectorstore_service.embed_documents([doc.page_content for doc in chunks], timings)
+            job.record_stage("embed", timings["embed"], len(chunks))
+            job.chunks_embedded += len(chunks)
+            await output.put((batch, np.asarray(vectors, dtype=np.float32)))
+        await output.put(_DONE)
+
+    async def _upsert(self, job: IngestionJob, writer: BulkWriter, input: asyncio.Queue) -> None:
+        while (item := await input.get()) is not _DONE:
+            batch, vectors = item
+            start = time.perf_counter()
+            # Returns once the batch is in flight; acknowledgements are awaited by writer.flush()
+            await writer.write(
+                [point_id for _, point_id in batch], vectors, [build_payload(chunk) for chunk, _ in batch]
+            )
+            job.record_stage("upsert", time.perf_counter() - start, len(batch))
+            job.chunks_indexed = job.chunks_added = writer.points_written
+            logger.info(f"Job {job.id}: {writer.points_written} chunks indexed, {writer.in_flight} upserts in flight")
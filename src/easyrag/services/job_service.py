@@ -0,0 +1,251 @@
+"""Background ingestion job tracking."""
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from easyrag.config import settings
+from easyrag.services import metrics
+from easyrag.services.admission import INGEST, QUEUE_WAIT_SECONDS, REJECTED, OverloadedError
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ("parse", "chunk", "embed", "upsert")
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
+
+class IngestionJob:
+    """Progress and timing of a single background ingestion run."""
+
+    def __init__(self, filename: str, batch_id: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.batch_id = batch_id
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        # Progress counters
+        self.pages_parsed = 0
+        self.chunks_created = 0
+        self.chunks_embedded = 0
+        self.chunks_indexed = 0
+
+        # Incremental re-indexing outcome
+        self.document_unchanged = False
+        self.chunks_added = 0
+        self.chunks_unchanged = 0
+        self.chunks_removed = 0
+
+        # Busy time spent in each pipeline stage (excludes time waiting on queues)
+        self.stage_seconds: Dict[str, float] = {stage: 0.0 for stage in PIPELINE_STAGES}
+        self.stage_batches: Dict[str, int] = {stage: 0 for stage in PIPELINE_STAGES}
+
+    def record_stage(self, stage: str, seconds: float, items: int = 1) -> None:
+        """Record time spent processing one batch of items in a stage."""
+        self.stage_seconds[stage] += seconds
+        self.stage_batches[stage] += 1
+        metrics.record_stage(stage, seconds, items)
+
+    @property
+    def queued_seconds(self) -> float:
+        """Time the job waited for a free job slot."""
+        end = self.started_at if self.started_at is not None else (self.finished_at or time.time())
+        return end - self.created_at
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Wall-clock time since the job started running."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Indexing throughput over the job's running time."""
+        elapsed = self.elapsed_seconds
+        return self.chunks_indexed / elapsed if elapsed > 0 else 0.0
+
+
+def new_batch_id() -> str:
+    """Generate the ID grouping the jobs of a multi-file upload."""
+    return uuid.uuid4().hex
+
+
+def batch_status(jobs: List[IngestionJob]) -> str:
+    """
+    Summarize the status of a group of jobs.
+
+    Returns:
+        "queued" until a job starts, "running" while any job is unfinished,
+        then "completed" if every job completed and "failed" otherwise
+    """
+    statuses = {job.status for job in jobs}
+    if statuses <= {"queued"}:
+        return "queued"
+    if statuses & {"queued", "running"}:
+        return "running"
+    return "completed" if statuses == {"completed"} else "failed"
+
+
+class JobManager:
+    """
+    Runs ingestion jobs in the background and keeps their recent history.
+
+    Jobs for the same file name (the indexed source) run one at a time, in
+    submission order, so a re-upload waits for the upload it replaces.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = None, max_history: int = None, max_queued_jobs: int = None):
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.max_concurrent_jobs = max_concurrent_jobs or settings.max_concurrent_jobs
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        self._max_history = max_history or settings.job_history_size
+        self.max_queued_jobs = max_queued_jobs or settings.max_queued_jobs
+        # Queue places reserved by admit() for jobs that are not submitted yet
+        self._reserved = 0
+        # Lock of each source with unfinished jobs, and the number of those jobs
+        self._source_locks: Dict[str, asyncio.Lock] = {}
+        self._source_jobs: Dict[str, int] = {}
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by ID."""
+        return self._jobs.get(job_id)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Count the jobs in the history by status."""
+        counts = {status: 0 for status in JOB_STATUSES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def queued_count(self) -> int:
+        """Number of submitted jobs waiting for a job slot."""
+        return sum(1 for job_id in self._tasks if self._jobs[job_id].status == "queued")
+
+    def estimated_wait_seconds(self) -> int:
+        """Estimate when a job slot frees up, from the durations of recently completed jobs."""
+        durations = [job.elapsed_seconds for job in self._jobs.values() if job.status == "completed"]
+        if not durations:
+            return settings.retry_after_seconds
+        backlog = (self.queued_count() + self._reserved) / self.max_concurrent_jobs
+        return max(1, math.ceil(sum(durations) / len(durations) * max(backlog, 1.0)))
+
+    @contextmanager
+    def admit(self, count: int = 1) -> Iterator[None]:
+        """
+        Reserve queue places for jobs that are about to be submitted.
+
+        Uploads reserve their places before being spooled to disk, so a burst
+        of uploads cannot queue more than ``max_queued_jobs`` jobs.
+
+        Args:
+            count: Number of jobs
+
+        Raises:
+            OverloadedError: If the jobs would exceed ``max_queued_jobs``
+        """
+        queued = self.queued_count() + self._reserved
+        if queued + count > self.max_queued_jobs:
+            REJECTED.inc(resource="ingestion_jobs", work=INGEST)
+            raise OverloadedError(
+                f"{queued} ingestion jobs are already waiting; at most {self.max_queued_jobs} can be queued",
+                retry_after=self.estimated_wait_seconds(),
+            )
+        self._reserved += count
+        try:
+            yield
+        finally:
+            self._reserved -= count
+
+    def get_batch(self, batch_id: str) -> List[IngestionJob]:
+        """Get the jobs of a multi-file upload that are still in the history."""
+        return [job for job in self._jobs.values() if job.batch_id == batch_id]
+
+    def submit(self, job: IngestionJob, run: Callable[[IngestionJob], Awaitable[None]],
+               cleanup: Optional[Callable[[], None]] = None) -> IngestionJob:
+        """
+        Schedule a job to run in the background.
+
+        Args:
+            job: Job to track
+            run: Coroutine function performing the work, receives the job
+            cleanup: Optional callback run once the job finishes (e.g. removing temp files)
+
+        Returns:
+            The submitted job
+        """
+        self._jobs[job.id] = job
+        self._prune_history()
+        self._tasks[job.id] = asyncio.create_task(self._run(job, run, cleanup))
+        return job
+
+    async def _run(self, job: IngestionJob, run: Callable[[IngestionJob], Awaitable[None]],
+                   cleanup: Optional[Callable[[], None]]) -> None:
+        source_lock = self._source_locks.setdefault(job.filename, asyncio.Lock())
+        self._source_jobs[job.filename] = self._source_jobs.get(job.filename, 0) + 1
+        try:
+            # Waits for earlier jobs of the same source without holding a job slot
+            async with source_lock, self._semaphore:
+                job.status = "running"
+                job.started_at = time.time()
+                QUEUE_WAIT_SECONDS.observe(job.queued_seconds, resource="ingestion_jobs", work=INGEST)
+                logger.info(f"Starting ingestion job {job.id} for {job.filename}")
+                await run(job)
+                job.status = "completed"
+                logger.info(
+                    f"Job {job.id} indexed {job.chunks_indexed} chunks from {job.filename} "
+                    f"in {job.elapsed_seconds:.1f}s ({job.chunks_per_second:.1f} chunks/s)"
+                )
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = _error_message(e)
+            logger.error(f"Ingestion job {job.id} for {job.filename} failed: {job.error}", exc_info=True)
+        finally:
+            self._source_jobs[job.filename] -= 1
+            if not self._source_jobs[job.filename]:
+                del self._source_jobs[job.filename]
+                del self._source_locks[job.filename]
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+            if cleanup is not None:
+                cleanup()
+
+    def _prune_history(self) -> None:
+        """Drop the oldest finished jobs beyond the history limit."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self._max_history:
+                break
+            if job_id not in self._tasks:
+                del self._jobs[job_id]
+
+    async def wait(self, jobs: Iterable[IngestionJob]) -> None:
+        """Wait until the given jobs have finished."""
+        tasks = [self._tasks[job.id] for job in jobs if job.id in self._tasks]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs and wait for them to stop."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _error_message(error: BaseException) -> str:
+    """Unwrap exception groups raised by the pipeline task group."""
+    while isinstance(error, BaseExceptionGroup) and error.exceptions:
+        error = error.exceptions[0]
+    return str(error)
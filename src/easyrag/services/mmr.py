@@ -0,0 +1,45 @@
+"""Maximal marginal relevance (MMR) re-ranking of search candidates."""
+import numpy as np
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> np.ndarray:
+    """
+    Pick ``k`` candidates that are relevant to the query but not to each other.
+
+    Each step picks the candidate maximising
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to the picked ones``.
+    The candidate similarity matrix is computed with one matrix product and
+    each step updates the redundancy of every candidate at once, so the cost
+    is one ``n x n`` product plus ``k`` vector operations of length ``n``.
+
+    Args:
+        relevance: Similarity of each candidate to the query, best first
+        vectors: Candidate embeddings, one row per candidate (need not be normalized)
+        k: Candidates to pick
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    count = len(relevance)
+    k = min(k, count)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+    similarity = vectors @ vectors.T
+
+    selected = np.empty(k, dtype=np.int64)
+    selected[0] = int(np.argmax(relevance))
+    # Highest similarity of each candidate to the picked ones
+    redundancy = similarity[selected[0]].copy()
+    weighted_relevance = lambda_mult * relevance
+    for step in range(1, k):
+        scores = weighted_relevance - (1.0 - lambda_mult) * redundancy
+        scores[selected[:step]] = -np.inf
+        selected[step] = int(np.argmax(scores))
+        np.maximum(redundancy, similarity[selected[step]], out=redundancy)
+    return selected
@@ -0,0 +1,139 @@
+"""Dynamic micro-batching of concurrent query embeddings."""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+from easyrag.services.admission import OverloadedError
+from easyrag.services.embedding_service import embed_queries
+from easyrag.services.executors import run_embedding
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(OverloadedError):
+    """Raised when too many queries are already waiting to be embedded."""
+
+
+def fail_pending(requests: List[Tuple[str, asyncio.Future]], error: BaseException) -> None:
+    """Set ``error`` on the futures of the requests that were not answered yet."""
+    for _, future in requests:
+        if not future.done():
+            future.set_exception(error)
+
+
+class QueryEmbeddingBatcher:
+    """
+    Collects concurrent query embedding requests into batched forward passes.
+
+    A batch is sent to the model once ``max_batch_size`` queries are waiting
+    or ``window_ms`` milliseconds have passed since the first one arrived,
+    whichever comes first. Each caller awaits only its own vector.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = None,
+                 max_batch_size: int = None, max_queue_depth: int = None):
+        self.embeddings = embeddings
+        self.window = (window_ms if window_ms is not None else settings.query_batch_window_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.query_batch_max_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_depth or settings.query_batch_queue_depth)
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.queries = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of queries waiting to be batched."""
+        return self._queue.qsize()
+
+    async def embed(self, query: str) -> List[float]:
+        """
+        Embed a query as part of the next batch.
+
+        Args:
+            query: Query string
+
+        Returns:
+            Query embedding vector
+
+        Raises:
+            QueueFullError: If the queue already holds max_queue_depth queries
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((query, future))
+        except asyncio.QueueFull:
+            raise QueueFullError("Too many queries waiting to be embedded")
+        return await future
+
+    async def _collect(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Wait for the first request, then gather more into ``batch`` until the window closes or it is full."""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Take whatever else is already waiting, up to the batch limit
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self) -> None:
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = []
+            try:
+                await self._collect(batch)
+                batch = [(query, future) for query, future in batch if not future.done()]
+                if not batch:
+                    continue
+
+                texts = list(dict.fromkeys(query for query, _ in batch))
+                try:
+                    vectors = await run_embedding(embed_queries, self.embeddings, texts)
+                except Exception as e:
+                    logger.error(f"Query embedding batch of {len(texts)} failed: {str(e)}")
+                    fail_pending(batch, e)
+                    continue
+
+                self.batches += 1
+                self.queries += len(batch)
+                by_text = dict(zip(texts, vectors))
+                for query, future in batch:
+                    if not future.done():
+                        future.set_result(by_text[query])
+            finally:
+                # Cancellation or a BaseException must not leave /ask requests waiting forever
+                fail_pending(batch, RuntimeError("Query embedding worker stopped"))
+
+    def stats(self) -> dict:
+        """Get batching statistics."""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "average_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "queue_depth": self.queue_depth,
+        }
+
+    async def close(self) -> None:
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        queued = []
+        while not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        fail_pending(queued, RuntimeError("Query embedding worker stopped"))
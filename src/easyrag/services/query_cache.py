@@ -0,0 +1,103 @@
+"""In-process caches for query embeddings and search results."""
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+from easyrag.config import settings
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUTTLCache(Generic[V]):
+    """Least-recently-used cache whose entries also expire after a fixed time."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Get a value, or None if missing or expired."""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.maxsize,
+        }
+
+
+class QueryCache:
+    """
+    Two-level query cache.
+
+    Query vectors are keyed by query text alone. Search results are keyed by
+    (collection version, query, k, filters); the version is bumped on every
+    write to the collection, so cached results never outlive an upload.
+    """
+
+    def __init__(self):
+        self.vectors: LRUTTLCache[list] = LRUTTLCache(
+            settings.query_vector_cache_size, settings.query_vector_cache_ttl
+        )
+        self.results: LRUTTLCache[list] = LRUTTLCache(
+            settings.query_result_cache_size, settings.query_result_cache_ttl
+        )
+        self.collection_version = 0
+
+    def bump_version(self) -> None:
+        """Invalidate cached results after the collection changed."""
+        self.collection_version += 1
+        # Entries under older versions can never be hit again
+        self.results.clear()
+
+    def disable_results(self) -> None:
+        """Stop caching search results, for collections whose changes cannot all be detected."""
+        self.results.maxsize = 0
+        self.results.clear()
+
+    def results_key(self, query: str, k: int, filters: Any = None, rescore: bool = False,
+                    mmr_lambda: Optional[float] = None) -> tuple:
+        """Build the results cache key for a search."""
+        return (self.collection_version, query, k, filters, rescore, mmr_lambda)
+
+    def stats(self) -> dict:
+        """Get statistics for both cache levels."""
+        return {
+            "collection_version": self.collection_version,
+            "query_vectors": self.vectors.stats(),
+            "results": self.results.stats(),
+        }
@@ -0,0 +1,108 @@
+"""Startup warm-up and readiness state."""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from easyrag.config import settings
+from easyrag.services.executors import run_process
+from easyrag.services.vectorstore_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Startup progress reported by ``/ready`` and ``/metrics``.
+
+    Durations are measured from ``started_at``, the ``time.perf_counter()``
+    value taken when the application module started importing.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.import_seconds: Optional[float] = None
+        self.time_to_ready: Optional[float] = None
+        # Seconds per warm-up step of the successful attempt
+        self.warmup_seconds: Dict[str, float] = {}
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished and requests are served at full speed."""
+        return self.time_to_ready is not None
+
+    def record_import(self, started_at: float) -> None:
+        """Record how long importing the application took."""
+        self.started_at = started_at
+        self.import_seconds = time.perf_counter() - started_at
+
+    def mark_ready(self) -> None:
+        """Record that warm-up has finished."""
+        self.time_to_ready = time.perf_counter() - self.started_at
+        self.error = None
+
+
+def _start_parse_worker() -> int:
+    """Import the parsing code in a pool process so the first upload does not pay for it."""
+    import pymupdf  # noqa: F401
+    import easyrag.services.ingestion_pipeline  # noqa: F401
+
+    return os.getpid()
+
+
+async def start_parse_workers() -> float:
+    """
+    Start the parsing process pool.
+
+    Returns:
+        Seconds until every worker process had imported the parsing code
+    """
+    start = time.perf_counter()
+    if settings.parse_processes > 0:
+        pids = await asyncio.gather(*(run_process(_start_parse_worker) for _ in range(settings.parse_processes)))
+        logger.info(f"Started {len(set(pids))} parse worker processes")
+    return time.perf_counter() - start
+
+
+async def warm_up(vectorstore_service: VectorStoreService, readiness: Readiness, retry_seconds: float = None) -> None:
+    """
+    Warm up the model and the collection, retrying until it succeeds.
+
+    Qdrant or the embedding server may come up after the API, so a failed
+    attempt is logged, kept as ``readiness.error`` and retried. The parse
+    workers are started at the same time; only ingestion needs them, so
+    readiness does not wait for them.
+
+    Args:
+        vectorstore_service: Service whose model and collection to warm up
+        readiness: Readiness state to update
+        retry_seconds: Delay between attempts (defaults to config warmup_retry_seconds)
+    """
+    if retry_seconds is None:
+        retry_seconds = settings.warmup_retry_seconds
+
+    parse_workers = asyncio.create_task(start_parse_workers())
+    try:
+        while True:
+            readiness.attempts += 1
+            try:
+                readiness.warmup_seconds = await vectorstore_service.warm_up()
+                break
+            except Exception as e:
+                readiness.error = str(e)
+                logger.warning(f"Warm-up attempt {readiness.attempts} failed, retrying in {retry_seconds}s: {str(e)}")
+                await asyncio.sleep(retry_seconds)
+
+        readiness.mark_ready()
+        steps = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in readiness.warmup_seconds.items())
+        logger.info(f"Ready {readiness.time_to_ready:.2f}s after start (import {readiness.import_seconds or 0:.2f}s, {steps})")
+
+        try:
+            readiness.warmup_seconds["parse_workers"] = await parse_workers
+        except Exception as e:
+            logger.warning(f"Failed to start parse workers: {str(e)}")
+    finally:
+        parse_workers.cancel()
@@ -0,0 +1,348 @@
+"""Export and import collection snapshots: stored embeddings with their payloads."""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from easyrag.config import settings
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.executors import run_cpu
+from easyrag.services.vector_backend import PointBatch, VectorBackend
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
+
+# Size of the .npy header, fixed so it can be rewritten with the final shape
+NPY_HEADER_SIZE = 128
+
+SNAPSHOT_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def npy_header(dtype: np.dtype, shape: tuple) -> bytes:
+    """
+    Build a version 1.0 ``.npy`` header padded to ``NPY_HEADER_SIZE`` bytes.
+
+    Args:
+        dtype: Array element type
+        shape: Array shape
+
+    Returns:
+        Header bytes; the array data follows directly after them
+    """
+    header = repr({"descr": np.dtype(dtype).str, "fortran_order": False, "shape": tuple(shape)})
+    # Magic string, version and header length take 10 bytes; the header ends with a newline
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+class SnapshotWriter:
+    """
+    Writes points to a snapshot directory batch by batch.
+
+    Vectors are appended to ``vectors.npy`` after a placeholder header that
+    ``close`` rewrites with the final row count, and payloads to
+    ``payloads.jsonl`` (one ``{"id", "payload"}`` object per line, in the same
+    order), so only one batch is held in memory at a time.
+    """
+
+    def __init__(self, path: str, dimension: int, dtype: str = "float32"):
+        self.path = path
+        self.dimension = dimension
+        self.dtype = SNAPSHOT_DTYPES[dtype]
+        self.points = 0
+        os.makedirs(path)
+        self._vectors = open(os.path.join(path, VECTORS_FILE), "wb")
+        self._vectors.write(npy_header(self.dtype, (0, dimension)))
+        self._payloads = open(os.path.join(path, PAYLOADS_FILE), "w", encoding="utf-8")
+
+    def write(self, batch: PointBatch) -> None:
+        """Append a batch of points."""
+        if batch.vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {batch.vectors.shape[1]}")
+        self._vectors.write(np.ascontiguousarray(batch.vectors, dtype=self.dtype).tobytes())
+        self._payloads.writelines(
+            json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for point_id, payload in zip(batch.ids, batch.payloads)
+        )
+        self.points += len(batch.ids)
+
+    def close(self, manifest: dict) -> None:
+        """
+        Finish the vector file and write the manifest.
+
+        Args:
+            manifest: Manifest fields; the point count, dimension and dtype are added
+        """
+        self._vectors.seek(0)
+        self._vectors.write(npy_header(self.dtype, (self.points, self.dimension)))
+        self._vectors.close()
+        self._payloads.close()
+        manifest = {
+            **manifest,
+            "points": self.points,
+            "dimension": self.dimension,
+            "dtype": np.dtype(self.dtype).name,
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+    def abort(self) -> None:
+        """Close the files and remove the incomplete snapshot."""
+        self._vectors.close()
+        self._payloads.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SnapshotReader:
+    """Reads the points of a snapshot batch by batch, memory-mapping the vectors."""
+
+    def __init__(self, path: str):
+        self.manifest = read_manifest(path)
+        self._vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        if self._vectors.shape != (self.manifest["points"], self.manifest["dimension"]):
+            raise ValueError(f"{VECTORS_FILE} in {path} has shape {self._vectors.shape}, "
+                             f"the manifest expects {self.manifest['points']} points")
+        self._payloads = open(os.path.join(path, PAYLOADS_FILE), encoding="utf-8")
+        self._offset = 0
+
+    def read(self, batch_size: int) -> Optional[PointBatch]:
+        """
+        Read the next points.
+
+        Args:
+            batch_size: Maximum points to read
+
+        Returns:
+            The points as float32 embeddings, or None at the end of the snapshot
+        """
+        ids, payloads = [], []
+        for line in self._payloads:
+            point = json.loads(line)
+            ids.append(point["id"])
+            payloads.append(point["payload"])
+            if len(ids) == batch_size:
+                break
+        if not ids:
+            return None
+        end = self._offset + len(ids)
+        if end > len(self._vectors):
+            raise ValueError(f"{PAYLOADS_FILE} has more points than {VECTORS_FILE}")
+        vectors = np.asarray(self._vectors[self._offset:end], dtype=np.float32)
+        self._offset = end
+        return PointBatch(ids=ids, vectors=vectors, payloads=payloads)
+
+    def close(self) -> None:
+        """Close the snapshot files."""
+        self._payloads.close()
+        del self._vectors
+
+
+def read_manifest(path: str) -> dict:
+    """
+    Read the manifest of a snapshot.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        Manifest fields
+
+    Raises:
+        FileNotFoundError: If the directory is not a snapshot
+        ValueError: If the snapshot was written in an unknown format
+    """
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as file:
+        manifest = json.load(file)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} in {path}")
+    return manifest
+
+
+def list_snapshots(directory: str) -> List[dict]:
+    """
+    List the complete snapshots in a directory.
+
+    Args:
+        directory: Directory holding one subdirectory per snapshot
+
+    Returns:
+        Manifests with the snapshot ``name`` and ``size_bytes`` added, newest first
+    """
+    snapshots = []
+    if not os.path.isdir(directory):
+        return snapshots
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            manifest = read_manifest(path)
+        except (OSError, ValueError):
+            # In-progress exports and unrelated directories
+            continue
+        size = sum(os.path.getsize(os.path.join(path, file)) for file in (MANIFEST_FILE, VECTORS_FILE, PAYLOADS_FILE))
+        snapshots.append({**manifest, "name": name, "size_bytes": size})
+    snapshots.sort(key=lambda snapshot: snapshot["created_at"], reverse=True)
+    return snapshots
+
+
+async def export_snapshot(backend: VectorBackend, path: str, float16: bool = False, batch_size: int = None) -> dict:
+    """
+    Write every point of a collection to a snapshot directory.
+
+    Points are read in batches and each batch is written while the next one
+    is fetched. The snapshot is assembled in ``<path>.partial`` and renamed
+    once complete, so ``path`` only ever holds a finished snapshot.
+
+    Args:
+        backend: Backend of the collection to export
+        path: Snapshot directory to create
+        float16: Store the vectors as float16, halving the file size
+        batch_size: Points per read (defaults to config upsert_batch_size)
+
+    Returns:
+        Manifest of the snapshot
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot {path} already exists")
+    batch_size = batch_size or settings.upsert_batch_size
+    layout = backend.layout or await backend.open()
+
+    start = time.perf_counter()
+    partial_path = f"{path}.partial"
+    shutil.rmtree(partial_path, ignore_errors=True)
+    writer = await run_cpu(SnapshotWriter, partial_path, layout.embedding_size, "float16" if float16 else "float32")
+    pending = None
+    try:
+        async for batch in backend.iter_points(batch_size):
+            if pending is not None:
+                await pending
+            pending = asyncio.ensure_future(run_cpu(writer.write, batch))
+        if pending is not None:
+            await pending
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection": backend.collection_name,
+            "backend": backend.name,
+            "embed_model": settings.embed_model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        await run_cpu(writer.close, manifest)
+        os.replace(partial_path, path)
+    except BaseException:
+        if pending is not None and not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        await run_cpu(writer.abort)
+        raise
+
+    manifest = read_manifest(path)
+    logger.info(f"Exported {manifest['points']} points from {backend.collection_name} to {path} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+
+async def import_snapshot(path: str, backend: VectorBackend, batch_size: int = None) -> dict:
+    """
+    Load a snapshot into a new collection.
+
+    The collection is created under the configured layout profile with
+    deferred indexing, and the points are streamed in with the bulk writer
+    without re-embedding anything. If loading fails the collection is
+    deleted again.
+
+    Args:
+        path: Snapshot directory
+        backend: Backend of the collection to create; it must not exist yet
+        batch_size: Points per upsert (defaults to config upsert_batch_size)
+
+    Returns:
+        Manifest of the snapshot
+    """
+    if await backend.collection_exists():
+        raise ValueError(f"Collection {backend.collection_name} already exists")
+    batch_size = batch_size or settings.upsert_batch_size
+    reader = await run_cpu(SnapshotReader, path)
+    manifest = reader.manifest
+    if manifest["embed_model"] != settings.embed_model:
+        logger.warning(f"Snapshot {path} was embedded with {manifest['embed_model']} but the configured model "
+                       f"is {settings.embed_model}; queries will not match its vectors")
+
+    start = time.perf_counter()
+    await backend.create_collection(manifest["dimension"], bulk_load=True)
+    writer = BulkWriter(backend, batch_size=batch_size)
+    next_batch = None
+    try:
+        await backend.open()
+        # Read the next batch while the current one is queued for upserting
+        next_batch = asyncio.ensure_future(run_cpu(reader.read, batch_size))
+        while True:
+            batch = await next_batch
+            if batch is None:
+                break
+            next_batch = asyncio.ensure_future(run_cpu(reader.read, batch_size))
+            await writer.write(batch.ids, batch.vectors, batch.payloads)
+        await writer.flush()
+        await backend.end_bulk_load()
+        count = await backend.count()
+        if count != manifest["points"]:
+            raise RuntimeError(f"Loaded {count} points but {path} has {manifest['points']}")
+    except BaseException:
+        if next_batch is not None and not next_batch.done():
+            await asyncio.gather(next_batch, return_exceptions=True)
+        await writer.abort()
+        await backend.delete_collection()
+        raise
+    finally:
+        reader.close()
+
+    logger.info(f"Imported {manifest['points']} points from {path} into {backend.collection_name} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+
+async def restore_snapshot(path: str, backend: VectorBackend, batch_size: int = None, keep_old: bool = False) -> dict:
+    """
+    Replace a collection with the points of a snapshot.
+
+    The snapshot is loaded into a new versioned collection next to the live
+    one, which keeps serving searches meanwhile. Only once every point has
+    been loaded and counted does the new collection take the name of the
+    live one (a Qdrant alias switch, or a directory swap for the embedded
+    index) and the previous collection is dropped. If loading fails, the
+    live collection is left as it was.
+
+    Args:
+        path: Snapshot directory
+        backend: Backend of the collection to replace; it need not exist
+        batch_size: Points per upsert (defaults to config upsert_batch_size)
+        keep_old: Keep the previous collection instead of deleting it
+
+    Returns:
+        Manifest of the snapshot, with the ``loaded_collection`` the points
+        were loaded into and the ``previous_collection``
+    """
+    from easyrag.services.collection_migration import versioned_collection_name
+
+    if await backend.collection_exists():
+        # Fails before anything is loaded if the collection cannot be opened (an embedded index in use elsewhere)
+        await backend.open()
+    staged = backend.sibling(versioned_collection_name(backend.collection_name))
+    try:
+        manifest = await import_snapshot(path, staged, batch_size=batch_size)
+        try:
+            switched = await backend.replace_with(staged, keep_old=keep_old)
+        except BaseException:
+            await staged.delete_collection()
+            raise
+    finally:
+        await staged.close()
+    logger.info(f"Restored {path} into {backend.collection_name} (loaded as {staged.collection_name})")
+    return {**manifest, "loaded_collection": staged.collection_name, **switched}
@@ -0,0 +1,146 @@
+"""Streaming sliding-window text chunker for large text files."""
+import io
+from typing import Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from easyrag.config import settings
+
+# Same separator priority as the DocumentProcessor's RecursiveCharacterTextSplitter
+DEFAULT_SEPARATORS = ("\n\n\n", "\n\n", "\n", ". ", " ", "")
+
+# Characters read from the file at a time
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class StreamingTextSplitter:
+    """
+    Splits text into overlapping chunks in a single pass over a stream.
+
+    Follows ``RecursiveCharacterTextSplitter`` semantics: a chunk is at most
+    ``chunk_size`` characters and ends at the highest-priority separator
+    found within that window, so chunks hold as many whole paragraphs (or
+    lines, sentences, words) as fit. A separator starts the piece after it
+    and counts towards that piece's chunk; chunks are whitespace-stripped.
+    The next chunk repeats the last pieces of the previous one that fit in
+    ``chunk_overlap`` characters, as long as the piece after them still fits
+    in ``chunk_size``.
+
+    Unlike the recursive splitter, the text is never held in memory as a
+    whole and each separator is only searched for within the current window,
+    so memory stays at about ``READ_BLOCK_SIZE`` characters and time is
+    linear in the input size. Chunks and offsets are the same as the
+    recursive splitter's whenever the pieces of the highest-priority
+    separator in the text are shorter than ``chunk_size``; when a longer
+    piece is split further, the separator used within it is picked per
+    window rather than for the piece as a whole.
+    """
+
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS):
+        self.chunk_size = chunk_size or settings.chunk_size
+        self.chunk_overlap = settings.chunk_overlap if chunk_overlap is None else chunk_overlap
+        if self.chunk_overlap >= self.chunk_size:
+            raise ValueError(f"chunk_overlap ({self.chunk_overlap}) must be smaller than chunk_size ({self.chunk_size})")
+        self.separators = tuple(separators)
+        self._max_separator_length = max(len(separator) for separator in self.separators)
+
+    def split_stream(self, stream: TextIO) -> Iterator[Tuple[int, int, str]]:
+        """
+        Split a text stream into chunks.
+
+        Args:
+            stream: Text stream to read until exhausted
+
+        Yields:
+            Tuples of (start offset, end offset, chunk text); offsets are
+            character positions in the stream, end exclusive
+        """
+        buffer = ""
+        buffer_offset = 0  # Stream offset of buffer[0]
+        position = 0  # Start of the next chunk within buffer
+        eof = False
+        # A chunk is cut in the first chunk_size characters, and the overlap depends on the
+        # length of the piece after the cut; a separator may straddle either limit
+        window = 2 * self.chunk_size + self._max_separator_length
+
+        while True:
+            if not eof and len(buffer) - position < window:
+                # Compact only when refilling, so each character is copied a bounded number of times
+                block = stream.read(READ_BLOCK_SIZE)
+                eof = not block
+                buffer_offset += position
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+
+            remaining = len(buffer) - position
+            if remaining == 0:
+                return
+            if eof and remaining <= self.chunk_size:
+                cut, next_position = len(buffer), len(buffer)
+            else:
+                cut, next_position = self._find_cut(buffer, position)
+
+            chunk = self._strip(buffer, position, cut)
+            if chunk is not None:
+                start, end = chunk
+                yield buffer_offset + start, buffer_offset + end, buffer[start:end]
+            position = next_position
+
+    def _find_cut(self, buffer: str, position: int) -> Tuple[int, int]:
+        """
+        Find where the chunk starting at position ends and the next one starts.
+
+        Returns:
+            Tuple of (chunk end, next chunk start) positions in buffer
+        """
+        limit = position + self.chunk_size
+        for separator in self.separators:
+            if not separator:
+                # No separator in the window: hard cut, overlapping by exactly chunk_overlap
+                return limit, max(limit - self.chunk_overlap, position + 1)
+            # The chunk must not be empty; the separator after it may extend past the window
+            cut = buffer.rfind(separator, position + 1, limit + len(separator))
+            if cut == -1:
+                continue
+            return cut, self._overlap_start(buffer, position, cut, separator)
+        return limit, limit
+
+    def _overlap_start(self, buffer: str, position: int, cut: int, separator: str) -> int:
+        """Start the next chunk at the earliest piece of the finished chunk that may be repeated."""
+        if self.chunk_overlap == 0:
+            return cut
+        next_piece_end = buffer.find(separator, cut + 1)
+        if next_piece_end == -1:
+            next_piece_end = len(buffer)
+        # Repeated pieces fit in chunk_overlap, and together with the next piece in chunk_size
+        earliest = max(cut - self.chunk_overlap, next_piece_end - self.chunk_size, position)
+        found = buffer.find(separator, earliest, cut)
+        return cut if found == -1 else found
+
+    @staticmethod
+    def _strip(buffer: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """Get the bounds of buffer[start:end] without surrounding whitespace, or None if blank."""
+        while start < end and buffer[start].isspace():
+            start += 1
+        while end > start and buffer[end - 1].isspace():
+            end -= 1
+        return (start, end) if start < end else None
+
+    def split_file(self, file_path: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        Split a UTF-8 text file into chunks without loading it into memory.
+
+        Undecodable bytes are replaced rather than failing the whole file.
+
+        Args:
+            file_path: Path to the text file
+
+        Yields:
+            Tuples of (start offset, end offset, chunk text)
+        """
+        with open(file_path, encoding="utf-8", errors="replace") as stream:
+            yield from self.split_stream(stream)
+
+    def split_text(self, text: str) -> List[str]:
+        """Split an in-memory string, for comparison with other splitters."""
+        return [chunk for _, _, chunk in self.split_stream(io.StringIO(text))]
@@ -0,0 +1,493 @@
+"""Storage backends behind VectorStoreService: remote Qdrant or the embedded index."""
+import logging
+import math
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Set
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Batch, Filter, FilterSelector, PointIdsList, Prefetch, QueryRequest
+
+from easyrag.config import settings
+from easyrag.services.collection_profile import (
+    DEFAULT_INDEXING_THRESHOLD, FULL_VECTOR_NAME, SEARCH_VECTOR_NAME, VectorLayout, build_optimizers_config,
+    build_search_params, collection_vector_layout, create_collection_kwargs, missing_payload_indexes
+)
+
+logger = logging.getLogger(__name__)
+
+# Point that never exists; deleting it with wait=True acts as a write barrier
+BARRIER_POINT_ID = str(uuid.UUID(int=0))
+
+# Points fetched per scroll request
+SCROLL_BATCH_SIZE = 1000
+
+# Collection metadata key of the marker published after writes (see VectorBackend.write_marker)
+WRITE_MARKER_KEY = "easyrag_write_marker"
+# First Qdrant server version that stores collection metadata
+WRITE_MARKER_MIN_QDRANT_VERSION = (1, 16)
+
+
+class SearchRequest(NamedTuple):
+    """One nearest-neighbour search."""
+    vector: List[float]
+    k: int
+    query_filter: Optional[Filter] = None
+    # Re-rank truncated-vector candidates by their full embeddings
+    rescore: bool = False
+    # Return the most complete stored embedding of each hit (see embedding_of)
+    with_vectors: bool = False
+
+
+class SearchHit(NamedTuple):
+    """A search result, with the same attributes as a Qdrant ScoredPoint."""
+    id: str
+    score: float
+    payload: dict
+    vector: Optional[np.ndarray] = None
+
+
+class CollectionStatus(NamedTuple):
+    """Point count and write marker of a collection, read together."""
+    points_count: int
+    write_marker: Optional[str]
+
+
+class PointBatch(NamedTuple):
+    """Consecutive points read from a collection."""
+    ids: List[str]
+    # Most complete embedding stored for each point, one row per point
+    vectors: np.ndarray
+    payloads: List[dict]
+
+
+def embedding_of(vector) -> list:
+    """Get the most complete embedding stored for a scrolled Qdrant point."""
+    if isinstance(vector, dict):
+        return vector.get(FULL_VECTOR_NAME) or vector[SEARCH_VECTOR_NAME]
+    return vector
+
+
+class VectorBackend(ABC):
+    """
+    Storage of the points of one collection.
+
+    Vectors are passed as full embeddings; the backend stores them in its
+    collection's ``VectorLayout``. Filters are Qdrant ``Filter`` models, as
+    built by ``search_filter`` and ``source_filter``.
+    """
+
+    name = "backend"
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        # Set by open()
+        self.layout: Optional[VectorLayout] = None
+
+    @abstractmethod
+    async def collection_exists(self) -> bool:
+        """Whether the collection exists."""
+
+    @abstractmethod
+    async def create_collection(self, embedding_size: int, bulk_load: bool = False) -> None:
+        """
+        Create the collection under the configured layout profile.
+
+        Args:
+            embedding_size: Embedding dimension of the model
+            bulk_load: Defer index building until end_bulk_load is called
+        """
+
+    async def end_bulk_load(self) -> None:
+        """Build the indexes deferred by ``create_collection(bulk_load=True)``."""
+
+    @abstractmethod
+    async def open(self) -> VectorLayout:
+        """Prepare an existing collection for use and detect its vector layout."""
+
+    @abstractmethod
+    async def delete_collection(self) -> None:
+        """Delete the collection and all of its points."""
+
+    async def physical_collection(self) -> str:
+        """Name of the collection currently served under this collection's name."""
+        return self.collection_name
+
+    @abstractmethod
+    def sibling(self, collection_name: str) -> "VectorBackend":
+        """Get a backend of the same kind and storage for another collection."""
+
+    @abstractmethod
+    async def replace_with(self, staged: "VectorBackend", keep_old: bool = False) -> dict:
+        """
+        Serve the points of a complete sibling collection under this collection's name.
+
+        The previous points stay searchable until the switch. Call open()
+        again afterwards to pick up the layout of the new points.
+
+        Args:
+            staged: Sibling backend (see sibling()) holding the new points
+            keep_old: Keep the previous points in a collection of their own
+
+        Returns:
+            The previous physical collection (None if there was none) and whether it was deleted
+        """
+
+    @abstractmethod
+    async def points_count(self) -> int:
+        """Number of points in the collection (may be approximate)."""
+
+    async def supports_write_markers(self) -> bool:
+        """Whether write markers are stored, so other processes can notice writes that keep the point count."""
+        return False
+
+    async def status(self) -> CollectionStatus:
+        """Get the point count and the write marker, with as few backend calls as possible."""
+        return CollectionStatus(await self.points_count(), await self.write_marker())
+
+    async def write_marker(self) -> Optional[str]:
+        """
+        Get the marker last published with publish_write_marker.
+
+        Processes sharing the collection compare it between refreshes to
+        notice writes made by the others.
+
+        Returns:
+            The marker, or None if none was published or the backend keeps none
+        """
+        return None
+
+    async def publish_write_marker(self, marker: str) -> None:
+        """Store a new write marker on the collection (see write_marker)."""
+
+    @abstractmethod
+    async def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict], wait: bool = True) -> None:
+        """
+        Insert or replace points.
+
+        Args:
+            ids: Point IDs
+            vectors: Embedding matrix with one row per point
+            payloads: Payload for each point
+            wait: Return only once the points are searchable (see barrier)
+        """
+
+    @abstractmethod
+    async def barrier(self) -> None:
+        """Wait until every upsert sent with ``wait=False`` is searchable."""
+
+    @abstractmethod
+    async def delete(self, ids: List[str]) -> None:
+        """Delete points by ID."""
+
+    @abstractmethod
+    async def delete_by_filter(self, query_filter: Filter) -> None:
+        """Delete all points matching a filter."""
+
+    @abstractmethod
+    async def count(self, query_filter: Optional[Filter] = None) -> int:
+        """Count the points matching a filter exactly."""
+
+    @abstractmethod
+    async def scroll_ids(self, query_filter: Optional[Filter] = None) -> Set[str]:
+        """Get the IDs of all points matching a filter."""
+
+    @abstractmethod
+    async def set_payload(self, query_filter: Filter, key: str, payload: dict) -> None:
+        """
+        Set payload values on all points matching a filter.
+
+        Args:
+            query_filter: Points to update
+            key: Payload object to set the values in
+            payload: Values to set
+        """
+
+    @abstractmethod
+    def iter_points(self, batch_size: int) -> AsyncIterator[PointBatch]:
+        """
+        Read every point with its embedding and payload, one batch at a time.
+
+        Points written while iterating may or may not be included.
+
+        Args:
+            batch_size: Points per batch
+        """
+
+    @abstractmethod
+    async def search(self, requests: List[SearchRequest]) -> List[List[Any]]:
+        """
+        Run nearest-neighbour searches.
+
+        Args:
+            requests: Searches to run
+
+        Returns:
+            For each request, hits with ``id``, ``score``, ``payload`` and
+            ``vector`` (None unless requested with ``with_vectors``), best first
+        """
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class QdrantBackend(VectorBackend):
+    """Collection on a Qdrant server, accessed through the async gRPC client."""
+
+    name = "qdrant"
+
+    def __init__(self, client: AsyncQdrantClient, collection_name: str):
+        super().__init__(collection_name)
+        self.client = client
+        self._write_markers: Optional[bool] = None
+
+    async def collection_exists(self) -> bool:
+        return await self.client.collection_exists(self.collection_name)
+
+    async def create_collection(self, embedding_size: int, bulk_load: bool = False) -> None:
+        indexing_threshold = settings.bulk_load_indexing_threshold if bulk_load else None
+        await self.client.create_collection(
+            collection_name=self.collection_name,
+            **create_collection_kwargs(embedding_size, indexing_threshold=indexing_threshold)
+        )
+
+    async def end_bulk_load(self) -> None:
+        indexing_threshold = settings.indexing_threshold
+        if indexing_threshold is None:
+            indexing_threshold = DEFAULT_INDEXING_THRESHOLD
+        await self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizers_config=build_optimizers_config(indexing_threshold),
+        )
+
+    async def open(self) -> VectorLayout:
+        info = await self.client.get_collection(self.collection_name)
+        self.layout = collection_vector_layout(info)
+        # Index source and page so filtered searches and deletes stay fast
+        for field, schema in missing_payload_indexes(info).items():
+            logger.info(f"Creating {schema.value} payload index on {field} in {self.collection_name}")
+            await self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field,
+                field_schema=schema,
+                wait=True,
+            )
+        return self.layout
+
+    async def delete_collection(self) -> None:
+        from easyrag.services.collection_migration import resolve_collection
+
+        # Deleting an alias would leave its collection in place; its aliases go with the collection
+        await self.client.delete_collection(await resolve_collection(self.client, self.collection_name))
+        self.layout = None
+
+    async def physical_collection(self) -> str:
+        from easyrag.services.collection_migration import resolve_collection
+
+        return await resolve_collection(self.client, self.collection_name)
+
+    def sibling(self, collection_name: str) -> "QdrantBackend":
+        return QdrantBackend(self.client, collection_name)
+
+    async def replace_with(self, staged: VectorBackend, keep_old: bool = False) -> dict:
+        from easyrag.services.collection_migration import switch_alias
+
+        # The collection name becomes an alias of the staged collection, as after a migration
+        switched = await switch_alias(self.client, self.collection_name, staged.collection_name, keep_old=keep_old)
+        self.layout = None
+        return switched
+
+    async def points_count(self) -> int:
+        info = await self.client.get_collection(self.collection_name)
+        return info.points_count or 0
+
+    async def write_marker(self) -> Optional[str]:
+        return (await self.status()).write_marker
+
+    async def status(self) -> CollectionStatus:
+        info = await self.client.get_collection(self.collection_name)
+        marker = (getattr(info.config, "metadata", None) or {}).get(WRITE_MARKER_KEY)
+        return CollectionStatus(info.points_count or 0, marker)
+
+    async def supports_write_markers(self) -> bool:
+        if self._write_markers is None:
+            # Older servers ignore collection metadata instead of rejecting it
+            try:
+                version = (await self.client.info()).version
+                self._write_markers = tuple(int(part) for part in version.lstrip("v").split(".")[:2]) >= \
+                    WRITE_MARKER_MIN_QDRANT_VERSION
+            except Exception as e:
+                logger.warning(f"Could not read the Qdrant server version: {str(e)}")
+                self._write_markers = False
+            if not self._write_markers:
+                logger.warning(
+                    f"Qdrant server is older than {'.'.join(map(str, WRITE_MARKER_MIN_QDRANT_VERSION))} and keeps "
+                    f"no collection metadata, so writes by other processes cannot be detected"
+                )
+        return self._write_markers
+
+    async def publish_write_marker(self, marker: str) -> None:
+        if not await self.supports_write_markers():
+            return
+        try:
+            await self.client.update_collection(self.collection_name, metadata={WRITE_MARKER_KEY: marker})
+        except Exception as e:
+            logger.warning(f"Could not publish the write marker of {self.collection_name}, "
+                           f"writes by other processes can no longer be detected: {str(e)}")
+            self._write_markers = False
+
+    async def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict], wait: bool = True) -> None:
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=Batch(ids=ids, vectors=self.layout.point_vectors(vectors), payloads=payloads),
+            wait=wait,
+        )
+
+    async def barrier(self) -> None:
+        # Qdrant applies a wait=True update after all earlier ones
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=[BARRIER_POINT_ID]),
+            wait=True,
+        )
+
+    async def delete(self, ids: List[str]) -> None:
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=ids),
+        )
+
+    async def delete_by_filter(self, query_filter: Filter) -> None:
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=query_filter),
+            wait=True,
+        )
+
+    async def count(self, query_filter: Optional[Filter] = None) -> int:
+        result = await self.client.count(
+            collection_name=self.collection_name,
+            count_filter=query_filter,
+            exact=True,
+        )
+        return result.count
+
+    async def scroll_ids(self, query_filter: Optional[Filter] = None) -> Set[str]:
+        point_ids: Set[str] = set()
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=query_filter,
+                limit=SCROLL_BATCH_SIZE,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            point_ids.update(str(point.id) for point in points)
+            if offset is None:
+                return point_ids
+
+    async def set_payload(self, query_filter: Filter, key: str, payload: dict) -> None:
+        await self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            key=key,
+            points=FilterSelector(filter=query_filter),
+        )
+
+    async def iter_points(self, batch_size: int) -> AsyncIterator[PointBatch]:
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                yield PointBatch(
+                    ids=[str(point.id) for point in points],
+                    vectors=np.asarray([embedding_of(point.vector) for point in points], dtype=np.float32),
+                    payloads=[point.payload for point in points],
+                )
+            if offset is None:
+                return
+
+    def query_request(self, request: SearchRequest) -> QueryRequest:
+        """
+        Build the Qdrant query for one search.
+
+        With truncated vectors and ``rescore``, HNSW on the truncated vector
+        fetches ``k * rescore_oversampling`` candidates, which are re-ranked by
+        their full embeddings.
+
+        Args:
+            request: Search to translate
+        """
+        search_vector = self.layout.search_vector(request.vector)
+        # Only the full embedding when both are stored
+        with_vector = request.with_vectors and ([FULL_VECTOR_NAME] if self.layout.can_rescore else True)
+        if not (request.rescore and self.layout.can_rescore):
+            return QueryRequest(
+                query=search_vector,
+                filter=request.query_filter,
+                limit=request.k,
+                params=build_search_params(),
+                with_vector=with_vector,
+                with_payload=True,
+            )
+        return QueryRequest(
+            prefetch=Prefetch(
+                query=search_vector,
+                filter=request.query_filter,
+                limit=math.ceil(request.k * settings.rescore_oversampling),
+                params=build_search_params(),
+            ),
+            query=request.vector,
+            using=FULL_VECTOR_NAME,
+            limit=request.k,
+            with_vector=with_vector,
+            with_payload=True,
+        )
+
+    async def search(self, requests: List[SearchRequest]) -> List[List[Any]]:
+        if len(requests) == 1:
+            query = self.query_request(requests[0])
+            response = await self.client.query_points(
+                collection_name=self.collection_name,
+                query=query.query,
+                using=query.using,
+                prefetch=query.prefetch,
+                query_filter=query.filter,
+                limit=query.limit,
+                search_params=query.params,
+                with_payload=True,
+                with_vectors=query.with_vector,
+            )
+            return [response.points]
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[self.query_request(request) for request in requests],
+        )
+        return [response.points for response in responses]
+
+
+def create_backend(collection_name: str, async_client: Optional[AsyncQdrantClient] = None) -> VectorBackend:
+    """
+    Create the configured backend for a collection.
+
+    Args:
+        collection_name: Collection to store points in
+        async_client: Qdrant client (required for the qdrant backend)
+
+    Returns:
+        Backend instance; call open() or create_collection() before use
+    """
+    if settings.vector_backend == "embedded":
+        from easyrag.services.embedded_index import EmbeddedBackend
+
+        return EmbeddedBackend(collection_name)
+    return QdrantBackend(async_client, collection_name)
@@ -1,30 +1,168 @@
-"""Vectorstore service for managing Qdrant vector database."""
+"""Vectorstore service for managing the vector database (Qdrant or the embedded index)."""
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List
-from langchain_qdrant import QdrantVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, List, Set, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient, AsyncQdrantClient
+import numpy as np
+from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue, Range
 
 from easyrag.config import settings
+from easyrag.services.admission import INGEST, QUERY, get_backend_limiter
+from easyrag.services.embedding_batching import plan_documents
+from easyrag.services.embedding_service import get_embeddings, embed_queries
+from easyrag.services.executors import run_embedding
+from easyrag.services.bulk_writer import BulkWriter
+from easyrag.services.collection_profile import (
+    VectorLayout, create_collection_kwargs, missing_payload_indexes, new_vector_layout
+)
+from easyrag.services.collection_state import CollectionState
+from easyrag.services.metrics import stage_timer
+from easyrag.services.mmr import mmr_select
+from easyrag.services.query_batcher import QueryEmbeddingBatcher
+from easyrag.services.query_cache import QueryCache
+from easyrag.services.vector_backend import SearchRequest, VectorBackend, create_backend, embedding_of
+
+if TYPE_CHECKING:
+    # Only the synchronous LangChain path needs it, and it pulls in most of langchain_core
+    from langchain_qdrant import QdrantVectorStore
 
 logger = logging.getLogger(__name__)
 
+# Payload keys shared with langchain_qdrant.QdrantVectorStore
+CONTENT_PAYLOAD_KEY = "page_content"
+METADATA_PAYLOAD_KEY = "metadata"
+
+# Namespace for deterministic chunk point IDs
+POINT_ID_NAMESPACE = uuid.UUID("6f1d3c1e-6a51-4f0c-9a8e-2f5d0b7c4e21")
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Call func, returning its result and the seconds it took."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def point_id_for(document: Document) -> str:
+    """
+    Compute the deterministic point ID of a chunk.
+
+    The ID is derived from the chunk's source, page, offset within the page and
+    text hash, so re-indexing an unchanged chunk produces the same point.
+
+    Args:
+        document: Chunk document
+
+    Returns:
+        UUID string
+    """
+    metadata = document.metadata
+    text_hash = hashlib.sha256(document.page_content.encode()).hexdigest()
+    name = f"{metadata.get('source')}|{metadata.get('page')}|{metadata.get('start_index')}|{text_hash}"
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, name))
+
+
+def build_payload(document: Document) -> dict:
+    """
+    Build the compact point payload of a chunk.
+
+    Uses the LangChain QdrantVectorStore layout so its retrievers can read the
+    points, but leaves out empty metadata values.
+
+    Args:
+        document: Chunk document
+
+    Returns:
+        Point payload
+    """
+    return {
+        CONTENT_PAYLOAD_KEY: document.page_content,
+        METADATA_PAYLOAD_KEY: {key: value for key, value in document.metadata.items() if value is not None},
+    }
+
+
+def source_filter(source: str) -> Filter:
+    """Build a filter matching all chunks of a source document."""
+    return Filter(must=[FieldCondition(key=f"{METADATA_PAYLOAD_KEY}.source", match=MatchValue(value=source))])
+
+
+def search_filter(sources: Optional[List[str]] = None, page_from: Optional[int] = None,
+                  page_to: Optional[int] = None) -> Optional[Filter]:
+    """
+    Build a filter restricting a search to some sources and/or a page range.
+
+    Args:
+        sources: Source document names to search in
+        page_from: First page to include
+        page_to: Last page to include
+
+    Returns:
+        Filter, or None if no restriction was given
+    """
+    conditions = []
+    if sources:
+        conditions.append(FieldCondition(key=f"{METADATA_PAYLOAD_KEY}.source", match=MatchAny(any=sources)))
+    if page_from is not None or page_to is not None:
+        conditions.append(FieldCondition(key=f"{METADATA_PAYLOAD_KEY}.page", range=Range(gte=page_from, lte=page_to)))
+    return Filter(must=conditions) if conditions else None
+
+
+def filter_cache_key(query_filter: Optional[Filter]) -> Optional[str]:
+    """Get a hashable representation of a search filter for the results cache."""
+    return query_filter.model_dump_json(exclude_none=True) if query_filter is not None else None
+
 
 class VectorStoreService:
-    """Service for managing the Qdrant vectorstore."""
-    
-    def __init__(self):
-        self._vectorstore: Optional[QdrantVectorStore] = None
+    """Service for managing the vectorstore through the configured backend."""
+
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        self._vectorstore: Optional["QdrantVectorStore"] = None
         self._client: Optional[QdrantClient] = None
-        self._embeddings = HuggingFaceEmbeddings(
-            model_name=settings.embed_model,
-            model_kwargs={"trust_remote_code": True}
-        )
-    
+        self._async_client: Optional[AsyncQdrantClient] = None
+        self._backend: Optional[VectorBackend] = None
+        self._collection_ready = False
+        self._collection_lock = asyncio.Lock()
+        # Detected when the collection is first used
+        self.vector_layout: Optional[VectorLayout] = None
+        # Collection behind the collection name when the layout was detected
+        self._physical_collection: Optional[str] = None
+        self._embeddings = embeddings
+        self.query_cache = QueryCache()
+        self._query_batcher: Optional[QueryEmbeddingBatcher] = None
+        self.collection_state = CollectionState()
+        self._state_refresher: Optional[asyncio.Task] = None
+        self._state_refresh_lock = asyncio.Lock()
+        # Last write marker seen on the collection or published by this process
+        self._write_marker: Optional[str] = None
+        # Writes made since the last published marker
+        self._unpublished_writes = False
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Get the embedding model, using the shared process-wide instance by default."""
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    @property
+    def query_batcher(self) -> QueryEmbeddingBatcher:
+        """Get or create the micro-batcher for query embeddings."""
+        if self._query_batcher is None:
+            self._query_batcher = QueryEmbeddingBatcher(self.embeddings)
+        return self._query_batcher
+
+    def query_batcher_stats(self) -> Optional[dict]:
+        """Get query batching statistics, or None if no query has been batched yet."""
+        return self._query_batcher.stats() if self._query_batcher is not None else None
+
     @property
     def client(self) -> QdrantClient:
-        """Get or create Qdrant client using gRPC."""
+        """Get or create synchronous Qdrant client using gRPC (used by LangChain integrations)."""
         if self._client is None:
             self._client = QdrantClient(
                 host=settings.qdrant_host,
@@ -33,112 +171,727 @@ class VectorStoreService:
             )
             logger.info(f"Initialized Qdrant client using gRPC at {settings.qdrant_host}:{settings.qdrant_grpc_port}")
         return self._client
-    
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """Get or create asynchronous Qdrant client using gRPC (used by the API request path)."""
+        if self._async_client is None:
+            self._async_client = AsyncQdrantClient(
+                host=settings.qdrant_host,
+                port=settings.qdrant_grpc_port,
+                prefer_grpc=True
+            )
+            logger.info(f"Initialized async Qdrant client using gRPC at {settings.qdrant_host}:{settings.qdrant_grpc_port}")
+        return self._async_client
+
     @property
-    def vectorstore(self) -> QdrantVectorStore:
-        """Get or create vectorstore instance."""
+    def backend(self) -> VectorBackend:
+        """Get or create the storage backend of the configured collection (see ``vector_backend``)."""
+        if self._backend is None:
+            self._backend = create_backend(
+                settings.collection_name,
+                self.async_client if settings.vector_backend == "qdrant" else None,
+            )
+        return self._backend
+
+    @property
+    def vectorstore(self) -> "QdrantVectorStore":
+        """Get or create LangChain vectorstore instance."""
         if self._vectorstore is None:
-            self._ensure_collection_exists()
+            from langchain_qdrant import QdrantVectorStore
+
+            self._ensure_collection_exists_sync()
             self._vectorstore = QdrantVectorStore(
                 client=self.client,
                 collection_name=settings.collection_name,
-                embedding=self._embeddings,
+                embedding=self.embeddings,
             )
         return self._vectorstore
-    
-    def _ensure_collection_exists(self) -> None:
-        """Ensure the Qdrant collection exists, create if missing."""
-        collections = self.client.get_collections().collections
-        collection_names = [c.name for c in collections]
-        
-        if settings.collection_name not in collection_names:
+
+    def _ensure_collection_exists_sync(self) -> None:
+        """Ensure the Qdrant collection exists using the synchronous client."""
+        if not self.client.collection_exists(settings.collection_name):
             # Detect embedding size
-            vector_size = len(self._embeddings.embed_query("test"))
-            
-            # Create collection
+            vector_size = len(self.embeddings.embed_query("test"))
             self.client.create_collection(
                 collection_name=settings.collection_name,
-                vectors_config=VectorParams(
-                    size=vector_size,
-                    distance=Distance.COSINE
-                )
+                **create_collection_kwargs(vector_size)
+            )
+        info = self.client.get_collection(settings.collection_name)
+        for field, schema in missing_payload_indexes(info).items():
+            self.client.create_payload_index(
+                collection_name=settings.collection_name,
+                field_name=field,
+                field_schema=schema,
+            )
+
+    async def _ensure_collection_exists(self) -> None:
+        """Ensure the collection exists, create if missing, and detect its vector layout."""
+        if self._collection_ready:
+            return
+
+        # Concurrent ingestion jobs must not both try to create the collection
+        async with self._collection_lock:
+            if self._collection_ready:
+                return
+
+            if not await self.backend.collection_exists():
+                # Detect embedding size
+                vector_size = len(await run_embedding(self.embeddings.embed_query, "test"))
+
+                # Create collection with the configured layout profile
+                await self.backend.create_collection(vector_size)
+
+            await self._open_collection()
+            self._collection_ready = True
+
+    async def _open_collection(self) -> None:
+        """Detect the vector layout of the collection currently behind the collection name."""
+        physical_collection = await self.backend.physical_collection()
+        # Also creates missing payload indexes, so filtered searches and deletes stay fast
+        self.vector_layout = await self.backend.open()
+        self._physical_collection = physical_collection
+        expected = new_vector_layout(self.vector_layout.embedding_size)
+        if self.vector_layout != expected:
+            logger.warning(
+                f"Collection {settings.collection_name} stores {self.vector_layout} but the configured "
+                f"profile is {expected}; run `easyrag migrate-collection` to apply it"
+            )
+
+    async def delete_collection(self) -> None:
+        """Delete the collection with all of its points; it is re-created when next used."""
+        async with self._collection_lock:
+            if await self.backend.collection_exists():
+                await self.backend.delete_collection()
+            self._collection_ready = False
+            self.vector_layout = None
+        self.collection_state.update(exists=False, points_count=0)
+        self.query_cache.bump_version()
+        self._write_marker = None
+        self._unpublished_writes = False
+
+    async def restore_snapshot(self, path: str) -> dict:
+        """
+        Replace the collection with the points of a snapshot.
+
+        The snapshot is loaded into a new collection while the current one
+        keeps serving queries, and the two are switched once the load has
+        been verified (see snapshot.restore_snapshot). A failed restore
+        leaves the current collection untouched.
+
+        Args:
+            path: Snapshot directory
+
+        Returns:
+            Manifest of the snapshot
+        """
+        from easyrag.services.snapshot import restore_snapshot
+
+        async with self._collection_lock:
+            try:
+                manifest = await restore_snapshot(path, self.backend)
+            finally:
+                # The collection may now have another layout
+                self._collection_ready = False
+                self.vector_layout = None
+                self.record_write()
+                await self.refresh_collection_state()
+        return manifest
+
+    async def get_collection_info(self):
+        """Get information about the collection (Qdrant backend only)."""
+        return await self.async_client.get_collection(settings.collection_name)
+
+    async def refresh_collection_state(self) -> CollectionState:
+        """
+        Reload the local collection state from the backend.
+
+        Writes made by other processes (API workers, ``easyrag ingest``) only
+        become visible here, so cached query results are invalidated when the
+        point count or the write marker changed since the last refresh. Writes
+        made by this process are published as a new write marker first. If
+        another process switched the collection alias (``easyrag
+        migrate-collection`` or a snapshot restore), the vector layout of the
+        new collection is detected again.
+
+        Returns:
+            The updated collection state
+        """
+        previous_count = self.collection_state.points_count if self.collection_state.is_known else None
+        try:
+            if await self.backend.collection_exists():
+                await self.publish_writes()
+                if self._collection_ready and await self.backend.physical_collection() != self._physical_collection:
+                    logger.info(f"Collection {settings.collection_name} was switched to another collection, "
+                                f"detecting its vector layout")
+                    await self._open_collection()
+                    self.query_cache.bump_version()
+                if self.query_cache.results.maxsize > 0 and not await self.backend.supports_write_markers():
+                    # Writes by other processes that keep the point count would go unnoticed
+                    logger.warning("Search result caching is disabled because the vector backend keeps no write marker")
+                    self.query_cache.disable_results()
+                # One get_collection call for Qdrant
+                status = await self.backend.status()
+                self.collection_state.update(exists=True, points_count=status.points_count)
+                marker = status.write_marker
+            else:
+                self.collection_state.update(exists=False, points_count=0)
+                marker = None
+            changed = previous_count is not None and self.collection_state.points_count != previous_count
+            if changed or marker != self._write_marker:
+                self._write_marker = marker
+                self.query_cache.bump_version()
+        except Exception as e:
+            logger.warning(f"Failed to refresh collection state: {str(e)}")
+            self.collection_state.mark_unreachable(str(e))
+        return self.collection_state
+
+    async def get_collection_state(self) -> CollectionState:
+        """
+        Get the local collection state, loading it from the backend only the first time.
+
+        An empty state is also re-read once it is older than
+        ``collection_state_refresh_seconds``, so documents another process
+        indexed into an empty collection are found even when the background
+        refresher is not running. Concurrent callers share one refresh.
+
+        Returns:
+            The collection state
+        """
+        if self._state_is_stale():
+            async with self._state_refresh_lock:
+                if self._state_is_stale():
+                    await self.refresh_collection_state()
+        return self.collection_state
+
+    def _state_is_stale(self) -> bool:
+        state = self.collection_state
+        return not state.is_known or (
+            state.points_count == 0
+            and time.time() - state.refreshed_at > settings.collection_state_refresh_seconds
+        )
+
+    def start_collection_state_refresher(self, interval: float = None) -> None:
+        """
+        Refresh the collection state in the background every ``interval`` seconds.
+
+        Args:
+            interval: Seconds between refreshes (defaults to config collection_state_refresh_seconds)
+        """
+        if interval is None:
+            interval = settings.collection_state_refresh_seconds
+        if self._state_refresher is None or self._state_refresher.done():
+            self._state_refresher = asyncio.create_task(self._refresh_collection_state_forever(interval))
+
+    async def _refresh_collection_state_forever(self, interval: float) -> None:
+        while True:
+            await self.refresh_collection_state()
+            await asyncio.sleep(interval)
+
+    async def warm_up(self, batch_size: int = None) -> Dict[str, float]:
+        """
+        Load the embedding model and open the collection before the first request.
+
+        A dummy batch of chunk-sized texts is embedded so the model's kernels
+        and buffers are set up for a full batch. The dummy vectors bypass the
+        embedding and query caches.
+
+        Args:
+            batch_size: Dummy texts to embed (defaults to config warmup_batch_size)
+
+        Returns:
+            Seconds spent per warm-up step (model_load, warmup_embed, collection)
+        """
+        if batch_size is None:
+            batch_size = settings.warmup_batch_size
+        timings = {}
+
+        start = time.perf_counter()
+        embeddings = await run_embedding(lambda: self.embeddings)
+        timings["model_load"] = time.perf_counter() - start
+
+        if batch_size > 0:
+            # Lengths up to chunk_size so the largest padded batch shape is allocated once
+            filler = "warm up " * (settings.chunk_size // 8 + 1)
+            texts = [filler[:max(1, settings.chunk_size * (i + 1) // batch_size)] for i in range(batch_size)]
+            start = time.perf_counter()
+            await run_embedding(embed_queries, embeddings, texts)
+            timings["warmup_embed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await self._ensure_collection_exists()
+        await self.refresh_collection_state()
+        timings["collection"] = time.perf_counter() - start
+        return timings
+
+    async def embed_documents(self, texts: List[str],
+                              timings: Optional[Dict[str, float]] = None) -> List[List[float]]:
+        """
+        Embed texts in the embedding executor as ingestion work.
+
+        The whole batch is planned into forward passes first (grouped by
+        token length when the model is wrapped in BucketedEmbeddings, see
+        embedding_batching.plan_documents), and each forward pass waits for
+        the model separately, so queries arriving meanwhile only wait for the
+        forward pass that is running.
+
+        Args:
+            texts: Texts to embed
+            timings: If given, seconds spent planning and embedding are added
+                to ``timings["embed"]`` (time waiting for the model is excluded)
+
+        Returns:
+            One embedding vector per text
+        """
+        if not texts:
+            return []
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        # Token counting uses the model's tokenizer, so it runs where the model does
+        batches, seconds = await run_embedding(_timed, plan_documents, self.embeddings, texts, work=INGEST)
+        for batch in batches:
+            batch_vectors, batch_seconds = await run_embedding(
+                _timed, self.embeddings.embed_documents, [texts[i] for i in batch], work=INGEST
             )
-    
-    def get_collection_info(self):
-        """Get information about the collection."""
-        return self.client.get_collection(settings.collection_name)
-    
-    def add_documents(self, documents: list) -> None:
-        """Add documents to the vectorstore."""
-        self.vectorstore.add_documents(documents)
-    
-    def add_documents_batched(self, documents: List, batch_size: int = None) -> int:
+            seconds += batch_seconds
+            for index, vector in zip(batch, batch_vectors):
+                vectors[index] = vector
+        if timings is not None:
+            timings["embed"] = timings.get("embed", 0.0) + seconds
+        return vectors
+
+    async def upsert_documents(self, documents: List[Document], vectors: List[List[float]],
+                               ids: Optional[List[str]] = None) -> None:
+        """
+        Upsert already embedded documents into the collection.
+
+        Args:
+            documents: List of Document objects
+            vectors: Embedding vector for each document
+            ids: Point IDs (defaults to deterministic IDs from point_id_for)
+        """
+        if not documents:
+            return
+
+        await self._ensure_collection_exists()
+
+        if ids is None:
+            ids = [point_id_for(doc) for doc in documents]
+
+        async with get_backend_limiter().slot(INGEST):
+            await self.backend.upsert(ids, np.asarray(vectors, dtype=np.float32), [build_payload(doc) for doc in documents])
+        self.record_points_written(len(ids))
+
+    def record_points_written(self, count: int) -> None:
+        """
+        Update local state after points were upserted.
+
+        Args:
+            count: Number of points written
+        """
+        self.collection_state.record_upsert(count)
+        self.record_write()
+
+    def record_write(self) -> None:
+        """Invalidate cached results after a write; other processes learn of it from publish_writes."""
+        self.query_cache.bump_version()
+        self._unpublished_writes = True
+
+    async def publish_writes(self) -> None:
+        """
+        Publish a new write marker on the collection if this process wrote to it since the last one.
+
+        Called on every collection state refresh, at the end of each
+        ingestion job, after deletes and on close.
+        """
+        if not self._unpublished_writes:
+            return
+        self._unpublished_writes = False
+        marker = uuid.uuid4().hex
+        await self.backend.publish_write_marker(marker)
+        self._write_marker = marker
+
+    def bulk_writer(self) -> BulkWriter:
+        """
+        Create a bulk writer for high-throughput upserts into the collection.
+
+        The collection must already exist (see _ensure_collection_exists).
+        """
+        return BulkWriter(self.backend, on_written=self.record_points_written)
+
+    async def add_documents(self, documents: List[Document]) -> None:
+        """
+        Embed documents off the event loop and upsert them into the collection.
+
+        Args:
+            documents: List of Document objects to add
+        """
+        if not documents:
+            return
+
+        vectors = await self.embed_documents([doc.page_content for doc in documents])
+        await self.upsert_documents(documents, vectors)
+
+    async def add_documents_batched(self, documents: List[Document], batch_size: int = None) -> int:
         """
         Add documents to the vectorstore in batches to handle large document sets.
-        
+
         Args:
             documents: List of Document objects to add
             batch_size: Number of documents to process per batch (defaults to config batch_size)
-            
+
         Returns:
             Total number of documents added
         """
         if batch_size is None:
             batch_size = settings.batch_size
-        
+
         total_added = 0
         total_batches = (len(documents) + batch_size - 1) // batch_size
-        
+
         logger.info(f"Adding {len(documents)} documents in {total_batches} batches of {batch_size}")
-        
+
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
             batch_num = i // batch_size + 1
-            
+
             try:
                 logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} documents)")
-                self.vectorstore.add_documents(batch)
+                await self.add_documents(batch)
                 total_added += len(batch)
                 logger.info(f"Successfully added batch {batch_num}/{total_batches}")
             except Exception as e:
                 logger.error(f"Error adding batch {batch_num}/{total_batches}: {str(e)}")
                 raise
-        
+
         logger.info(f"Successfully added all {total_added} documents to vectorstore")
         return total_added
-    
-    def similarity_search_with_score(self, query: str, k: Optional[int] = None):
+
+    async def count_source_points(self, source: str) -> int:
+        """
+        Count the points belonging to a source document, without reading their IDs.
+
+        Args:
+            source: Source document name
+
+        Returns:
+            Number of points
+        """
+        await self._ensure_collection_exists()
+        return await self.backend.count(source_filter(source))
+
+    async def get_source_point_ids(self, source: str) -> Set[str]:
+        """
+        Get the IDs of all points belonging to a source document.
+
+        Args:
+            source: Source document name
+
+        Returns:
+            Set of point ID strings
+        """
+        await self._ensure_collection_exists()
+        return await self.backend.scroll_ids(source_filter(source))
+
+    async def is_document_indexed(self, source: str, document_hash: str) -> bool:
+        """
+        Check whether a source is fully indexed at the given content hash.
+
+        Args:
+            source: Source document name
+            document_hash: Content hash of the document file
+
+        Returns:
+            True if the source has points and all of them carry this hash
+        """
+        await self._ensure_collection_exists()
+
+        total = await self.backend.count(source_filter(source))
+        if total == 0:
+            return False
+        matching = await self.backend.count(Filter(must=[
+            *source_filter(source).must,
+            FieldCondition(
+                key=f"{METADATA_PAYLOAD_KEY}.document_hash",
+                match=MatchValue(value=document_hash),
+            ),
+        ]))
+        return matching == total
+
+    async def mark_document_indexed(self, source: str, document_hash: str) -> None:
+        """
+        Record the content hash of a fully indexed source on all of its points.
+
+        Only called after every chunk has been upserted, so an interrupted
+        ingestion is never mistaken for a complete one.
+
+        Args:
+            source: Source document name
+            document_hash: Content hash of the document file
+        """
+        await self.backend.set_payload(source_filter(source), METADATA_PAYLOAD_KEY, {"document_hash": document_hash})
+
+    async def delete_points(self, point_ids: Iterable[str]) -> None:
+        """
+        Delete points by ID.
+
+        Args:
+            point_ids: IDs of the points to delete
+        """
+        point_ids = list(point_ids)
+        if not point_ids:
+            return
+        await self.backend.delete(point_ids)
+        self.collection_state.record_delete(len(point_ids))
+        self.record_write()
+
+    async def delete_source(self, source: str) -> int:
+        """
+        Delete all chunks of a source document with a single filtered delete.
+
+        Args:
+            source: Source document name
+
+        Returns:
+            Number of chunks deleted
+        """
+        await self._ensure_collection_exists()
+
+        count = await self.backend.count(source_filter(source))
+        if count == 0:
+            return 0
+        await self.backend.delete_by_filter(source_filter(source))
+        self.collection_state.record_delete(count)
+        self.record_write()
+        await self.publish_writes()
+        logger.info(f"Deleted {count} chunks of {source}")
+        return count
+
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query in the embedding executor, reusing cached query vectors.
+
+        Concurrent queries are micro-batched into one forward pass unless
+        ``query_batch_window_ms`` is 0.
+
+        Args:
+            query: Query string
+
+        Returns:
+            Query embedding vector
+        """
+        vector = self.query_cache.vectors.get(query)
+        if vector is None:
+            with stage_timer("query_embed"):
+                if settings.query_batch_window_ms > 0:
+                    vector = await self.query_batcher.embed(query)
+                else:
+                    vector = await run_embedding(self.embeddings.embed_query, query)
+            self.query_cache.vectors.put(query, vector)
+        return vector
+
+    def _should_rescore(self, rescore: Optional[bool]) -> bool:
+        """Resolve a per-query rescore option against the defaults and the collection layout."""
+        if rescore is None:
+            rescore = settings.rescore_full_vectors
+        return rescore and self.vector_layout.can_rescore
+
+    @staticmethod
+    def _search_request(vector: List[float], k: int, query_filter: Optional[Filter], rescore: bool,
+                        mmr_lambda: Optional[float]) -> SearchRequest:
+        """Build the backend search for a query; MMR fetches mmr_fetch_k candidates with their embeddings."""
+        if mmr_lambda is None:
+            return SearchRequest(vector, k, query_filter, rescore)
+        return SearchRequest(vector, max(settings.mmr_fetch_k, k), query_filter, rescore, with_vectors=True)
+
+    def _to_results(self, hits: list, k: int, mmr_lambda: Optional[float]) -> List[Tuple[Document, float]]:
+        """Convert search hits into (Document, score) pairs, picking k of them by MMR if requested."""
+        if mmr_lambda is not None and hits:
+            with stage_timer("mmr"):
+                picked = mmr_select(
+                    np.array([hit.score for hit in hits], dtype=np.float32),
+                    np.asarray([embedding_of(hit.vector) for hit in hits], dtype=np.float32),
+                    k,
+                    mmr_lambda,
+                )
+            hits = [hits[i] for i in picked]
+        return [(self._point_to_document(point), point.score) for point in hits]
+
+    async def similarity_search_with_score(self, query: str, k: Optional[int] = None,
+                                           query_filter: Optional[Filter] = None,
+                                           rescore: Optional[bool] = None,
+                                           mmr_lambda: Optional[float] = None) -> List[Tuple[Document, float]]:
         """
         Perform similarity search and return results with scores.
-        
+
+        The query is embedded in the embedding executor and the search runs in
+        the backend without blocking the event loop. Results are
+        cached until the collection is next written to.
+
+        With ``mmr_lambda``, ``mmr_fetch_k`` candidates are fetched together
+        with their stored embeddings in the same search call and ``k`` of
+        them are picked by maximal marginal relevance, so near-duplicate
+        chunks do not crowd out the rest.
+
         Args:
             query: Query string
             k: Number of documents to retrieve
-            
+            query_filter: Optional filter restricting the search (see search_filter)
+            rescore: Rescore truncated-vector candidates with full embeddings
+                (defaults to config rescore_full_vectors)
+            mmr_lambda: Re-rank for diversity with this MMR trade-off, from 0
+                (diversity only) to 1 (relevance only); None ranks by similarity
+
+        Returns:
+            List of tuples (Document, score), best first or in MMR pick order
+        """
+        if k is None:
+            k = settings.default_k
+        await self._ensure_collection_exists()
+        rescore = self._should_rescore(rescore)
+
+        cache_key = self.query_cache.results_key(query, k, filter_cache_key(query_filter), rescore, mmr_lambda)
+        results = self.query_cache.results.get(cache_key)
+        if results is not None:
+            return results
+
+        query_vector = await self.embed_query(query)
+        request = self._search_request(query_vector, k, query_filter, rescore, mmr_lambda)
+        async with get_backend_limiter().slot(QUERY):
+            with stage_timer("search"):
+                hits = (await self.backend.search([request]))[0]
+        results = self._to_results(hits, k, mmr_lambda)
+        self.query_cache.results.put(cache_key, results)
+        return results
+
+    async def similarity_search_batch_with_score(
+        self, queries: List[str], k: Optional[int] = None,
+        query_filters: Optional[List[Optional[Filter]]] = None,
+        rescore: Optional[List[Optional[bool]]] = None,
+        mmr_lambdas: Optional[List[Optional[float]]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Perform similarity search for many queries at once.
+
+        Uncached queries are embedded in one batched forward pass and searched
+        with a single backend request.
+
+        Args:
+            queries: Query strings
+            k: Number of documents to retrieve per query
+            query_filters: Optional filter for each query, in the same order as queries
+            rescore: Optional rescore option for each query (see similarity_search_with_score)
+            mmr_lambdas: Optional MMR trade-off for each query (see similarity_search_with_score)
+
         Returns:
-            List of tuples (Document, score)
+            List of (Document, score) lists, in the same order as queries
         """
         if k is None:
             k = settings.default_k
-        
-        return self.vectorstore.similarity_search_with_score(query, k=k)
-    
+        if query_filters is None:
+            query_filters = [None] * len(queries)
+        await self._ensure_collection_exists()
+        rescore = [self._should_rescore(option) for option in (rescore or [None] * len(queries))]
+        if mmr_lambdas is None:
+            mmr_lambdas = [None] * len(queries)
+
+        cache_keys = [
+            self.query_cache.results_key(query, k, filter_cache_key(query_filter), query_rescore, mmr_lambda)
+            for query, query_filter, query_rescore, mmr_lambda in zip(queries, query_filters, rescore, mmr_lambdas)
+        ]
+        results: List[Optional[List[Tuple[Document, float]]]] = [
+            self.query_cache.results.get(cache_key) for cache_key in cache_keys
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        # Embed every distinct uncached query once, in a single batch
+        vectors = {}
+        for i in pending:
+            vector = self.query_cache.vectors.get(queries[i])
+            if vector is not None:
+                vectors[queries[i]] = vector
+        to_embed = list(dict.fromkeys(queries[i] for i in pending if queries[i] not in vectors))
+        if to_embed:
+            with stage_timer("query_embed", items=len(to_embed)):
+                embedded = await run_embedding(embed_queries, self.embeddings, to_embed)
+            for query, vector in zip(to_embed, embedded):
+                vectors[query] = vector
+                self.query_cache.vectors.put(query, vector)
+
+        async with get_backend_limiter().slot(QUERY):
+            with stage_timer("search", items=len(pending)):
+                responses = await self.backend.search([
+                    self._search_request(vectors[queries[i]], k, query_filters[i], rescore[i], mmr_lambdas[i])
+                    for i in pending
+                ])
+        for i, hits in zip(pending, responses):
+            result = self._to_results(hits, k, mmr_lambdas[i])
+            results[i] = result
+            self.query_cache.results.put(cache_keys[i], result)
+        return results
+
+    @staticmethod
+    def _point_to_document(point) -> Document:
+        """Convert a search hit into a LangChain Document."""
+        payload = point.payload or {}
+        return Document(
+            page_content=payload.get(CONTENT_PAYLOAD_KEY, ""),
+            metadata=payload.get(METADATA_PAYLOAD_KEY) or {},
+        )
+
     def get_retriever(self, search_type: str = "similarity", k: Optional[int] = None):
         """
         Get a retriever from the vectorstore.
-        
+
+        The LangChain retriever searches with full query embeddings, so it
+        does not work on collections with truncated vectors (``vector_dim``),
+        and it always reads from Qdrant, whatever ``vector_backend`` says.
+
+        For diverse results without LangChain, pass ``mmr_lambda`` to
+        similarity_search_with_score instead: it re-ranks the candidates it
+        already fetched rather than embedding and searching again.
+
         Args:
             search_type: Type of search ("similarity" or "mmr")
             k: Number of documents to retrieve
-            
+
         Returns:
             Retriever instance
         """
         if k is None:
             k = settings.default_k
-        
+
         return self.vectorstore.as_retriever(
             search_type=search_type,
             search_kwargs={"k": k}
         )
 
+    async def close(self) -> None:
+        """Stop background tasks, close the backend and the Qdrant clients."""
+        if self._state_refresher is not None:
+            self._state_refresher.cancel()
+            try:
+                await self._state_refresher
+            except asyncio.CancelledError:
+                pass
+            self._state_refresher = None
+        if self._query_batcher is not None:
+            await self._query_batcher.close()
+            self._query_batcher = None
+        if self._backend is not None:
+            try:
+                await self.publish_writes()
+            except Exception as e:
+                logger.warning(f"Could not publish the last writes: {str(e)}")
+            await self._backend.close()
+            self._backend = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._vectorstore = None
+        self._collection_ready = False
+        self.vector_layout = None
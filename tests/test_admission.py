@@ -0,0 +1,112 @@
+"""Slot ordering, cancellation and backpressure of the admission limiter."""
+import asyncio
+
+import pytest
+
+from easyrag.services.admission import INGEST, QUERY, OverloadedError, PriorityLimiter
+
+
+async def start_waiting(limiter: PriorityLimiter, work: str, granted: list, name: str) -> asyncio.Task:
+    """Start a task that records its name once it gets a slot, and let it queue."""
+    async def wait():
+        await limiter.acquire(work)
+        granted.append(name)
+
+    task = asyncio.create_task(wait())
+    await asyncio.sleep(0)
+    return task
+
+
+def test_waiting_queries_get_slots_before_waiting_ingestion():
+    async def scenario():
+        limiter = PriorityLimiter("model", slots=1)
+        await limiter.acquire(INGEST)
+        granted = []
+        tasks = [
+            await start_waiting(limiter, INGEST, granted, "ingest-1"),
+            await start_waiting(limiter, QUERY, granted, "query-1"),
+            await start_waiting(limiter, INGEST, granted, "ingest-2"),
+            await start_waiting(limiter, QUERY, granted, "query-2"),
+        ]
+        # Each release hands the slot to the next waiter; the holder's class is released
+        for holder, expected in ((INGEST, "query-1"), (QUERY, "query-2"), (QUERY, "ingest-1"), (INGEST, "ingest-2")):
+            limiter.release(holder)
+            await asyncio.sleep(0)
+            assert granted[-1] == expected
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_ingestion_is_capped_at_max_ingest_slots():
+    async def scenario():
+        limiter = PriorityLimiter("backend", slots=3, max_ingest=1)
+        await limiter.acquire(INGEST)
+        granted = []
+        waiting = await start_waiting(limiter, INGEST, granted, "ingest")
+        await limiter.acquire(QUERY)
+        assert granted == [] and limiter.waiting(INGEST) == 1
+        limiter.release(INGEST)
+        await waiting
+        assert granted == ["ingest"] and limiter.in_use(INGEST) == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_skipped_and_does_not_leak_a_slot():
+    async def scenario():
+        limiter = PriorityLimiter("model", slots=1)
+        await limiter.acquire(QUERY)
+        granted = []
+        cancelled = await start_waiting(limiter, QUERY, granted, "cancelled")
+        waiting = await start_waiting(limiter, QUERY, granted, "waiting")
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert limiter.waiting(QUERY) == 1
+
+        limiter.release(QUERY)
+        await waiting
+        assert granted == ["waiting"]
+        limiter.release(QUERY)
+        assert limiter.stats()["in_use"] == {QUERY: 0, INGEST: 0}
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_after_being_granted_returns_its_slot():
+    async def scenario():
+        limiter = PriorityLimiter("model", slots=1)
+        await limiter.acquire(QUERY)
+        granted = []
+        task = await start_waiting(limiter, QUERY, granted, "query")
+        # Grant the slot, then cancel before the task gets to run
+        limiter.release(QUERY)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert granted == [] and limiter.in_use(QUERY) == 0
+
+    asyncio.run(scenario())
+
+
+def test_work_beyond_max_waiting_is_rejected():
+    async def scenario():
+        limiter = PriorityLimiter("backend", slots=1, max_waiting={QUERY: 1})
+        await limiter.acquire(QUERY)
+        granted = []
+        waiting = await start_waiting(limiter, QUERY, granted, "waiting")
+        with pytest.raises(OverloadedError) as excinfo:
+            await limiter.acquire(QUERY)
+        assert excinfo.value.retry_after > 0
+        # Ingestion has no waiting limit
+        ingest = await start_waiting(limiter, INGEST, granted, "ingest")
+        assert limiter.waiting(INGEST) == 1
+
+        limiter.release(QUERY)
+        await waiting
+        limiter.release(QUERY)
+        await ingest
+        assert granted == ["waiting", "ingest"]
+
+    asyncio.run(scenario())
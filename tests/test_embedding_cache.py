@@ -0,0 +1,117 @@
+"""LRU eviction and byte accounting of the persistent embedding cache."""
+import types
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from easyrag.services import embedding_cache
+from easyrag.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+DIM = 10
+# Bytes stored per float32 vector
+ENTRY = DIM * 4
+
+
+class Clock:
+    """Stands in for the time module, so last_used values are distinct and ordered."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "time", Clock())
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), "model", max_bytes=10 * ENTRY)
+    yield cache
+    cache.close()
+
+
+def vector(i: int) -> np.ndarray:
+    return np.full(DIM, i, dtype=np.float32)
+
+
+def test_least_recently_used_entries_are_evicted_first(cache):
+    keys = [cache.key(f"text {i}") for i in range(11)]
+    for i in range(10):
+        cache.put_many([keys[i]], [vector(i)])
+    assert cache.stats()["size_bytes"] == 10 * ENTRY and cache.evictions == 0
+
+    # Reading the oldest entry makes entries 1 and 2 the least recently used
+    cache.get_many([keys[0]])
+    cache.put_many([keys[10]], [vector(10)])
+
+    # Evicted down to 90% of max_bytes
+    assert cache.evictions == 2
+    assert cache.contains_many(keys) == set(keys) - {keys[1], keys[2]}
+    assert cache.stats()["size_bytes"] == 9 * ENTRY == cache._stored_bytes()
+    np.testing.assert_array_equal(cache.get_many([keys[0]])[keys[0]], vector(0))
+
+
+def test_replaced_and_repeated_keys_are_counted_once(cache):
+    keys = [cache.key(f"text {i}") for i in range(3)]
+    cache.put_many(keys, [vector(i) for i in range(3)])
+    cache.put_many([keys[0], keys[1], keys[0]], [vector(5), vector(6), vector(7)])
+    assert cache.stats()["size_bytes"] == 3 * ENTRY == cache._stored_bytes()
+    # The last vector given for a key wins
+    np.testing.assert_array_equal(cache.get_many([keys[0]])[keys[0]], vector(7))
+
+
+def test_failed_write_is_rolled_back(cache, monkeypatch):
+    keys = [cache.key(f"text {i}") for i in range(12)]
+    cache.put_many(keys[:2], [vector(0), vector(1)])
+
+    def fail():
+        raise RuntimeError("eviction failed")
+
+    monkeypatch.setattr(cache, "_evict", fail)
+    with pytest.raises(RuntimeError):
+        cache.put_many(keys[2:], [vector(i) for i in range(2, 12)])
+    assert not cache._conn.in_transaction
+    assert cache.contains_many(keys) == set(keys[:2])
+    assert cache.stats()["size_bytes"] == 2 * ENTRY
+
+
+def test_size_is_read_back_when_reopened(cache):
+    keys = [cache.key(f"text {i}") for i in range(4)]
+    cache.put_many(keys, [vector(i) for i in range(4)])
+    reopened = EmbeddingCache(cache.path, "model", max_bytes=cache.max_bytes)
+    try:
+        assert reopened.stats()["size_bytes"] == 4 * ENTRY
+        assert reopened.contains_many(keys) == set(keys)
+    finally:
+        reopened.close()
+
+
+def test_keys_depend_on_the_model_and_normalized_text(cache):
+    other_model = types.SimpleNamespace(model_name="other")
+    assert cache.key("some  text\n") == cache.key("some text")
+    assert cache.key("some text") != EmbeddingCache.key(other_model, "some text")
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [vector(len(text)).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return vector(len(text)).tolist()
+
+
+def test_cached_embeddings_only_embed_uncached_texts_once(cache):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, cache)
+    embeddings.embed_documents(["a", "bb"])
+    vectors = embeddings.embed_documents(["a", "ccc", "ccc", "bb"])
+
+    assert model.embedded == ["a", "bb", "ccc"]
+    assert vectors == [vector(n).tolist() for n in (1, 3, 3, 2)]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 4
@@ -0,0 +1,90 @@
+"""Incremental re-indexing of a text file through the ingestion pipeline."""
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from easyrag.config import settings
+from easyrag.services.document_processor import DocumentProcessor
+from easyrag.services.executors import shutdown_executors
+from easyrag.services.ingestion_pipeline import IngestionPipeline
+from easyrag.services.job_service import IngestionJob
+from easyrag.services.vectorstore_service import VectorStoreService
+
+SOURCE = "notes.txt"
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic unit vectors, recording every text sent to the model."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def _vector(self, text):
+        rng = np.random.default_rng(sum(text.encode()))
+        vector = rng.standard_normal(16)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def paragraph(i: int, word: str = "original") -> str:
+    # One chunk per paragraph: two of them never fit in chunk_size
+    return f"Paragraph {i:02d} " + " ".join([word] * 15) + "."
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_backend", "embedded")
+    monkeypatch.setattr(settings, "embedded_index_path", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "embedded_index_ivf_lists", 0)
+    monkeypatch.setattr(settings, "collection_name", "ingestion_test")
+    monkeypatch.setattr(settings, "vector_dim", None)
+    monkeypatch.setattr(settings, "embedding_cache_path", None)
+    monkeypatch.setattr(settings, "chunk_size", 160)
+    monkeypatch.setattr(settings, "chunk_overlap", 0)
+    yield VectorStoreService(CountingEmbeddings())
+    shutdown_executors()
+
+
+def test_reindexing_only_embeds_changed_chunks(service, tmp_path):
+    path = tmp_path / SOURCE
+    pipeline = IngestionPipeline(DocumentProcessor(), service, batch_size=4)
+    embedded = service.embeddings.embedded
+
+    async def ingest(paragraphs: list) -> IngestionJob:
+        path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+        job = IngestionJob(SOURCE)
+        await pipeline.run(str(path), job, original_filename=SOURCE)
+        return job
+
+    def counts(job: IngestionJob) -> tuple:
+        return job.chunks_added, job.chunks_unchanged, job.chunks_removed
+
+    async def scenario():
+        paragraphs = [paragraph(i) for i in range(10)]
+        first = await ingest(paragraphs)
+        assert counts(first) == (10, 0, 0) and not first.document_unchanged
+        assert len(embedded) == 10
+
+        # Same content: skipped as a whole by its fingerprint
+        unchanged = await ingest(paragraphs)
+        assert unchanged.document_unchanged and counts(unchanged) == (0, 10, 0)
+        assert len(embedded) == 10
+
+        # One paragraph edited in place (same length) and the last one replaced
+        edited = paragraphs[:3] + [paragraph(3, word="replaced")] + paragraphs[4:9] + [paragraph(10)]
+        embedded.clear()
+        changed = await ingest(edited)
+        assert not changed.document_unchanged and counts(changed) == (2, 8, 2)
+        assert sorted(embedded) == sorted([edited[3], edited[9]])
+        assert await service.count_source_points(SOURCE) == 10
+        await service.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+"""Vectorized MMR selection against a plain-loop reference."""
+import numpy as np
+import pytest
+
+from easyrag.services.mmr import mmr_select
+
+
+def reference_mmr(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> list:
+    """MMR as usually written: recompute every score against every picked candidate."""
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    selected = [int(np.argmax(relevance))]
+    while len(selected) < min(k, len(relevance)):
+        best, best_score = None, -np.inf
+        for i in range(len(relevance)):
+            if i in selected:
+                continue
+            redundancy = max(float(unit[i] @ unit[j]) for j in selected)
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.25, 0.5, 0.9])
+def test_matches_the_reference_selection(lambda_mult):
+    rng = np.random.default_rng(int(lambda_mult * 100))
+    vectors = rng.standard_normal((60, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+    relevance = vectors @ query / np.linalg.norm(vectors, axis=1) / np.linalg.norm(query)
+
+    selected = mmr_select(relevance, vectors, 10, lambda_mult)
+    assert selected.tolist() == reference_mmr(relevance, vectors, 10, lambda_mult)
+
+
+def test_lambda_one_ranks_by_relevance():
+    rng = np.random.default_rng(1)
+    relevance = rng.random(20)
+    selected = mmr_select(relevance, rng.standard_normal((20, 8)), 5, 1.0)
+    assert selected.tolist() == np.argsort(-relevance)[:5].tolist()
+
+
+def test_near_duplicates_are_skipped():
+    vectors = np.array([[1.0, 0.0], [0.999, 0.01], [0.0, 1.0]])
+    relevance = np.array([0.9, 0.89, 0.5])
+    assert mmr_select(relevance, vectors, 2, 0.5).tolist() == [0, 2]
+    assert mmr_select(relevance, vectors, 2, 1.0).tolist() == [0, 1]
+
+
+def test_k_is_limited_to_the_candidates():
+    vectors = np.eye(3)
+    assert sorted(mmr_select(np.array([0.1, 0.3, 0.2]), vectors, 10, 0.5).tolist()) == [0, 1, 2]
+    assert mmr_select(np.array([0.1, 0.3, 0.2]), vectors, 0, 0.5).tolist() == []
+    assert mmr_select(np.empty(0), np.empty((0, 3)), 4, 0.5).tolist() == []
@@ -0,0 +1,119 @@
+"""Coalescing of concurrent query embeddings, and failure of waiting queries."""
+import asyncio
+import threading
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from easyrag.services.executors import shutdown_executors
+from easyrag.services.query_batcher import QueryEmbeddingBatcher, QueueFullError
+
+
+class RecordingEmbeddings(Embeddings):
+    """Embeds a text as [len(text)], recording the texts of every forward pass."""
+
+    def __init__(self, release: threading.Event = None, error: Exception = None):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = release
+        self.error = error
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture(autouse=True)
+def executors():
+    yield
+    shutdown_executors()
+
+
+def test_concurrent_queries_share_one_forward_pass():
+    async def scenario():
+        embeddings = RecordingEmbeddings()
+        batcher = QueryEmbeddingBatcher(embeddings, window_ms=50, max_batch_size=8, max_queue_depth=16)
+        queries = ["a", "bb", "ccc", "bb"]
+        vectors = await asyncio.gather(*(batcher.embed(query) for query in queries))
+        await batcher.close()
+        return embeddings, batcher, vectors
+
+    embeddings, batcher, vectors = asyncio.run(scenario())
+    assert vectors == [[1.0], [2.0], [3.0], [2.0]]
+    # Duplicate queries are embedded once
+    assert embeddings.calls == [["a", "bb", "ccc"]]
+    assert batcher.stats()["batches"] == 1 and batcher.stats()["queries"] == 4
+
+
+def test_batches_are_split_at_max_batch_size():
+    async def scenario():
+        embeddings = RecordingEmbeddings()
+        batcher = QueryEmbeddingBatcher(embeddings, window_ms=50, max_batch_size=2, max_queue_depth=16)
+        vectors = await asyncio.gather(*(batcher.embed("q" * n) for n in range(1, 6)))
+        await batcher.close()
+        return embeddings, vectors
+
+    embeddings, vectors = asyncio.run(scenario())
+    assert vectors == [[float(n)] for n in range(1, 6)]
+    assert [len(call) for call in embeddings.calls] == [2, 2, 1]
+
+
+def test_a_failed_forward_pass_fails_every_query_in_the_batch():
+    async def scenario():
+        batcher = QueryEmbeddingBatcher(
+            RecordingEmbeddings(error=ValueError("model failed")), window_ms=50, max_batch_size=8, max_queue_depth=16
+        )
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        # The worker keeps running for later queries
+        assert not batcher._worker.done()
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_closing_during_a_forward_pass_fails_the_waiting_queries():
+    release = threading.Event()
+
+    async def scenario():
+        embeddings = RecordingEmbeddings(release=release)
+        batcher = QueryEmbeddingBatcher(embeddings, window_ms=0, max_batch_size=1, max_queue_depth=16)
+        in_flight = asyncio.create_task(batcher.embed("in flight"))
+        await asyncio.get_running_loop().run_in_executor(None, embeddings.started.wait, 5)
+        queued = asyncio.create_task(batcher.embed("queued"))
+        await asyncio.sleep(0)
+        await batcher.close()
+        release.set()
+        return await asyncio.gather(in_flight, queued, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["Query embedding worker stopped"] * 2
+
+
+def test_queries_beyond_the_queue_depth_are_rejected():
+    release = threading.Event()
+
+    async def scenario():
+        embeddings = RecordingEmbeddings(release=release)
+        batcher = QueryEmbeddingBatcher(embeddings, window_ms=0, max_batch_size=1, max_queue_depth=1)
+        in_flight = asyncio.create_task(batcher.embed("in flight"))
+        await asyncio.get_running_loop().run_in_executor(None, embeddings.started.wait, 5)
+        queued = asyncio.create_task(batcher.embed("queued"))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.embed("rejected")
+        release.set()
+        vectors = await asyncio.gather(in_flight, queued)
+        await batcher.close()
+        return vectors
+
+    assert asyncio.run(scenario()) == [[9.0], [6.0]]
@@ -0,0 +1,137 @@
+"""Query caches and their invalidation by collection writes."""
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+from easyrag.services import query_cache
+from easyrag.services.executors import shutdown_executors
+from easyrag.services.query_cache import LRUTTLCache, QueryCache
+from easyrag.services.vectorstore_service import VectorStoreService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_lru_ttl_cache_evicts_least_recently_used_and_expired_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache, "time", clock)
+    cache = LRUTTLCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 3, "misses": 2, "hit_rate": 0.6, "size": 1, "max_size": 2}
+
+
+def test_bumping_the_version_invalidates_results_but_not_vectors():
+    cache = QueryCache()
+    key = cache.results_key("query", 4)
+    cache.results.put(key, ["hit"])
+    cache.vectors.put("query", [0.1])
+
+    cache.bump_version()
+    assert cache.results_key("query", 4) != key
+    assert cache.results.get(key) is None and cache.results.stats()["size"] == 0
+    assert cache.vectors.get("query") == [0.1]
+    assert cache.stats()["collection_version"] == 1
+
+
+def test_disabled_results_are_not_stored():
+    cache = QueryCache()
+    cache.results.put(cache.results_key("query", 4), ["hit"])
+    cache.disable_results()
+    cache.results.put(cache.results_key("query", 4), ["hit"])
+    assert cache.results.get(cache.results_key("query", 4)) is None
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text."""
+
+    def _vector(self, text):
+        rng = np.random.default_rng(sum(text.encode()))
+        vector = rng.standard_normal(16)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def documents(source: str, prefix: str, count: int = 5) -> list:
+    return [Document(page_content=f"{prefix} {i}", metadata={"source": source, "start_index": i}) for i in range(count)]
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Two services on one Qdrant collection, standing in for two API processes."""
+    monkeypatch.setattr(settings, "vector_backend", "qdrant")
+    monkeypatch.setattr(settings, "collection_name", "query_cache_test")
+    monkeypatch.setattr(settings, "embedding_cache_path", None)
+    monkeypatch.setattr(settings, "query_batch_window_ms", 0)
+    monkeypatch.setattr(settings, "query_result_cache_size", 64)
+    client = AsyncQdrantClient(":memory:")
+    pair = []
+    for _ in range(2):
+        service = VectorStoreService(HashEmbeddings())
+        service._async_client = client
+        pair.append(service)
+    yield pair
+    shutdown_executors()
+
+
+def contents(results) -> list:
+    return sorted(document.page_content for document, _ in results)
+
+
+def test_own_writes_invalidate_cached_results(services):
+    service, _ = services
+
+    async def scenario():
+        await service.add_documents(documents("a.txt", "first"))
+        before = await service.similarity_search_with_score("first 1", k=10)
+        version = service.query_cache.collection_version
+        await service.add_documents(documents("b.txt", "second"))
+        after = await service.similarity_search_with_score("first 1", k=10)
+        return before, after, version
+
+    before, after, version = asyncio.run(scenario())
+    assert len(before) == 5 and len(after) == 10
+    assert services[0].query_cache.collection_version > version
+
+
+def test_writes_by_another_process_invalidate_results_at_the_next_refresh(services):
+    writer, reader = services
+
+    async def scenario():
+        await writer.add_documents(documents("a.txt", "first"))
+        await writer.refresh_collection_state()
+        await reader.refresh_collection_state()
+        cached = await reader.similarity_search_with_score("first 1", k=10)
+
+        # Same point count, different content: only the write marker tells the reader
+        await writer.delete_source("a.txt")
+        await writer.add_documents(documents("a.txt", "rewritten"))
+        assert contents(await reader.similarity_search_with_score("first 1", k=10)) == contents(cached)
+        await writer.refresh_collection_state()
+        await reader.refresh_collection_state()
+        return cached, await reader.similarity_search_with_score("first 1", k=10)
+
+    cached, refreshed = asyncio.run(scenario())
+    assert contents(cached) == [f"first {i}" for i in range(5)]
+    assert contents(refreshed) == [f"rewritten {i}" for i in range(5)]
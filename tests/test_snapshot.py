@@ -0,0 +1,172 @@
+"""Snapshot export/import round trips and restores that fail part-way."""
+import asyncio
+import json
+import os
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+from easyrag.services.embedded_index import EmbeddedBackend
+from easyrag.services.executors import shutdown_executors
+from easyrag.services.snapshot import PAYLOADS_FILE, export_snapshot, import_snapshot, restore_snapshot
+from easyrag.services.vector_backend import QdrantBackend
+
+DIM = 16
+BATCH = 64
+
+
+@pytest.fixture(params=["qdrant", "embedded"])
+def kind(request, monkeypatch):
+    monkeypatch.setattr(settings, "vector_dim", None)
+    monkeypatch.setattr(settings, "embedded_index_dtype", "float32")
+    monkeypatch.setattr(settings, "embedded_index_ivf_lists", 0)
+    yield request.param
+    shutdown_executors()
+
+
+def make_points(count: int, seed: int, label: str):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(uuid.UUID(int=seed * 100000 + i + 1)) for i in range(count)]
+    payloads = [{"page_content": f"{label} {i}", "metadata": {"source": f"{label}.txt", "start_index": i}}
+                for i in range(count)]
+    return ids, vectors, payloads
+
+
+async def fill(backend, points) -> None:
+    ids, vectors, payloads = points
+    await backend.create_collection(DIM)
+    await backend.open()
+    for start in range(0, len(ids), BATCH):
+        await backend.upsert(ids[start:start + BATCH], vectors[start:start + BATCH], payloads[start:start + BATCH])
+    await backend.barrier()
+
+
+async def read_points(backend) -> dict:
+    if backend.layout is None:
+        await backend.open()
+    points = {}
+    async for batch in backend.iter_points(BATCH):
+        for point_id, vector, payload in zip(batch.ids, batch.vectors, batch.payloads):
+            points[point_id] = (np.asarray(vector), payload["page_content"])
+    return points
+
+
+def run(kind: str, tmp_path, scenario) -> None:
+    async def main():
+        client = AsyncQdrantClient(":memory:") if kind == "qdrant" else None
+        if kind == "qdrant":
+            backend = QdrantBackend(client, "live")
+        else:
+            backend = EmbeddedBackend("live", path=str(tmp_path / "index"))
+        try:
+            await scenario(backend)
+        finally:
+            await backend.close()
+            if client is not None:
+                await client.close()
+
+    asyncio.run(main())
+
+
+async def collections(backend) -> list:
+    if isinstance(backend, QdrantBackend):
+        return sorted(collection.name for collection in (await backend.client.get_collections()).collections)
+    return sorted(name for name in os.listdir(os.path.dirname(backend.index.path)))
+
+
+@pytest.mark.parametrize("float16", [False, True])
+def test_export_and_import_round_trip(kind, tmp_path, float16):
+    points = make_points(150, 1, "doc")
+
+    async def scenario(backend):
+        await fill(backend, points)
+        path = str(tmp_path / "snapshot")
+        manifest = await export_snapshot(backend, path, float16=float16, batch_size=BATCH)
+        assert manifest["points"] == 150 and manifest["dimension"] == DIM
+
+        copy = backend.sibling("copy")
+        try:
+            await import_snapshot(path, copy, batch_size=BATCH)
+            original, imported = await read_points(backend), await read_points(copy)
+        finally:
+            await copy.close()
+        assert imported.keys() == original.keys()
+        for point_id, (vector, text) in original.items():
+            np.testing.assert_allclose(imported[point_id][0], vector, atol=1e-3 if float16 else 1e-6)
+            assert imported[point_id][1] == text
+
+        with pytest.raises(FileExistsError):
+            await export_snapshot(backend, path)
+        with pytest.raises(ValueError):
+            await import_snapshot(path, backend)
+
+    run(kind, tmp_path, scenario)
+
+
+def test_restore_replaces_the_live_points(kind, tmp_path):
+    async def scenario(backend):
+        snapshot_source = backend.sibling("source")
+        try:
+            await fill(snapshot_source, make_points(80, 2, "snapshot"))
+            await export_snapshot(snapshot_source, str(tmp_path / "snapshot"), batch_size=BATCH)
+            await snapshot_source.delete_collection()
+        finally:
+            await snapshot_source.close()
+        await fill(backend, make_points(40, 3, "live"))
+
+        await restore_snapshot(str(tmp_path / "snapshot"), backend, batch_size=BATCH)
+        await backend.open()
+        texts = sorted(text for _, text in (await read_points(backend)).values())
+        assert texts == sorted(f"snapshot {i}" for i in range(80))
+
+    run(kind, tmp_path, scenario)
+
+
+def test_failed_load_leaves_the_live_collection(kind, tmp_path):
+    async def scenario(backend):
+        await fill(backend, make_points(100, 4, "snapshot"))
+        path = str(tmp_path / "snapshot")
+        await export_snapshot(backend, path, batch_size=BATCH)
+        await backend.delete_collection()
+        await fill(backend, make_points(30, 5, "live"))
+        before = await collections(backend)
+
+        # A corrupt payload line part-way through the snapshot
+        payloads_path = os.path.join(path, PAYLOADS_FILE)
+        with open(payloads_path, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        lines[70] = "{not json"
+        with open(payloads_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+        with pytest.raises(json.JSONDecodeError):
+            await restore_snapshot(path, backend, batch_size=BATCH)
+        assert await collections(backend) == before
+        assert await backend.count() == 30
+        assert {text for _, text in (await read_points(backend)).values()} == {f"live {i}" for i in range(30)}
+
+    run(kind, tmp_path, scenario)
+
+
+def test_failed_switch_deletes_the_loaded_collection(kind, tmp_path, monkeypatch):
+    async def scenario(backend):
+        await fill(backend, make_points(50, 6, "snapshot"))
+        path = str(tmp_path / "snapshot")
+        await export_snapshot(backend, path, batch_size=BATCH)
+        before = await collections(backend)
+
+        async def fail(staged, keep_old=False):
+            raise RuntimeError("switch failed")
+
+        monkeypatch.setattr(backend, "replace_with", fail)
+        with pytest.raises(RuntimeError, match="switch failed"):
+            await restore_snapshot(path, backend, batch_size=BATCH)
+        assert await collections(backend) == before
+        assert await backend.count() == 50
+
+    run(kind, tmp_path, scenario)
@@ -0,0 +1,78 @@
+"""The streaming text chunker against RecursiveCharacterTextSplitter."""
+import io
+import random
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from easyrag.services import text_chunker
+from easyrag.services.text_chunker import DEFAULT_SEPARATORS, StreamingTextSplitter
+
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon"]
+
+
+def sentences(rng: random.Random, count: int, max_words: int) -> list:
+    # Numbered, so no chunk text occurs twice and the recursive splitter's start_index search is exact
+    return [" ".join([f"s{i}"] + rng.choices(WORDS, k=rng.randint(1, max_words))) + "." for i in range(count)]
+
+
+def paragraphs_text(rng: random.Random) -> str:
+    lines = sentences(rng, 300, 8)
+    paragraphs, i = [], 0
+    while i < len(lines):
+        size = rng.randint(1, 3)
+        paragraphs.append(" ".join(lines[i:i + size]))
+        i += size
+    return "\n\n".join(paragraphs)
+
+
+def lines_text(rng: random.Random) -> str:
+    return "\n".join(sentences(rng, 300, 12))
+
+
+def recursive_chunks(text: str, chunk_size: int, chunk_overlap: int) -> list:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=list(DEFAULT_SEPARATORS), add_start_index=True
+    )
+    return [(doc.metadata["start_index"], doc.page_content) for doc in splitter.create_documents([text])]
+
+
+def streaming_chunks(text: str, chunk_size: int, chunk_overlap: int) -> list:
+    splitter = StreamingTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [(start, chunk) for start, _, chunk in splitter.split_stream(io.StringIO(text))]
+
+
+@pytest.mark.parametrize("make_text", [paragraphs_text, lines_text])
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(200, 0), (200, 50), (500, 100), (800, 100)])
+def test_chunks_and_start_index_match_the_recursive_splitter(make_text, chunk_size, chunk_overlap):
+    text = make_text(random.Random(chunk_size + chunk_overlap))
+    assert streaming_chunks(text, chunk_size, chunk_overlap) == recursive_chunks(text, chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("chunk_overlap", [0, 30])
+def test_text_without_separators_is_cut_like_the_recursive_splitter(chunk_overlap):
+    text = "".join(random.Random(chunk_overlap).choices("abcdefghij", k=2500))
+    assert streaming_chunks(text, 200, chunk_overlap) == recursive_chunks(text, 200, chunk_overlap)
+
+
+def test_offsets_locate_every_chunk_in_mixed_text():
+    rng = random.Random(7)
+    parts = sentences(rng, 200, 30) + ["x" * 700, "\n\n\n", "\n"] * 5
+    rng.shuffle(parts)
+    text = " ".join(parts)
+    splitter = StreamingTextSplitter(chunk_size=300, chunk_overlap=60)
+    for start, end, chunk in splitter.split_stream(io.StringIO(text)):
+        assert text[start:end] == chunk
+        assert 0 < len(chunk) <= 300
+
+
+def test_chunks_do_not_depend_on_the_read_block_size(monkeypatch):
+    text = paragraphs_text(random.Random(3))
+    expected = streaming_chunks(text, 500, 100)
+    monkeypatch.setattr(text_chunker, "READ_BLOCK_SIZE", 97)
+    assert streaming_chunks(text, 500, 100) == expected
+
+
+def test_overlap_must_be_smaller_than_the_chunk_size():
+    with pytest.raises(ValueError):
+        StreamingTextSplitter(chunk_size=100, chunk_overlap=100)
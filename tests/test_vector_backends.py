@@ -0,0 +1,346 @@
+"""Query behaviour shared by the Qdrant and embedded vector backends.
+
+Every scenario runs against an in-memory Qdrant client and an embedded index
+in a temporary directory, under the full, truncated and truncated+rescored
+vector layouts, and for the embedded index with IVF partitions as well.
+Results are checked against exact NumPy search, so both backends must
+return the same points.
+"""
+import asyncio
+import math
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from easyrag.config import settings
+from easyrag.services.collection_profile import truncate_vectors
+from easyrag.services.embedded_index import EmbeddedBackend
+from easyrag.services.vector_backend import QdrantBackend, SearchRequest
+from easyrag.services.vectorstore_service import search_filter, source_filter
+
+DIM = 32
+TRUNCATED_DIM = 8
+POINTS = 400
+SOURCES = ["a.pdf", "b.pdf", "c.txt", "d.md"]
+K = 10
+
+# (backend, vector_dim, ivf_lists)
+CONFIGURATIONS = {
+    "qdrant": ("qdrant", None, 0),
+    "qdrant-truncated": ("qdrant", TRUNCATED_DIM, 0),
+    "embedded": ("embedded", None, 0),
+    "embedded-truncated": ("embedded", TRUNCATED_DIM, 0),
+    "embedded-ivf": ("embedded", None, 4),
+}
+
+
+def unit_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Unit vectors whose variance decays with the dimension index, like Matryoshka embeddings."""
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32) / np.sqrt(1.0 + np.arange(DIM) / 4.0)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def point_ids(count: int, offset: int = 0) -> list:
+    return [str(uuid.UUID(int=offset + i + 1)) for i in range(count)]
+
+
+def payload(i: int, text: str = None) -> dict:
+    return {
+        "page_content": text or f"chunk {i}",
+        "metadata": {"source": SOURCES[i % len(SOURCES)], "page": i % 25, "start_index": i},
+    }
+
+
+class Collection:
+    """Points written to a backend, with exact search over them for comparison."""
+
+    def __init__(self, vectors: np.ndarray, payloads: list, vector_dim: int = None):
+        self.ids = point_ids(len(vectors))
+        self.vectors = vectors
+        self.payloads = payloads
+        self.vector_dim = vector_dim
+        self.alive = np.ones(len(vectors), dtype=bool)
+
+    def exact(self, query: np.ndarray, k: int, rescore: bool = False, rows: np.ndarray = None) -> list:
+        """IDs of the exact top k, searching the stored (possibly truncated) vectors."""
+        mask = self.alive.copy() if rows is None else self.alive & rows
+        candidates = np.flatnonzero(mask)
+        if self.vector_dim is None:
+            scores = self.vectors[candidates] @ query
+        else:
+            scores = truncate_vectors(self.vectors[candidates], self.vector_dim) @ truncate_vectors([query], self.vector_dim)[0]
+        order = candidates[np.argsort(-scores, kind="stable")]
+        if rescore and self.vector_dim is not None:
+            order = order[:math.ceil(k * settings.rescore_oversampling)]
+            order = order[np.argsort(-(self.vectors[order] @ query), kind="stable")]
+        return [self.ids[i] for i in order[:k]]
+
+    def rows(self, sources: list = None, page_from: int = None, page_to: int = None) -> np.ndarray:
+        """Rows matching a search filter."""
+        matches = []
+        for point in self.payloads:
+            metadata = point["metadata"]
+            matches.append(
+                (sources is None or metadata["source"] in sources)
+                and (page_from is None or metadata["page"] >= page_from)
+                and (page_to is None or metadata["page"] <= page_to)
+            )
+        return np.array(matches)
+
+
+@pytest.fixture(params=list(CONFIGURATIONS))
+def configuration(request, monkeypatch, tmp_path):
+    kind, vector_dim, ivf_lists = CONFIGURATIONS[request.param]
+    monkeypatch.setattr(settings, "vector_dim", vector_dim)
+    monkeypatch.setattr(settings, "store_full_vectors", True)
+    monkeypatch.setattr(settings, "embedded_index_dtype", "float32")
+    monkeypatch.setattr(settings, "embedded_index_ivf_lists", ivf_lists)
+    # Probing every partition makes IVF search exact
+    monkeypatch.setattr(settings, "embedded_index_ivf_probes", max(ivf_lists, 1))
+    return kind, vector_dim, tmp_path
+
+
+def make_backend(kind: str, path, client: AsyncQdrantClient = None):
+    if kind == "qdrant":
+        return QdrantBackend(client, "test")
+    return EmbeddedBackend("test", path=str(path))
+
+
+async def fill(backend, vector_dim: int) -> Collection:
+    rng = np.random.default_rng(0)
+    collection = Collection(unit_vectors(rng, POINTS), [payload(i) for i in range(POINTS)], vector_dim)
+    await backend.create_collection(DIM)
+    await backend.open()
+    for start in range(0, POINTS, 100):
+        await backend.upsert(collection.ids[start:start + 100], collection.vectors[start:start + 100],
+                             collection.payloads[start:start + 100])
+    await backend.barrier()
+    return collection
+
+
+async def search_ids(backend, query: np.ndarray, k: int = K, **kwargs) -> list:
+    hits = (await backend.search([SearchRequest(query.tolist(), k, **kwargs)]))[0]
+    return [hit.id for hit in hits]
+
+
+def run_scenario(configuration, scenario) -> None:
+    """Run a scenario against a freshly filled backend of the configuration."""
+    kind, vector_dim, path = configuration
+
+    async def main():
+        client = AsyncQdrantClient(":memory:") if kind == "qdrant" else None
+        backend = make_backend(kind, path, client)
+        try:
+            collection = await fill(backend, vector_dim)
+            await scenario(backend, collection)
+        finally:
+            await backend.close()
+            if client is not None:
+                await client.close()
+
+    asyncio.run(main())
+
+
+def test_search_matches_exact_search(configuration):
+    async def scenario(backend, collection):
+        queries = unit_vectors(np.random.default_rng(1), 5)
+        assert await backend.points_count() == POINTS
+        assert backend.layout.size == (collection.vector_dim or DIM)
+        if settings.embedded_index_ivf_lists:
+            assert backend.index._centroids is not None, "IVF partitions were not trained"
+        for query in queries:
+            hits = (await backend.search([SearchRequest(query.tolist(), K)]))[0]
+            assert [hit.id for hit in hits] == collection.exact(query, K)
+            scores = [hit.score for hit in hits]
+            assert scores == sorted(scores, reverse=True)
+            assert hits[0].payload == collection.payloads[collection.ids.index(hits[0].id)]
+
+    run_scenario(configuration, scenario)
+
+
+def test_rescore_reranks_truncated_candidates(configuration):
+    async def scenario(backend, collection):
+        for query in unit_vectors(np.random.default_rng(2), 5):
+            hits = (await backend.search([SearchRequest(query.tolist(), K, rescore=True)]))[0]
+            assert [hit.id for hit in hits] == collection.exact(query, K, rescore=True)
+            if collection.vector_dim is not None:
+                # Rescored scores are full-embedding cosine similarities
+                expected = collection.vectors[[collection.ids.index(hit.id) for hit in hits]] @ query
+                np.testing.assert_allclose([hit.score for hit in hits], expected, atol=1e-4)
+
+    run_scenario(configuration, scenario)
+
+
+def test_filtered_search(configuration):
+    async def scenario(backend, collection):
+        query = unit_vectors(np.random.default_rng(3), 1)[0]
+        for sources, page_from, page_to in [(["b.pdf"], None, None), (["a.pdf", "d.md"], 3, 9),
+                                            (None, 20, None), (None, None, 2), (["c.txt"], 24, 24)]:
+            query_filter = search_filter(sources=sources, page_from=page_from, page_to=page_to)
+            hits = (await backend.search([SearchRequest(query.tolist(), K, query_filter)]))[0]
+            rows = collection.rows(sources, page_from, page_to)
+            assert [hit.id for hit in hits] == collection.exact(query, K, rows=rows)
+            assert await backend.count(query_filter) == int(rows.sum())
+
+        unknown = search_filter(sources=["missing.pdf"])
+        assert await search_ids(backend, query, query_filter=unknown) == []
+
+    run_scenario(configuration, scenario)
+
+
+def test_batch_search_matches_single_searches(configuration):
+    async def scenario(backend, collection):
+        queries = unit_vectors(np.random.default_rng(4), 6)
+        filters = [None, search_filter(sources=["a.pdf"]), None, search_filter(page_from=5, page_to=10), None, None]
+        requests = [SearchRequest(query.tolist(), k, query_filter, rescore=i % 2 == 0)
+                    for i, (query, query_filter, k) in enumerate(zip(queries, filters, [1, 5, 10, 20, 3, 7]))]
+        batch = await backend.search(requests)
+        assert len(batch) == len(requests)
+        for request, hits in zip(requests, batch):
+            single = (await backend.search([request]))[0]
+            assert [hit.id for hit in hits] == [hit.id for hit in single]
+            assert len(hits) == request.k
+
+    run_scenario(configuration, scenario)
+
+
+def test_delete_points_and_sources(configuration):
+    async def scenario(backend, collection):
+        query = unit_vectors(np.random.default_rng(5), 1)[0]
+        removed = (await search_ids(backend, query))[:3]
+        await backend.delete(removed)
+        await backend.barrier()
+        for point_id in removed:
+            collection.alive[collection.ids.index(point_id)] = False
+        assert await backend.count() == POINTS - 3
+        assert await search_ids(backend, query) == collection.exact(query, K)
+
+        await backend.delete_by_filter(source_filter("a.pdf"))
+        await backend.barrier()
+        collection.alive &= ~collection.rows(["a.pdf"])
+        assert await backend.count() == int(collection.alive.sum())
+        assert await backend.scroll_ids(source_filter("a.pdf")) == set()
+        assert await search_ids(backend, query) == collection.exact(query, K)
+
+    run_scenario(configuration, scenario)
+
+
+def test_reupload_replaces_points(configuration):
+    async def scenario(backend, collection):
+        rng = np.random.default_rng(6)
+        ids = collection.ids[:50]
+        vectors = unit_vectors(rng, 50)
+        payloads = [payload(i, text=f"new chunk {i}") for i in range(50)]
+        await backend.upsert(ids, vectors, payloads)
+        await backend.barrier()
+        collection.vectors[:50] = vectors
+        collection.payloads[:50] = payloads
+        assert await backend.count() == POINTS
+
+        query = vectors[7]
+        hits = (await backend.search([SearchRequest(query.tolist(), K)]))[0]
+        assert [hit.id for hit in hits] == collection.exact(query, K)
+        assert hits[0].id == ids[7]
+        assert hits[0].payload["page_content"] == "new chunk 7"
+
+    run_scenario(configuration, scenario)
+
+
+def test_embedded_index_reopens_with_same_results(configuration):
+    kind, vector_dim, path = configuration
+    if kind != "embedded":
+        pytest.skip("Only the embedded index is stored on local disk")
+    queries = unit_vectors(np.random.default_rng(7), 5)
+    filters = [None, search_filter(sources=["c.txt"]), None, search_filter(page_to=4), None]
+
+    async def search_all(backend):
+        requests = [SearchRequest(query.tolist(), K, query_filter, rescore=True)
+                    for query, query_filter in zip(queries, filters)]
+        return [[(hit.id, round(hit.score, 5), hit.payload) for hit in hits] for hits in await backend.search(requests)]
+
+    async def main():
+        backend = make_backend(kind, path)
+        await fill(backend, vector_dim)
+        await backend.delete(point_ids(10))
+        before = await search_all(backend)
+        await backend.close()
+
+        reopened = make_backend(kind, path)
+        assert await reopened.collection_exists()
+        assert await reopened.open() == backend.layout
+        assert await reopened.count() == POINTS - 10
+        assert await search_all(reopened) == before
+        await reopened.close()
+
+    asyncio.run(main())
+
+
+def test_embedded_search_ignores_slots_reused_during_the_scan(configuration, monkeypatch):
+    kind, vector_dim, path = configuration
+    if kind != "embedded":
+        pytest.skip("Slots are an embedded index detail")
+
+    async def scenario(backend, collection):
+        index = backend.index
+        query = unit_vectors(np.random.default_rng(8), 1)[0]
+        best = (await search_ids(backend, query))[0]
+        replacement = str(uuid.UUID(int=POINTS + 1))
+        scan = index._scan
+
+        def scan_then_replace(*args):
+            # The best point is deleted and a new point written while the search is scoring
+            results = scan(*args)
+            index.delete([best])
+            index.upsert([replacement], -query[None], [payload(POINTS, text="replacement")])
+            return results
+
+        monkeypatch.setattr(index, "_scan", scan_then_replace)
+        hits = (await backend.search([SearchRequest(query.tolist(), K)]))[0]
+        monkeypatch.setattr(index, "_scan", scan)
+        assert replacement not in [hit.id for hit in hits]
+        assert best not in [hit.id for hit in hits]
+        # Once no search can see the deleted point any more, its slot is reused
+        index.upsert([str(uuid.UUID(int=POINTS + 2))], query[None], [payload(POINTS + 1)])
+        assert index._high_water == POINTS + 1
+
+    run_scenario(configuration, scenario)
+
+
+def test_embedded_ivf_training_does_not_block_the_index(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from easyrag.services import embedded_index
+    from easyrag.services.collection_profile import VectorLayout
+
+    index = embedded_index.EmbeddedIndex(str(tmp_path / "index"), dtype="float32", ivf_lists=4, ivf_probes=4)
+    index.create(VectorLayout(size=DIM))
+    vectors = unit_vectors(np.random.default_rng(9), POINTS)
+    ids = point_ids(POINTS)
+    index.upsert(ids[:100], vectors[:100], [payload(i) for i in range(100)])
+    late_id, late_vector = str(uuid.UUID(int=POINTS + 1)), vectors[:1]
+    during_training = []
+
+    class Assignments(embedded_index.GrowableArray):
+        def __init__(self, path, *args):
+            super().__init__(path, *args)
+            if path.endswith("ivf_lists.bin"):
+                # Other threads use the index while the partitions are being trained
+                executor = ThreadPoolExecutor(1)
+                try:
+                    search = executor.submit(index.search, [SearchRequest(vectors[0].tolist(), K)])
+                    during_training.append(search.result(timeout=5)[0])
+                    executor.submit(index.upsert, [late_id], late_vector, [payload(0)]).result(timeout=5)
+                finally:
+                    executor.shutdown(wait=False)
+
+    monkeypatch.setattr(embedded_index, "GrowableArray", Assignments)
+    index.upsert(ids[100:], vectors[100:], [payload(i) for i in range(100, POINTS)])
+    assert index._centroids is not None
+    assert during_training and during_training[0][0].id == ids[0]
+    # The point written during training was assigned to its partition when the partitions were switched in
+    slot = index._slots_of([late_id])[late_id]
+    assert index._assignments.array[slot] == np.argmax(index._centroids @ late_vector[0])
+    assert (index.search([SearchRequest(late_vector[0].tolist(), 2)])[0][0].id) in (late_id, ids[0])
+    index.close()